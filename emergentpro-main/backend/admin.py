@@ -3,7 +3,7 @@ import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from pathlib import Path
-import bcrypt
+from passwords import hash_password_async, hasher
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -28,7 +28,7 @@ async def reset_admin():
 
     # Create new admin
     print(f"Creating fresh admin user...")
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = await hash_password_async(password)
     
     new_admin = {
         "id": "user-admin-001",
@@ -48,6 +48,7 @@ async def reset_admin():
     print(f"Login with: {email} / {password}")
     
     client.close()
+    hasher.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(reset_admin())
\ No newline at end of file
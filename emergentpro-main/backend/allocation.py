@@ -0,0 +1,367 @@
+import heapq
+import os
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# `capacity_hours` is per period of this many calendar days (160h ~ a working month)
+RESOURCE_CAPACITY_PERIOD_DAYS = float(os.environ.get('RESOURCE_CAPACITY_PERIOD_DAYS', 30))
+
+# Tasks in these states no longer consume capacity
+INACTIVE_TASK_STATUSES = ("completed",)
+
+# Fields the engine needs from each collection
+ALLOCATION_TASK_FIELDS = {"_id": 0, "id": 1, "project_id": 1, "start_date": 1, "end_date": 1, "estimated_hours": 1,
+                          "assigned_to": 1, "status": 1}
+ALLOCATION_RESOURCE_FIELDS = {"_id": 0, "id": 1, "name": 1, "capacity_hours": 1, "availability": 1,
+                              "leave_schedule": 1, "allocated_projects": 1}
+
+# Loads are sums of floats; ignore overshoot below this many hours per day
+_EPSILON = 1e-6
+
+# ================= OVER-ALLOCATION =================
+Window = Tuple[Optional[int], Optional[int]]
+
+class Assignment(NamedTuple):
+    """One resource's share of one task, as an inclusive range of day ordinals."""
+    task_id: str
+    project_id: str
+    resource_id: str
+    start: int
+    end: int
+    hours_per_day: float
+
+def parse_day(value) -> Optional[int]:
+    """Day ordinal of an ISO date or datetime string; None if it isn't one."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
+
+def format_day(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+def daily_capacity(resource: Dict) -> float:
+    availability = resource.get("availability", 100) / 100
+    return resource.get("capacity_hours", 160) * availability / RESOURCE_CAPACITY_PERIOD_DAYS
+
+def leave_windows(resource: Dict) -> List[Tuple[int, int]]:
+    windows = []
+    for leave in resource.get("leave_schedule") or []:
+        start = parse_day(leave.get("start_date") or leave.get("start"))
+        end = parse_day(leave.get("end_date") or leave.get("end")) or start
+        if start is not None and end >= start:
+            windows.append((start, end))
+    return windows
+
+def task_assignments(task: Dict, resource_ids: Set[str]) -> List[Assignment]:
+    """Split a task's estimated hours evenly across its assignees and over its days.
+
+    Assignees that aren't known resources (e.g. user ids) take their share
+    but aren't reported.
+    """
+    start, end = parse_day(task.get("start_date")), parse_day(task.get("end_date"))
+    everyone = task.get("assigned_to") or []
+    assignees = [a for a in everyone if a in resource_ids]
+    if start is None or end is None or end < start or not assignees or task.get("status") in INACTIVE_TASK_STATUSES:
+        return []
+    hours_per_day = (task.get("estimated_hours") or 0) / len(everyone) / (end - start + 1)
+    if hours_per_day <= 0:
+        return []
+    return [Assignment(task["id"], task.get("project_id"), resource_id, start, end, hours_per_day)
+            for resource_id in assignees]
+
+def _clip(start: int, end: int, window: Window) -> Optional[Tuple[int, int]]:
+    low, high = window
+    start = start if low is None else max(start, low)
+    end = end if high is None else min(end, high)
+    return (start, end) if start <= end else None
+
+def sweep(assignments: Iterable[Assignment], capacity: float, leaves: Iterable[Tuple[int, int]],
+          window: Window = (None, None)) -> List[Dict]:
+    """Day ranges where one resource's load exceeds its capacity.
+
+    Each assignment and leave contributes an open and a close event; after
+    sorting, a single pass keeps the running load, so the cost is
+    O(k log k) for k events. Capacity is zero on leave days. Adjacent
+    overloaded segments are merged into one range.
+    """
+    # (day, load delta, leave delta, task id)
+    events: List[Tuple[int, float, int, Optional[str]]] = []
+    for assignment in assignments:
+        clipped = _clip(assignment.start, assignment.end, window)
+        if clipped:
+            events.append((clipped[0], assignment.hours_per_day, 0, assignment.task_id))
+            events.append((clipped[1] + 1, -assignment.hours_per_day, 0, assignment.task_id))
+    for start, end in leaves:
+        clipped = _clip(start, end, window)
+        if clipped:
+            events.append((clipped[0], 0.0, 1, None))
+            events.append((clipped[1] + 1, 0.0, -1, None))
+    events.sort(key=lambda event: event[0])
+
+    ranges: List[Dict] = []
+    current: Optional[Dict] = None
+    load, on_leave = 0.0, 0
+    active: Dict[str, int] = {}
+    index = 0
+    while index < len(events):
+        day = events[index][0]
+        while index < len(events) and events[index][0] == day:
+            _, load_delta, leave_delta, task_id = events[index]
+            load += load_delta
+            on_leave += leave_delta
+            if task_id is not None:
+                active[task_id] = active.get(task_id, 0) + (1 if load_delta > 0 else -1)
+                if not active[task_id]:
+                    del active[task_id]
+            index += 1
+        if not active:
+            load = 0.0  # drop accumulated float error
+        if index == len(events):
+            break
+        next_day = events[index][0]
+        available = 0.0 if on_leave else capacity
+        if load > available + _EPSILON:
+            excess = (load - available) * (next_day - day)
+            if current is not None and current["end"] == day - 1:
+                current["end"] = next_day - 1
+                current["peak"] = max(current["peak"], load)
+                current["excess"] += excess
+                current["on_leave"] = current["on_leave"] or bool(on_leave)
+                current["tasks"].update(active)
+            else:
+                current = {"start": day, "end": next_day - 1, "peak": load, "excess": excess,
+                           "on_leave": bool(on_leave), "tasks": set(active)}
+                ranges.append(current)
+        else:
+            current = None
+
+    return [{
+        "start_date": format_day(r["start"]),
+        "end_date": format_day(r["end"]),
+        "days": r["end"] - r["start"] + 1,
+        "peak_hours_per_day": round(r["peak"], 2),
+        "capacity_hours_per_day": round(capacity, 2),
+        "excess_hours": round(r["excess"], 2),
+        "on_leave": r["on_leave"],
+        "task_ids": sorted(r["tasks"]),
+    } for r in ranges]
+
+def group_assignments(tasks: Iterable[Dict], resource_ids: Set[str]) -> Dict[str, List[Assignment]]:
+    by_resource: Dict[str, List[Assignment]] = {}
+    for task in tasks:
+        for assignment in task_assignments(task, resource_ids):
+            by_resource.setdefault(assignment.resource_id, []).append(assignment)
+    return by_resource
+
+def over_allocations(tasks: Iterable[Dict], resources: Iterable[Dict], window: Window = (None, None)) -> List[Dict]:
+    """Over-allocation report for every resource, across all the given tasks.
+
+    O(n log n) in the number of assignments: each resource's events are
+    sorted and swept once.
+    """
+    resources = {resource["id"]: resource for resource in resources}
+    by_resource = group_assignments(tasks, set(resources))
+    conflicts = []
+    for resource_id, assignments in sorted(by_resource.items()):
+        resource = resources[resource_id]
+        capacity = daily_capacity(resource)
+        ranges = sweep(assignments, capacity, leave_windows(resource), window)
+        if not ranges:
+            continue
+        peak = max(r["peak_hours_per_day"] for r in ranges)
+        conflicts.append({
+            "resource_id": resource_id,
+            "resource_name": resource.get("name"),
+            "type": "over_allocation",
+            "utilization": round(peak / capacity * 100) if capacity > 0 else None,
+            "capacity_hours_per_day": round(capacity, 2),
+            "total_excess_hours": round(sum(r["excess_hours"] for r in ranges), 2),
+            "allocated_projects": sorted({a.project_id for a in assignments if a.project_id}),
+            "ranges": ranges,
+        })
+    return conflicts
+
+# ================= LEVELING =================
+# Tasks that haven't started may move; everything else keeps its dates
+LEVELABLE_TASK_STATUSES = ("todo", "blocked")
+
+# TaskPriority values, placed highest first
+PRIORITY_RANK = {"critical": 3, "high": 2, "medium": 1, "low": 0}
+
+LEVELING_TASK_FIELDS = {**ALLOCATION_TASK_FIELDS, "name": 1, "priority": 1, "version": 1}
+
+class ResourceProfile:
+    """Per-day committed hours for a set of resources, with leave days at zero capacity."""
+
+    def __init__(self, resources: Iterable[Dict]):
+        self.capacity: Dict[str, float] = {}
+        self.leave: Dict[str, Set[int]] = {}
+        self.load: Dict[str, Dict[int, float]] = {}
+        for resource in resources:
+            resource_id = resource["id"]
+            self.capacity[resource_id] = daily_capacity(resource)
+            self.leave[resource_id] = {day for start, end in leave_windows(resource) for day in range(start, end + 1)}
+            self.load[resource_id] = {}
+
+    def add(self, resource_id: str, start: int, end: int, hours_per_day: float):
+        load = self.load[resource_id]
+        for day in range(start, end + 1):
+            load[day] = load.get(day, 0.0) + hours_per_day
+
+    def last_blocked(self, resource_id: str, hours_per_day: float, start: int, end: int) -> Optional[int]:
+        """Latest day in [start, end] on which ``hours_per_day`` more would exceed capacity."""
+        load, leave = self.load[resource_id], self.leave[resource_id]
+        capacity = self.capacity[resource_id]
+        for day in range(end, start - 1, -1):
+            available = 0.0 if day in leave else capacity
+            if load.get(day, 0.0) + hours_per_day > available + _EPSILON:
+                return day
+        return None
+
+    def earliest_fit(self, loads: List[Tuple[str, float]], earliest: int, latest: int, duration: int) -> Optional[int]:
+        """First start in [earliest, latest] at which every load fits, or None.
+
+        On a clash the candidate jumps past the latest blocked day, so each
+        day in the range is inspected at most once per resource.
+        """
+        start = earliest
+        while start <= latest:
+            blocked = None
+            for resource_id, hours_per_day in loads:
+                day = self.last_blocked(resource_id, hours_per_day, start, start + duration - 1)
+                if day is not None and (blocked is None or day > blocked):
+                    blocked = day
+            if blocked is None:
+                return start
+            start = blocked + 1
+        return None
+
+def level_resources(tasks: List[Dict], graphs: Dict[str, Any], resources: List[Dict],
+                    background: Iterable[Dict] = ()) -> Dict[str, Any]:
+    """Delay non-critical tasks within their float until their resources fit.
+
+    A serial schedule generation pass: tasks whose predecessors are placed
+    become eligible, and the eligible task with the highest (critical path,
+    TaskPriority, least float, earliest start) goes to the first day in
+    [current start, late start] where every assignee has room. Successors
+    of a delayed task are pushed along their dependency constraints; since
+    nothing moves past its CPM late start, project finish dates hold.
+    Tasks that fit nowhere, including any over capacity on their own, keep
+    their earliest start and are reported as unplaced. Tasks that can't
+    move (started, or in a project without a schedule) stay put and bound
+    how late their predecessors may go.
+
+    ``graphs`` maps project id to its computed ScheduleGraph; ``background``
+    is other work by the same resources, which keeps its dates.
+    """
+    profile = ResourceProfile(resources)
+    resource_ids = set(profile.capacity)
+    by_id = {task["id"]: task for task in tasks}
+    current: Dict[str, int] = {}
+    # task id -> (duration, CPM late start, (resource id, hours per day) loads, pinned)
+    movable: Dict[str, Tuple[int, int, List[Tuple[str, float]], bool]] = {}
+    unplaced: List[str] = []
+
+    for task in background:
+        for a in task_assignments(task, resource_ids):
+            profile.add(a.resource_id, a.start, a.end, a.hours_per_day)
+    for task in tasks:
+        task_id = task["id"]
+        start, end = parse_day(task.get("start_date")), parse_day(task.get("end_date"))
+        graph = graphs.get(task.get("project_id"))
+        if start is None or end is None or end < start:
+            continue
+        current[task_id] = start
+        assignments = task_assignments(task, resource_ids)
+        if (task.get("status") or "todo") in LEVELABLE_TASK_STATUSES and graph is not None and graph.scheduled(task_id):
+            loads = [(a.resource_id, a.hours_per_day) for a in assignments]
+            # Over capacity on its own: no shift helps, so it only moves if pushed and others plan around it
+            pinned = any(hours > profile.capacity[resource_id] + _EPSILON for resource_id, hours in loads)
+            movable[task_id] = (end - start + 1, graph.origin + graph.late_start(task_id), loads, pinned)
+            if not pinned:
+                continue
+        for a in assignments:
+            profile.add(a.resource_id, a.start, a.end, a.hours_per_day)
+
+    # Successors that keep their dates cap how far a task may slide
+    latest_start = {task_id: latest for task_id, (_, latest, _, _) in movable.items()}
+    for task_id in movable:
+        for succ_id, k in graphs[by_id[task_id]["project_id"]].successors(task_id):
+            if succ_id not in movable and succ_id in current:
+                latest_start[task_id] = min(latest_start[task_id], current[succ_id] - int(k))
+
+    def pred_edges(task_id: str) -> List[Tuple[str, float]]:
+        graph = graphs[by_id[task_id]["project_id"]]
+        return [(pred_id, k) for pred_id, k in graph.predecessors(task_id) if pred_id in movable]
+
+    def priority_key(task_id: str) -> Tuple:
+        task = by_id[task_id]
+        graph = graphs[task["project_id"]]
+        return (not graph.is_critical(task_id), -PRIORITY_RANK.get(task.get("priority"), 1),
+                graph.float_days(task_id), current[task_id], task_id)
+
+    waiting = {task_id: len(pred_edges(task_id)) for task_id in movable}
+    successors: Dict[str, List[str]] = {}
+    for task_id in movable:
+        for pred_id, _ in pred_edges(task_id):
+            successors.setdefault(pred_id, []).append(task_id)
+    ready = [(priority_key(task_id), task_id) for task_id, count in waiting.items() if count == 0]
+    heapq.heapify(ready)
+
+    placed: Dict[str, int] = {}
+    while ready:
+        _, task_id = heapq.heappop(ready)
+        duration, _, loads, pinned = movable[task_id]
+        earliest = current[task_id]
+        for pred_id, k in pred_edges(task_id):
+            if placed[pred_id] > current[pred_id]:
+                # Only carry delays we introduced; existing slips aren't ours to fix
+                earliest = max(earliest, placed[pred_id] + int(k))
+        start = None if pinned else profile.earliest_fit(loads, earliest, latest_start[task_id], duration)
+        if start is None:
+            start = earliest
+            unplaced.append(task_id)
+        placed[task_id] = start
+        for resource_id, hours_per_day in loads:
+            if pinned:
+                profile.add(resource_id, current[task_id], current[task_id] + duration - 1, -hours_per_day)
+            profile.add(resource_id, start, start + duration - 1, hours_per_day)
+        for succ_id in successors.get(task_id, ()):
+            waiting[succ_id] -= 1
+            if waiting[succ_id] == 0:
+                heapq.heappush(ready, (priority_key(succ_id), succ_id))
+
+    changes = []
+    for task_id, start in placed.items():
+        if start == current[task_id]:
+            continue
+        task = by_id[task_id]
+        duration = movable[task_id][0]
+        changes.append({
+            "id": task_id,
+            "name": task.get("name"),
+            "project_id": task.get("project_id"),
+            "priority": task.get("priority"),
+            "version": task.get("version", 0),
+            "start_date": task.get("start_date"),
+            "end_date": task.get("end_date"),
+            "new_start_date": format_day(start),
+            "new_end_date": format_day(start + duration - 1),
+            "delay_days": start - current[task_id],
+            "float_days": graphs[task["project_id"]].float_days(task_id),
+        })
+    changes.sort(key=lambda change: (change["new_start_date"], change["id"]))
+    return {"changes": changes, "unplaced": sorted(unplaced)}
+
+def shifted(tasks: Iterable[Dict], changes: Iterable[Dict]) -> List[Dict]:
+    """``tasks`` with the proposed dates from ``changes`` applied."""
+    moves = {change["id"]: change for change in changes}
+    return [{**task, "start_date": moves[task["id"]]["new_start_date"], "end_date": moves[task["id"]]["new_end_date"]}
+            if task["id"] in moves else task for task in tasks]
+
+def allocation_totals(conflicts: List[Dict]) -> Dict[str, Any]:
+    return {"resources_over_capacity": len(conflicts),
+            "excess_hours": round(sum(c["total_excess_hours"] for c in conflicts), 2)}
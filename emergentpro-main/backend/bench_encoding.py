@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from compression import COMPRESSION_BROTLI_QUALITY, COMPRESSION_GZIP_LEVEL, brotli
+from responses import dumps
+
+# Benchmarks response encoding on the seeded dataset (POST /api/seed first),
+# replicated in memory to simulate a larger deployment. Compares the old path
+# (jsonable_encoder + json.dumps, as FastAPI's JSONResponse does) with orjson,
+# and raw bytes with gzip / brotli.
+COLLECTIONS = ["programs", "projects", "tasks", "resources", "budget", "risks", "issues", "vendors",
+               "contracts", "approvals"]
+
+def stdlib_encode(docs: List[Dict]) -> bytes:
+    return json.dumps(jsonable_encoder(docs), ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+def orjson_encode(docs: List[Dict]) -> bytes:
+    return dumps(docs)
+
+def scale_docs(docs: List[Dict], scale: int) -> List[Dict]:
+    # Fresh ids so copies differ; replicated rows still compress better than organic data
+    return [{**doc, "id": str(uuid.uuid4())} for _ in range(scale) for doc in docs]
+
+def best_of(fn: Callable, arg, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def measure(docs: List[Dict], repeat: int) -> Dict[str, float]:
+    body = orjson_encode(docs)
+    result = {
+        "docs": len(docs),
+        "stdlib_ms": best_of(stdlib_encode, docs, repeat),
+        "orjson_ms": best_of(orjson_encode, docs, repeat),
+        "raw_kb": len(body) / 1024,
+        "gzip_kb": len(gzip.compress(body, COMPRESSION_GZIP_LEVEL)) / 1024,
+        "gzip_ms": best_of(lambda b: gzip.compress(b, COMPRESSION_GZIP_LEVEL), body, repeat),
+    }
+    if brotli is not None:
+        result["br_kb"] = len(brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)) / 1024
+        result["br_ms"] = best_of(lambda b: brotli.compress(b, quality=COMPRESSION_BROTLI_QUALITY), body, repeat)
+    return result
+
+def report(results: Dict[str, Dict[str, float]]):
+    columns = ["docs", "stdlib_ms", "orjson_ms", "raw_kb", "gzip_kb", "gzip_ms", "br_kb", "br_ms"]
+    print(f"{'collection':<12}" + "".join(f"{c:>12}" for c in columns))
+    for name, row in results.items():
+        cells = "".join(f"{row[c]:>12.1f}" if c in row else f"{'-':>12}" for c in columns)
+        print(f"{name:<12}{cells}")
+    total = results.get("TOTAL")
+    if total:
+        print(f"\norjson speedup: {total['stdlib_ms'] / max(total['orjson_ms'], 1e-9):.1f}x, "
+              f"gzip ratio: {total['raw_kb'] / max(total['gzip_kb'], 1e-9):.1f}x"
+              + (f", br ratio: {total['raw_kb'] / max(total['br_kb'], 1e-9):.1f}x" if "br_kb" in total else ""))
+
+async def _main(args):
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    db_name = os.environ.get('DB_NAME', 'defense_pm')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    try:
+        results = {}
+        totals = {}
+        for name in args.collections:
+            docs = await db[name].find({}, {"_id": 0}).to_list(None)
+            if not docs:
+                print(f"⚠️ {name}: no documents, seed the database first")
+                continue
+            results[name] = measure(scale_docs(docs, args.scale), args.repeat)
+            for key, value in results[name].items():
+                totals[key] = totals.get(key, 0) + value
+        if totals:
+            results["TOTAL"] = totals
+        print(f"Scale x{args.scale}, best of {args.repeat} runs\n")
+        report(results)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    load_dotenv(Path(__file__).parent / '.env')
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding and compression of API payloads")
+    parser.add_argument("--scale", type=int, default=100, help="Replicate each seeded document this many times")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--collections", nargs="+", default=COLLECTIONS)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,238 @@
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import UpdateOne
+
+# Budget entry amount -> roll-up measure
+ROLLUP_MEASURES = {"amount_planned": "planned", "amount_actual": "actual", "amount_forecast": "forecast",
+                   "amount_released": "released"}
+
+# Budget entry fields the roll-ups read; edits touching none of them skip the update
+BUDGET_ROLLUP_INPUTS = ("project_id", "fiscal_year", "quarter", *ROLLUP_MEASURES)
+BUDGET_ROLLUP_FIELDS = {"_id": 0, "id": 1, **{field: 1 for field in BUDGET_ROLLUP_INPUTS}}
+
+# Where each measure's total lands on project and program documents
+PROJECT_TOTALS = {"planned": "budget_planned", "actual": "budget_spent", "forecast": "budget_forecast",
+                  "released": "budget_released"}
+PROGRAM_TOTALS = {"planned": "budget_allocated", "actual": "budget_spent", "forecast": "budget_forecast",
+                  "released": "budget_released"}
+
+ROLLUP_COLLECTION = "budget_rollups"
+
+# Project health score and cost variance, recomputed from the merged document
+# whenever progress or budget totals change
+def project_health_fields() -> Dict:
+    allocated = {"$ifNull": ["$budget_allocated", 1]}
+    spent = {"$ifNull": ["$budget_spent", 0]}
+    progress = {"$ifNull": ["$progress", 0]}
+    overrun_pct = {"$multiply": [{"$subtract": [{"$divide": [spent, allocated]}, 1]}, 100]}
+    budget_health = {"$cond": [{"$gt": [allocated, 0]}, {"$subtract": [100, {"$min": [100, {"$max": [0, overrun_pct]}]}]}, 100]}
+    schedule_health = {"$min": [100, {"$add": [progress, 20]}]}  # Simplified
+    return {
+        "health_score": {"$toInt": {"$trunc": {"$divide": [{"$add": [budget_health, schedule_health]}, 2]}}},
+        "cost_variance": {"$cond": [
+            {"$gt": [allocated, 0]},
+            {"$multiply": [{"$divide": [{"$subtract": [allocated, spent]}, allocated]}, 100]},
+            "$cost_variance",
+        ]},
+    }
+
+# (project id, fiscal year, quarter)
+Bucket = Tuple[str, str, str]
+
+def entry_amounts(entry: Optional[Dict]) -> Dict[Bucket, Dict[str, float]]:
+    if not entry or not entry.get("project_id"):
+        return {}
+    bucket = (entry["project_id"], str(entry.get("fiscal_year") or ""), str(entry.get("quarter") or ""))
+    amounts = {measure: float(entry.get(field) or 0) for field, measure in ROLLUP_MEASURES.items()}
+    amounts["entries"] = 1
+    return {bucket: amounts}
+
+def rollup_deltas(changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]) -> Dict[Bucket, Dict[str, float]]:
+    """Net change per (project, fiscal year, quarter) bucket from budget entry (before, after) pairs."""
+    deltas: Dict[Bucket, Dict[str, float]] = {}
+    for before, after in changes:
+        for sign, entry in ((-1, before), (1, after)):
+            for bucket, amounts in entry_amounts(entry).items():
+                totals = deltas.setdefault(bucket, {})
+                for measure, amount in amounts.items():
+                    totals[measure] = totals.get(measure, 0) + sign * amount
+    return {bucket: totals for bucket, totals in deltas.items() if any(totals.values())}
+
+def rollup_pipeline(match: Optional[Dict] = None) -> List[Dict]:
+    """Budget entries summed per (project, fiscal year, quarter)."""
+    return [
+        {"$match": match or {}},
+        {"$group": {
+            "_id": {"project_id": "$project_id", "fiscal_year": "$fiscal_year", "quarter": "$quarter"},
+            **{measure: {"$sum": {"$ifNull": [f"${field}", 0]}} for field, measure in ROLLUP_MEASURES.items()},
+            "entries": {"$sum": 1},
+        }},
+    ]
+
+def _rollup_key(scope: str, scope_id: str, fiscal_year: str, quarter: str) -> Dict[str, str]:
+    return {"scope": scope, "scope_id": scope_id, "fiscal_year": fiscal_year, "quarter": quarter}
+
+def _add(totals: Dict[str, Dict[str, float]], key: str, amounts: Dict[str, float]):
+    target = totals.setdefault(key, {})
+    for measure, amount in amounts.items():
+        target[measure] = target.get(measure, 0) + amount
+
+class BudgetRollups:
+    """Budget entry totals per project and program, overall and by fiscal year / quarter.
+
+    Overall totals live on the project and program documents, where pages
+    and the dashboard already read them. The fiscal year / quarter breakdown
+    lives in ``budget_rollups``, one document per (scope, id, year, quarter).
+    Entry writes apply deltas with $inc. Project totals go through a
+    pipeline update instead, so ``project_stages`` (health score, cost
+    variance) are recomputed in the same write.
+    """
+
+    def __init__(self, db, project_stages: Sequence[Dict] = ()):
+        self.db = db
+        self.project_stages = list(project_stages)
+        self.last_rebuild: Optional[Dict[str, Any]] = None
+
+    async def _programs_of(self, project_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        projects = await self.db.projects.find({"id": {"$in": list(project_ids)}},
+                                               {"_id": 0, "id": 1, "program_id": 1}).to_list(None)
+        return {p["id"]: p.get("program_id") for p in projects}
+
+    def _project_update(self, totals: Dict[str, float], now: str, absolute: bool = False) -> List[Dict]:
+        values = {
+            field: round(totals.get(measure, 0), 2) if absolute
+            else {"$add": [{"$ifNull": [f"${field}", 0]}, totals[measure]]}
+            for measure, field in PROJECT_TOTALS.items() if absolute or measure in totals
+        }
+        return [{"$set": {**values, "updated_at": now}}, *self.project_stages]
+
+    async def entries_changed(self, changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]) -> int:
+        """Apply budget entry (before, after) pairs; None stands for created / deleted."""
+        deltas = rollup_deltas(changes)
+        if not deltas:
+            return 0
+        program_of = await self._programs_of({project_id for project_id, _, _ in deltas})
+        now = datetime.now(timezone.utc).isoformat()
+
+        rollup_ops, projects, programs = [], {}, {}
+        for (project_id, fiscal_year, quarter), amounts in deltas.items():
+            scopes = [("project", project_id)]
+            if program_of.get(project_id):
+                scopes.append(("program", program_of[project_id]))
+            for scope, scope_id in scopes:
+                key = _rollup_key(scope, scope_id, fiscal_year, quarter)
+                rollup_ops.append(UpdateOne(key, {"$inc": amounts, "$set": {"updated_at": now}}, upsert=True))
+            _add(projects, project_id, amounts)
+            if program_of.get(project_id):
+                _add(programs, program_of[project_id], amounts)
+
+        await self.db[ROLLUP_COLLECTION].bulk_write(rollup_ops, ordered=False)
+        project_ops = [UpdateOne({"id": project_id}, self._project_update(totals, now))
+                       for project_id, totals in projects.items() if any(m in totals for m in PROJECT_TOTALS)]
+        program_ops = [UpdateOne({"id": program_id}, {
+            "$inc": {field: totals[measure] for measure, field in PROGRAM_TOTALS.items() if measure in totals},
+            "$set": {"updated_at": now},
+        }) for program_id, totals in programs.items() if any(m in totals for m in PROGRAM_TOTALS)]
+        if project_ops:
+            await self.db.projects.bulk_write(project_ops, ordered=False)
+        if program_ops:
+            await self.db.programs.bulk_write(program_ops, ordered=False)
+        return len(deltas)
+
+    async def entry_changed(self, before: Optional[Dict], after: Optional[Dict]) -> int:
+        return await self.entries_changed([(before, after)])
+
+    async def project_moved(self, project_id: str, old_program_id: Optional[str], new_program_id: Optional[str]):
+        """Carry a project's totals from its old program to its new one."""
+        if old_program_id == new_program_id:
+            return
+        rows = await self.db[ROLLUP_COLLECTION].find({"scope": "project", "scope_id": project_id},
+                                                    {"_id": 0}).to_list(None)
+        if not rows:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        measures = (*ROLLUP_MEASURES.values(), "entries")
+        totals: Dict[str, float] = {}
+        rollup_ops = []
+        for row in rows:
+            amounts = {measure: row.get(measure, 0) for measure in measures}
+            for measure, amount in amounts.items():
+                totals[measure] = totals.get(measure, 0) + amount
+            for sign, program_id in ((-1, old_program_id), (1, new_program_id)):
+                if program_id:
+                    key = _rollup_key("program", program_id, row["fiscal_year"], row["quarter"])
+                    rollup_ops.append(UpdateOne(key, {"$inc": {m: sign * v for m, v in amounts.items()},
+                                                      "$set": {"updated_at": now}}, upsert=True))
+        await self.db[ROLLUP_COLLECTION].bulk_write(rollup_ops, ordered=False)
+        await self.db.programs.bulk_write([
+            UpdateOne({"id": program_id}, {
+                "$inc": {field: sign * totals.get(measure, 0) for measure, field in PROGRAM_TOTALS.items()},
+                "$set": {"updated_at": now},
+            }) for sign, program_id in ((-1, old_program_id), (1, new_program_id)) if program_id
+        ], ordered=False)
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """Recompute every roll-up from the budget collection.
+
+        Meant for seeding and repair: deltas applied while it runs can be lost.
+        """
+        started = time.perf_counter()
+        groups = await self.db.budget.aggregate(rollup_pipeline()).to_list(None)
+        program_of = await self._programs_of({g["_id"].get("project_id") for g in groups if g["_id"].get("project_id")})
+        now = datetime.now(timezone.utc).isoformat()
+
+        rows: Dict[Tuple[str, str, str, str], Dict[str, float]] = {}
+        projects: Dict[str, Dict[str, float]] = {}
+        programs: Dict[str, Dict[str, float]] = {}
+        for group in groups:
+            project_id = group["_id"].get("project_id")
+            if not project_id:
+                continue
+            fiscal_year, quarter = str(group["_id"].get("fiscal_year") or ""), str(group["_id"].get("quarter") or "")
+            amounts = {measure: group[measure] for measure in (*ROLLUP_MEASURES.values(), "entries")}
+            scopes = [("project", project_id)]
+            if program_of.get(project_id):
+                scopes.append(("program", program_of[project_id]))
+            for scope, scope_id in scopes:
+                _add(rows, (scope, scope_id, fiscal_year, quarter), amounts)
+            _add(projects, project_id, amounts)
+            if program_of.get(project_id):
+                _add(programs, program_of[project_id], amounts)
+
+        await self.db[ROLLUP_COLLECTION].delete_many({})
+        if rows:
+            await self.db[ROLLUP_COLLECTION].insert_many([
+                {**_rollup_key(*key), **amounts, "updated_at": now} for key, amounts in rows.items()
+            ])
+        # Projects and programs without entries are reset to zero too
+        project_ids = await self.db.projects.distinct("id")
+        program_ids = await self.db.programs.distinct("id")
+        if project_ids:
+            await self.db.projects.bulk_write([
+                UpdateOne({"id": project_id}, self._project_update(projects.get(project_id, {}), now, absolute=True))
+                for project_id in project_ids
+            ], ordered=False)
+        if program_ids:
+            await self.db.programs.bulk_write([
+                UpdateOne({"id": program_id}, {"$set": {
+                    **{field: round(programs.get(program_id, {}).get(measure, 0), 2)
+                       for measure, field in PROGRAM_TOTALS.items()},
+                    "updated_at": now,
+                }}) for program_id in program_ids
+            ], ordered=False)
+        self.last_rebuild = {"entries": sum(g["entries"] for g in groups), "rollups": len(rows),
+                             "projects": len(project_ids), "programs": len(program_ids),
+                             "rebuilt_at": now, "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+        return self.last_rebuild
+
+    async def breakdown(self, scope: str, scope_id: Optional[str] = None,
+                        fiscal_year: Optional[str] = None) -> List[Dict]:
+        query: Dict[str, Any] = {"scope": scope}
+        if scope_id:
+            query["scope_id"] = scope_id
+        if fiscal_year:
+            query["fiscal_year"] = fiscal_year
+        cursor = self.db[ROLLUP_COLLECTION].find(query, {"_id": 0})
+        return await cursor.sort([("scope_id", 1), ("fiscal_year", 1), ("quarter", 1)]).to_list(None)
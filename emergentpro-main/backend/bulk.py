@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+# Bulk import limits
+BULK_IMPORT_MAX_ROWS = int(os.environ.get('BULK_IMPORT_MAX_ROWS', 50000))
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', 1000))
+BULK_UPDATE_MAX_ITEMS = int(os.environ.get('BULK_UPDATE_MAX_ITEMS', 5000))
+
+BULK_FORMATS = ("json", "csv", "ndjson")
+
+# Row index -> messages; rows are numbered from 0 in payload order
+RowErrors = Dict[int, List[str]]
+
+class BulkPayloadError(ValueError):
+    """The payload as a whole can't be processed (bad format, too many rows)."""
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> str:
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonlines" in content_type:
+        return "ndjson"
+    return "json"
+
+def _csv_cell(value: str) -> Any:
+    # Nested values round-trip as JSON text, the same way the CSV export writes them
+    if value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+def parse_rows(content: bytes, format: str) -> Tuple[List[Optional[Dict]], RowErrors]:
+    """Decode a payload into row dicts. Unparseable rows come back as None with an error."""
+    if format not in BULK_FORMATS:
+        raise BulkPayloadError(f"Unsupported format '{format}'; expected one of {', '.join(BULK_FORMATS)}")
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise BulkPayloadError("Payload must be UTF-8")
+
+    rows: List[Optional[Dict]] = []
+    errors: RowErrors = {}
+    if format == "json":
+        try:
+            data = json.loads(text or "[]")
+        except ValueError as e:
+            raise BulkPayloadError(f"Invalid JSON: {e}")
+        if isinstance(data, dict):
+            data = data.get("tasks")
+        if not isinstance(data, list):
+            raise BulkPayloadError("Expected a JSON array of rows")
+        rows = list(data)
+    elif format == "ndjson":
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                errors[len(rows)] = [f"Invalid JSON: {e}"]
+                rows.append(None)
+    else:
+        for record in csv.DictReader(io.StringIO(text)):
+            # Blank cells fall back to model defaults
+            rows.append({k: _csv_cell(v) for k, v in record.items() if k and v not in (None, "")})
+
+    for index, row in enumerate(rows):
+        if row is not None and not isinstance(row, dict):
+            errors[index] = ["Row must be an object"]
+            rows[index] = None
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise BulkPayloadError(f"At most {BULK_IMPORT_MAX_ROWS} rows per import")
+    return rows, errors
+
+def _format_error(error: Dict, skip: int = 0) -> str:
+    location = ".".join(str(part) for part in error["loc"][skip:])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+def validate_rows(rows: List[Optional[Dict]], model: Type[BaseModel], server_fields: Iterable[str],
+                  errors: RowErrors) -> List[Tuple[int, Dict]]:
+    """Validate rows against ``model``; returns (row index, document) pairs.
+
+    Each batch is validated as one list, so the common all-valid case is a single
+    call into pydantic-core; a failing batch is re-run without its bad rows.
+    ``server_fields`` are dropped from the input so the model defaults win.
+    """
+    server_fields = set(server_fields)
+    adapter = TypeAdapter(List[model])
+    documents: List[Tuple[int, Dict]] = []
+    for start in range(0, len(rows), BULK_IMPORT_BATCH_SIZE):
+        batch = [
+            (index, {k: v for k, v in rows[index].items() if k not in server_fields})
+            for index in range(start, min(start + BULK_IMPORT_BATCH_SIZE, len(rows)))
+            if rows[index] is not None
+        ]
+        try:
+            items = adapter.validate_python([row for _, row in batch])
+        except ValidationError as e:
+            failed: Dict[int, List[str]] = {}
+            for err in e.errors():
+                failed.setdefault(err["loc"][0], []).append(_format_error(err, skip=1))
+            for position, messages in failed.items():
+                errors[batch[position][0]] = messages
+            batch = [entry for position, entry in enumerate(batch) if position not in failed]
+            items = adapter.validate_python([row for _, row in batch])
+        documents.extend(zip((index for index, _ in batch), adapter.dump_python(items)))
+    return documents
+
+def derive_wbs_levels(documents: List[Tuple[int, Dict]]):
+    for _, doc in documents:
+        doc["wbs_level"] = len(doc["wbs_code"].split("."))
+
+def dependency_ids(doc: Dict) -> List[str]:
+    return [dep.get("task_id") for dep in doc.get("dependencies") or [] if isinstance(dep, dict)]
+
+def referenced_ids(documents: List[Tuple[int, Dict]]) -> Set[str]:
+    """Every task id the documents mention: their own, parents and predecessors."""
+    ids = set()
+    for _, doc in documents:
+        ids.add(doc["id"])
+        if doc.get("parent_task_id"):
+            ids.add(doc["parent_task_id"])
+        ids.update(dep_id for dep_id in dependency_ids(doc) if dep_id)
+    return ids
+
+def resolve_references(documents: List[Tuple[int, Dict]], existing_tasks: Dict[str, str],
+                       existing_projects: Set[str], errors: RowErrors) -> List[Tuple[int, Dict]]:
+    """Drop rows whose references can't be satisfied.
+
+    A reference is satisfied by a stored task in the same project or by another
+    accepted row of this import.
+    """
+    accepted: Dict[str, Tuple[int, Dict]] = {}
+    for index, doc in documents:
+        if doc["id"] in existing_tasks:
+            errors.setdefault(index, []).append(f"id: task {doc['id']} already exists")
+        elif doc["id"] in accepted:
+            errors.setdefault(index, []).append(f"id: duplicate of row {accepted[doc['id']][0]}")
+        elif doc["project_id"] not in existing_projects:
+            errors.setdefault(index, []).append(f"project_id: project {doc['project_id']} not found")
+        else:
+            accepted[doc["id"]] = (index, doc)
+
+    def project_of(task_id: str) -> Optional[str]:
+        if task_id in accepted:
+            return accepted[task_id][1]["project_id"]
+        return existing_tasks.get(task_id)
+
+    dependents: Dict[str, List[str]] = {}
+    rejected: List[str] = []
+    for task_id, (index, doc) in accepted.items():
+        problems = []
+        parent = doc.get("parent_task_id")
+        if parent:
+            dependents.setdefault(parent, []).append(task_id)
+            if project_of(parent) != doc["project_id"]:
+                problems.append(f"parent_task_id: task {parent} not found in project")
+        for dep_id in dependency_ids(doc):
+            if dep_id is None:
+                problems.append("dependencies: every dependency needs a task_id")
+                continue
+            dependents.setdefault(dep_id, []).append(task_id)
+            if dep_id == task_id:
+                problems.append("dependencies: a task can't depend on itself")
+            elif project_of(dep_id) != doc["project_id"]:
+                problems.append(f"dependencies: task {dep_id} not found in project")
+        if problems:
+            errors.setdefault(index, []).extend(problems)
+            rejected.append(task_id)
+
+    # Rejecting a row breaks every accepted row that points at it
+    pending = set(rejected)
+    while rejected:
+        task_id = rejected.pop()
+        accepted.pop(task_id)
+        for dependent in dependents.get(task_id, ()):
+            if dependent in accepted and dependent not in pending:
+                errors.setdefault(accepted[dependent][0], []).append(f"references rejected task {task_id}")
+                pending.add(dependent)
+                rejected.append(dependent)
+    return sorted(accepted.values(), key=lambda item: item[0])
+
+def error_report(errors: RowErrors) -> List[Dict]:
+    return [{"row": index, "errors": messages} for index, messages in sorted(errors.items())]
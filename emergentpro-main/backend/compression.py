@@ -0,0 +1,175 @@
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Compression settings
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+# Bodies that are already compressed gain nothing from a second pass
+INCOMPRESSIBLE_TYPES = ("application/vnd.apache.parquet", "application/zip", "application/gzip",
+                        "image/", "audio/", "video/")
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int = COMPRESSION_GZIP_LEVEL):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        # Sync flush hands streamed chunks to the client without ending the stream
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int = COMPRESSION_BROTLI_QUALITY):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def _accepted(header: str) -> List[Tuple[str, float]]:
+    accepted = []
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted.append((name.strip().lower(), quality))
+    return accepted
+
+def negotiate_encoding(accept_encoding: Optional[str], offered: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """Pick a content coding for an Accept-Encoding header; br wins ties when installed."""
+    if not accept_encoding:
+        return None
+    offered = offered or available_encodings()
+    accepted = dict(_accepted(accept_encoding))
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def make_compressor(encoding: str):
+    return BrotliCompressor() if encoding == "br" else GzipCompressor()
+
+class CompressionMiddleware:
+    """gzip / brotli for every response above ``minimum_size``, streamed ones included.
+
+    Works like Starlette's GZipMiddleware but negotiates the coding, leaves
+    already-encoded or incompressible bodies alone and weakens strong ETags,
+    since the compressed bytes are a different representation.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+            if encoding:
+                await CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _skip(self, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "")
+        return ("content-encoding" in headers
+                or self.initial_message["status"] in (204, 304)
+                or content_type.startswith(INCOMPRESSIBLE_TYPES))
+
+    def _start(self, streaming: bool):
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        if streaming:
+            del headers["Content-Length"]
+        self.compressor = make_compressor(self.encoding)
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows whether to compress
+            self.initial_message = message
+            self.passthrough = self._skip(Headers(raw=message["headers"]))
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            if self.passthrough or (len(body) < self.minimum_size and not more_body):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+            self._start(streaming=more_body)
+            if not more_body:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                MutableHeaders(raw=self.initial_message["headers"])["Content-Length"] = str(len(body))
+                await self.send(self.initial_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.initial_message)
+        elif self.passthrough:
+            await self.send(message)
+            return
+
+        chunk = self.compressor.compress(body)
+        chunk += self.compressor.flush() if more_body else self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Snapshot settings
+DASHBOARD_SNAPSHOT_DEBOUNCE_SECONDS = float(os.environ.get('DASHBOARD_SNAPSHOT_DEBOUNCE_SECONDS', 0.5))
+DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get('DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS', 300))
+DASHBOARD_SNAPSHOT_PERSIST = os.environ.get('DASHBOARD_SNAPSHOT_PERSIST', 'false').lower() == 'true'
+
+# Each section is one server-side aggregation (or count); sections run concurrently
+# so the dashboard costs a single round trip's worth of latency at any data volume.
+
+def _breakdown(groups: List[Dict]) -> Dict[str, int]:
+    return {g["_id"]: g["count"] for g in groups}
+
+async def counts_section(db) -> Dict[str, int]:
+    programs, resources, pending_approvals = await asyncio.gather(
+        db.programs.count_documents({}),
+        db.resources.count_documents({}),
+        db.approvals.count_documents({"status": "pending"}),
+    )
+    return {"programs": programs, "resources": resources, "pending_approvals": pending_approvals}
+
+async def projects_section(db) -> Dict[str, Any]:
+    pipeline = [
+        {"$facet": {
+            "status": [
+                {"$group": {"_id": {"$ifNull": ["$status", "planning"]}, "count": {"$sum": 1}}},
+            ],
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "total_budget": {"$sum": {"$ifNull": ["$budget_allocated", 0]}},
+                    "total_spent": {"$sum": {"$ifNull": ["$budget_spent", 0]}},
+                    "total_forecast": {"$sum": {"$ifNull": ["$budget_forecast", 0]}},
+                    "avg_health": {"$avg": {"$ifNull": ["$health_score", 100]}},
+                }},
+            ],
+        }},
+    ]
+    result = (await db.projects.aggregate(pipeline).to_list(1))[0]
+    totals = result["totals"][0] if result["totals"] else {}
+    total_budget = totals.get("total_budget", 0)
+    total_spent = totals.get("total_spent", 0)
+    return {
+        "count": totals.get("count", 0),
+        "status_breakdown": _breakdown(result["status"]),
+        "total_budget": total_budget,
+        "total_spent": total_spent,
+        "total_forecast": totals.get("total_forecast", 0),
+        "budget_utilization": round((total_spent / total_budget * 100) if total_budget > 0 else 0, 1),
+        "avg_health_score": int(totals["avg_health"]) if totals.get("avg_health") is not None else 0,
+    }
+
+async def _group_count(collection, field: str, default: str) -> Dict[str, int]:
+    pipeline = [{"$group": {"_id": {"$ifNull": [f"${field}", default]}, "count": {"$sum": 1}}}]
+    return _breakdown(await collection.aggregate(pipeline).to_list(None))
+
+async def risks_section(db) -> Dict[str, int]:
+    return await _group_count(db.risks, "level", "low")
+
+async def tasks_section(db) -> Dict[str, int]:
+    return await _group_count(db.tasks, "status", "todo")
+
+SECTIONS = {
+    "counts": counts_section,
+    "projects": projects_section,
+    "risks": risks_section,
+    "tasks": tasks_section,
+}
+
+async def _timed(name: str, section, db) -> Tuple[str, Any, float]:
+    started = time.perf_counter()
+    result = await section(db)
+    return name, result, (time.perf_counter() - started) * 1000
+
+async def build_sections(db, names) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Run the named sections concurrently; returns their results and wall time in ms."""
+    results = await asyncio.gather(*(_timed(name, SECTIONS[name], db) for name in names))
+    sections = {name: result for name, result, _ in results}
+    timings = {name: round(elapsed, 2) for name, _, elapsed in results}
+    return sections, timings
+
+def compose_stats(sections: Dict[str, Any]) -> Dict[str, Any]:
+    projects = dict(sections["projects"])
+    counts = sections["counts"]
+    return {
+        "counts": {
+            "programs": counts["programs"],
+            "projects": projects.pop("count"),
+            "tasks": sum(sections["tasks"].values()),
+            "resources": counts["resources"],
+            "pending_approvals": counts["pending_approvals"],
+        },
+        "projects": projects,
+        "risks": sections["risks"],
+        "tasks": sections["tasks"],
+    }
+
+async def dashboard_stats(db) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Build the dashboard payload from scratch; also returns per-section wall time in ms."""
+    sections, timings = await build_sections(db, SECTIONS)
+    return compose_stats(sections), timings
+
+def server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={elapsed}" for name, elapsed in timings.items())
+
+# ================= MATERIALIZED SNAPSHOT =================
+# Which sections a write to each collection can change
+SECTION_SOURCES = {
+    "programs": ("counts",),
+    "resources": ("counts",),
+    "approvals": ("counts",),
+    "projects": ("projects",),
+    "budget": ("projects",),  # entries roll up into project totals
+    "risks": ("risks",),
+    "tasks": ("tasks",),
+}
+
+SNAPSHOT_ID = "global"
+
+class DashboardSnapshot:
+    """In-process materialized dashboard, optionally mirrored to ``dashboard_snapshots``.
+
+    Reads return the current snapshot without touching Mongo. Writes mark the
+    sections they affect dirty; a debounced background task re-runs only those
+    sections and bumps the version. The ETag is derived from the content, so a
+    rebuild that changes nothing keeps serving 304s.
+    """
+
+    def __init__(self, db, persist: bool = DASHBOARD_SNAPSHOT_PERSIST,
+                 debounce: float = DASHBOARD_SNAPSHOT_DEBOUNCE_SECONDS,
+                 max_age: float = DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS):
+        self.db = db
+        self.persist = persist
+        self.debounce = debounce
+        self.max_age = max_age
+        self.sections: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self.stats: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.etag: Optional[str] = None
+        self.built_at: Optional[str] = None
+        self._built_monotonic = 0.0
+        self._dirty: Set[str] = set()
+        self._lock = asyncio.Lock()
+        self._init_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.rebuilds = 0
+
+    def invalidate(self, *collections: str):
+        """Mark the sections fed by ``collections`` (all when omitted) stale."""
+        if collections:
+            self._dirty.update(s for c in collections for s in SECTION_SOURCES.get(c, ()))
+        else:
+            self._dirty.update(SECTIONS)
+        if self.stats is not None:
+            self._schedule()
+
+    def _schedule(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self):
+        await asyncio.sleep(self.debounce)
+        while self._dirty:
+            dirty, self._dirty = self._dirty, set()
+            try:
+                await self._rebuild(dirty)
+            except Exception:
+                logger.exception("Dashboard snapshot rebuild failed")
+                self._dirty |= dirty
+                return
+
+    async def _rebuild(self, names: Iterable[str]):
+        async with self._lock:
+            sections, timings = await build_sections(self.db, list(names))
+            self.sections.update(sections)
+            self.timings.update(timings)
+            self._publish(compose_stats(self.sections))
+            if self.persist:
+                await self.db.dashboard_snapshots.replace_one({"_id": SNAPSHOT_ID}, self._document(), upsert=True)
+
+    def _publish(self, stats: Dict[str, Any]):
+        self.stats = stats
+        self.version += 1
+        self.etag = '"dash-%s"' % hashlib.sha1(json.dumps(stats, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        self.built_at = datetime.now(timezone.utc).isoformat()
+        self._built_monotonic = time.monotonic()
+        self.rebuilds += 1
+
+    def _document(self) -> Dict[str, Any]:
+        return {"sections": self.sections, "timings": self.timings, "version": self.version,
+                "etag": self.etag, "built_at": self.built_at}
+
+    async def _initialize(self):
+        doc = await self.db.dashboard_snapshots.find_one({"_id": SNAPSHOT_ID}) if self.persist else None
+        if doc and set(doc.get("sections", {})) >= set(SECTIONS):
+            # Serve the persisted copy now and catch up in the background
+            self.sections = doc["sections"]
+            self.timings = doc.get("timings", {})
+            self.stats = compose_stats(self.sections)
+            self.version = doc.get("version", 0)
+            self.etag = doc.get("etag")
+            self.built_at = doc.get("built_at")
+            self._built_monotonic = time.monotonic()
+            self.invalidate()
+        else:
+            self._dirty.clear()
+            await self._rebuild(SECTIONS)
+            if self._dirty:
+                self._schedule()
+
+    async def get(self) -> "DashboardSnapshot":
+        if self.stats is None:
+            async with self._init_lock:
+                if self.stats is None:
+                    await self._initialize()
+        elif self.max_age and time.monotonic() - self._built_monotonic > self.max_age:
+            # Safety net for writes this process never saw (other workers, direct DB edits)
+            self.invalidate()
+        return self
+
+    def payload(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "timings_ms": dict(self.timings),
+            "snapshot": {"version": self.version, "built_at": self.built_at, "stale": bool(self._dirty)},
+        }
+
+    def stats_summary(self) -> Dict[str, Any]:
+        return {"version": self.version, "etag": self.etag, "built_at": self.built_at, "rebuilds": self.rebuilds,
+                "dirty_sections": sorted(self._dirty), "persist": self.persist}
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,55 @@
+import hashlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Conditional GET support. Every write either bumps `version` (user edits, via
+# mutations.mutate) or stamps `updated_at` (derived writes such as schedule
+# flags), so (id, version, updated_at) changes whenever a document does.
+FINGERPRINT_FIELDS = ("version", "updated_at")
+
+def weak_etag(*parts: Any, version: Optional[int] = None) -> str:
+    """Weak ETag hashing ``parts``; a leading ``version`` lets the tag double as an If-Match value."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    prefix = "" if version is None else f"{version}-"
+    return f'W/"{prefix}{digest.hexdigest()[:20]}"'
+
+def fingerprint(doc: Optional[Dict]) -> Tuple:
+    if doc is None:
+        return (None,)
+    return (doc.get("id"), doc.get("version", 0), str(doc.get("updated_at", "")))
+
+def docs_etag(docs: Iterable[Dict], *extra: Any) -> str:
+    return weak_etag(*extra, *(fingerprint(doc) for doc in docs))
+
+def doc_etag(doc: Dict, *extra: Any) -> str:
+    return weak_etag(*extra, fingerprint(doc), version=doc.get("version", 0))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def with_fingerprint(projection: Dict[str, int]) -> Tuple[Dict[str, int], Tuple[str, ...]]:
+    """Widen an inclusion projection so ETags can be computed; returns the fields to strip afterwards."""
+    if not any(value == 1 for key, value in projection.items() if key != "_id"):
+        return projection, ()
+    added = tuple(field for field in FINGERPRINT_FIELDS if field not in projection)
+    return {**projection, **{field: 1 for field in added}}, added
+
+def strip_fields(docs: Iterable[Dict], fields: Tuple[str, ...]):
+    if fields:
+        for doc in docs:
+            for field in fields:
+                doc.pop(field, None)
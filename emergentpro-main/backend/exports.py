@@ -0,0 +1,272 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, List, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from responses import dumps
+
+# pyarrow is only needed for the columnar formats
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+# Rows per chunk pulled from Mongo and flushed to the client
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+def schema_fields(model: Type[BaseModel]) -> List[str]:
+    """Export columns come from the model, not from whichever document happens to be first."""
+    return list(model.model_fields.keys())
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+async def stream_csv(cursor, fieldnames: List[str]) -> AsyncIterator[bytes]:
+    """Encode documents from an async cursor as CSV, one batch at a time.
+
+    Missing fields are left blank and unknown fields are dropped, so
+    heterogeneous documents still line up under the schema header.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    pending = 0
+    async for doc in cursor:
+        writer.writerow({k: _csv_value(v) for k, v in doc.items()})
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue().encode('utf-8')
+
+async def stream_json_array(cursor) -> AsyncIterator[bytes]:
+    """Stream documents as a single JSON array without holding them all in memory."""
+    yield b'['
+    first = True
+    chunk: List[bytes] = []
+    async for doc in cursor:
+        chunk.append(dumps(doc) if first else b',' + dumps(doc))
+        first = False
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+    chunk.append(b']')
+    yield b''.join(chunk)
+
+def export_cursor(collection, query: Dict):
+    return collection.find(query, {"_id": 0}).batch_size(EXPORT_BATCH_SIZE)
+
+async def stream_ndjson(cursor) -> AsyncIterator[bytes]:
+    chunk: List[bytes] = []
+    async for doc in cursor:
+        chunk.append(dumps(doc))
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield b'\n'.join(chunk) + b'\n'
+            chunk = []
+    if chunk:
+        yield b'\n'.join(chunk) + b'\n'
+
+# ================= COLUMNAR EXPORTS =================
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+class ColumnarUnavailable(RuntimeError):
+    """Raised when a columnar format is requested but pyarrow isn't installed."""
+
+def columnar_available() -> bool:
+    return pa is not None
+
+def _nested_structs() -> Dict[str, Any]:
+    # Known shapes of embedded arrays; anything else nested is exported as JSON text
+    return {
+        "dependencies": pa.struct([("task_id", pa.string()), ("type", pa.string()), ("lag_days", pa.float64()),
+                                   ("id", pa.string()), ("description", pa.string())]),
+        "milestones": pa.struct([("name", pa.string()), ("date", pa.string()), ("status", pa.string())]),
+        "kpis": pa.struct([("name", pa.string()), ("target", pa.float64()), ("current", pa.float64()),
+                           ("unit", pa.string())]),
+    }
+
+def _unwrap_optional(annotation):
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+def _parse_timestamp(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _to_json(value):
+    return None if value is None else json.dumps(value, default=_json_default)
+
+def _coerce(fn):
+    def convert(value):
+        if value is None:
+            return None
+        try:
+            return fn(value)
+        except (TypeError, ValueError):
+            return None
+    return convert
+
+_BOOL_STRINGS = {"true": True, "1": True, "false": False, "0": False}
+
+def _to_bool(value):
+    # bool("false") is True, so flags stored as strings are parsed rather than truth-tested
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return {1: True, 0: False}.get(value)
+    if isinstance(value, str):
+        return _BOOL_STRINGS.get(value.strip().lower())
+    return None
+
+# Per-type converters; values that don't coerce become null rather than failing the batch
+_to_int = _coerce(lambda v: int(float(v)))
+_to_float = _coerce(float)
+_to_str = _coerce(str)
+
+def _scalar_converter(arrow_type) -> Callable:
+    if pa.types.is_boolean(arrow_type):
+        return _to_bool
+    if pa.types.is_integer(arrow_type):
+        return _to_int
+    if pa.types.is_floating(arrow_type):
+        return _to_float
+    if pa.types.is_timestamp(arrow_type):
+        return _parse_timestamp
+    return _to_str
+
+def _struct_list(struct_type):
+    # Embedded documents are free-form, so each struct field is coerced like a top-level column
+    fields = [(struct_type.field(i).name, _scalar_converter(struct_type.field(i).type))
+              for i in range(struct_type.num_fields)]
+    def convert(value):
+        if not isinstance(value, list):
+            return None
+        return [{n: fn(item.get(n)) for n, fn in fields} for item in value if isinstance(item, dict)]
+    return convert
+
+def _column_plan(field: str, annotation, nested: str):
+    """Arrow type and a value converter for one model field."""
+    annotation = _unwrap_optional(annotation)
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        (inner,) = get_args(annotation) or (Any,)
+        if inner is str:
+            return pa.list_(pa.string()), lambda v: [str(x) for x in v] if isinstance(v, list) else None
+        structs = _nested_structs()
+        if nested == "struct" and field in structs:
+            return pa.list_(structs[field]), _struct_list(structs[field])
+        return pa.string(), _to_json
+    if origin in (dict, Dict) or annotation in (dict, Any):
+        return pa.string(), _to_json
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return pa.string(), lambda v: v.value if isinstance(v, Enum) else v
+    if annotation is bool:
+        return pa.bool_(), _to_bool
+    if annotation is int:
+        return pa.int64(), _to_int
+    if annotation is float:
+        return pa.float64(), _to_float
+    if annotation is datetime:
+        return pa.timestamp("us", tz="UTC"), _parse_timestamp
+    return pa.string(), _to_str
+
+def arrow_schema(model: Type[BaseModel], nested: str = "struct"):
+    """Typed Arrow schema plus per-column converters derived from the Pydantic model."""
+    if pa is None:
+        raise ColumnarUnavailable("pyarrow is required for parquet/arrow exports")
+    fields, converters = [], {}
+    for name, info in model.model_fields.items():
+        arrow_type, convert = _column_plan(name, info.annotation, nested)
+        fields.append(pa.field(name, arrow_type))
+        converters[name] = convert
+    return pa.schema(fields), converters
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain.
+
+    Tracks the absolute position so Parquet footer offsets stay correct.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+async def _record_batches(cursor, schema, converters: Dict[str, Callable]) -> AsyncIterator[Any]:
+    names = schema.names
+    columns: Dict[str, List[Any]] = {n: [] for n in names}
+    rows = 0
+    async for doc in cursor:
+        for n in names:
+            columns[n].append(converters[n](doc.get(n)))
+        rows += 1
+        if rows >= EXPORT_BATCH_SIZE:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = {n: [] for n in names}
+            rows = 0
+    if rows:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+async def stream_columnar(cursor, model: Type[BaseModel], format: str, nested: str = "struct") -> AsyncIterator[bytes]:
+    """Encode the cursor as Parquet (one row group per batch) or an Arrow IPC stream."""
+    schema, converters = arrow_schema(model, nested)
+    sink = _ChunkSink()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        async for batch in _record_batches(cursor, schema, converters):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -1,9 +1,9 @@
 import asyncio
 import os
-import bcrypt
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from pathlib import Path
+from passwords import hash_password_async, verify_password_async, hasher
 
 # 1. Load environment variables exactly like server.py
 ROOT_DIR = Path(__file__).parent
@@ -36,7 +36,7 @@ async def fix_admin_login():
     # 5. Create a fresh Admin User
     print("Creating fresh Admin user...")
     # Hash the password exactly like server.py does
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed = await hash_password_async(password)
     
     new_admin = {
         "id": "user-admin-001",
@@ -61,7 +61,7 @@ async def fix_admin_login():
 
     stored_hash = user.get('password_hash')
     # Test the password
-    is_valid = bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+    is_valid = await verify_password_async(password, stored_hash)
     
     if is_valid:
         print(f"✅ Password verification passed!")
@@ -72,6 +72,7 @@ async def fix_admin_login():
         print(f"❌ Password verification FAILED inside script. Hashing library issue.")
 
     client.close()
+    hasher.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(fix_admin_login())
\ No newline at end of file
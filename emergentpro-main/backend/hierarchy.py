@@ -0,0 +1,142 @@
+import os
+from typing import Dict, Iterable, List, Optional
+
+from caching import TTLCache
+from etags import FINGERPRINT_FIELDS
+
+# Resolved sub-project trees are reused until a project or budget write, or this TTL
+PROJECT_TREE_CACHE_SIZE = int(os.environ.get('PROJECT_TREE_CACHE_SIZE', 1024))
+PROJECT_TREE_CACHE_TTL_SECONDS = float(os.environ.get('PROJECT_TREE_CACHE_TTL_SECONDS', 60))
+
+# Summed over each subtree
+ROLLUP_SUMS = ("budget_allocated", "budget_planned", "budget_spent", "budget_forecast", "budget_released")
+# Averaged over each subtree, weighted by budget_allocated
+ROLLUP_AVERAGES = ("progress", "health_score")
+
+TREE_NODE_FIELDS = ("id", "name", "code", "status", "program_id", "parent_project_id",
+                    *ROLLUP_AVERAGES, *ROLLUP_SUMS, *FINGERPRINT_FIELDS)
+
+# ================= TRAVERSAL =================
+def descendants_stage(max_depth: Optional[int] = None) -> Dict:
+    """$graphLookup collecting every project below the matched ones into ``descendants``."""
+    lookup = {"from": "projects", "startWith": "$id", "connectFromField": "id",
+              "connectToField": "parent_project_id", "as": "descendants"}
+    if max_depth is not None:
+        lookup["maxDepth"] = max_depth
+    return {"$graphLookup": lookup}
+
+def tree_pipeline(project_id: str, max_depth: Optional[int] = None) -> List[Dict]:
+    """The project and all its descendants in one round trip."""
+    return [
+        {"$match": {"id": project_id}},
+        descendants_stage(max_depth),
+        {"$project": {"_id": 0, **{field: 1 for field in TREE_NODE_FIELDS},
+                      **{f"descendants.{field}": 1 for field in TREE_NODE_FIELDS}}},
+    ]
+
+def subproject_ids_pipeline(match: Dict) -> List[Dict]:
+    """Ids of every project below those matching ``match``."""
+    return [
+        {"$match": match},
+        descendants_stage(),
+        {"$unwind": "$descendants"},
+        {"$group": {"_id": None, "ids": {"$addToSet": "$descendants.id"}}},
+    ]
+
+# ================= ROLL-UPS =================
+def _weighted(nodes: Iterable[Dict], field: str) -> float:
+    total = weight = 0.0
+    values = []
+    for node in nodes:
+        value = node.get(field) or 0
+        values.append(value)
+        total += value * (node.get("budget_allocated") or 0)
+        weight += node.get("budget_allocated") or 0
+    if weight > 0:
+        return round(total / weight, 1)
+    return round(sum(values) / len(values), 1) if values else 0.0
+
+def build_tree(root: Dict, descendants: Iterable[Dict]) -> Dict:
+    """Nest ``descendants`` under ``root`` and roll progress, budget and health up every subtree.
+
+    Each node gets ``children`` and a ``rollup`` covering itself and everything
+    below it. Budget figures are summed; progress and health are weighted by
+    allocated budget, falling back to a plain mean when nothing is allocated.
+    """
+    children: Dict[str, List[Dict]] = {}
+    for node in descendants:
+        children.setdefault(node.get("parent_project_id"), []).append(node)
+    for siblings in children.values():
+        siblings.sort(key=lambda node: node["id"])
+
+    # Iterative post-order so deep hierarchies can't hit the recursion limit
+    seen = {root["id"]}
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not expanded:
+            node["children"] = [child for child in children.get(node["id"], []) if child["id"] not in seen]
+            seen.update(child["id"] for child in node["children"])
+            stack.append((node, True))
+            stack.extend((child, False) for child in node["children"])
+            continue
+        subtree = [node, *(n for child in node["children"] for n in child.pop("_subtree"))]
+        node["_subtree"] = subtree
+        node["rollup"] = {
+            "project_count": len(subtree),
+            "depth": max((child["rollup"]["depth"] + 1 for child in node["children"]), default=0),
+            **{field: round(sum(n.get(field) or 0 for n in subtree), 2) for field in ROLLUP_SUMS},
+            **{field: _weighted(subtree, field) for field in ROLLUP_AVERAGES},
+            "min_health_score": min(n.get("health_score", 100) for n in subtree),
+        }
+    root.pop("_subtree")
+    return root
+
+def tree_nodes(tree: Dict) -> List[Dict]:
+    """Every node of ``tree``, root first."""
+    nodes, stack = [], [tree]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(node["children"]))
+    return nodes
+
+# ================= SERVICE =================
+class ProjectHierarchy:
+    """Resolves sub-project trees with a single $graphLookup and caches their roll-ups.
+
+    A resolved tree also seeds the cache for each of its subtrees, so asking
+    for a sub-project after its parent costs no query. Project and budget
+    writes call ``invalidate``; the TTL bounds staleness for writes made by
+    other processes.
+    """
+
+    def __init__(self, db, maxsize: int = PROJECT_TREE_CACHE_SIZE, ttl: float = PROJECT_TREE_CACHE_TTL_SECONDS):
+        self.db = db
+        self._trees = TTLCache(maxsize=maxsize, ttl=ttl, name="project_trees")
+
+    async def tree(self, project_id: str, max_depth: Optional[int] = None) -> Optional[Dict]:
+        key = (project_id, max_depth)
+        tree = self._trees.get(key)
+        if tree is not None:
+            return tree
+        docs = await self.db.projects.aggregate(tree_pipeline(project_id, max_depth)).to_list(1)
+        if not docs:
+            return None
+        root = docs[0]
+        tree = build_tree(root, root.pop("descendants", []))
+        if max_depth is None:
+            # Every subtree of a full tree is itself complete
+            for node in tree_nodes(tree):
+                self._trees.set((node["id"], None), node)
+        else:
+            self._trees.set(key, tree)
+        return tree
+
+    async def subproject_ids(self, match: Dict) -> List[str]:
+        docs = await self.db.projects.aggregate(subproject_ids_pipeline(match)).to_list(1)
+        return docs[0]["ids"] if docs else []
+
+    def invalidate(self):
+        self._trees.clear()
+
@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever INDEX_SPECS changes so deployments can tell which set is live
+INDEX_VERSION = 3
+
+def _unique_id() -> IndexModel:
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+def _keyset(*fields: str) -> IndexModel:
+    # Equality filter fields followed by `id`, the list endpoints' pagination key
+    return IndexModel([(f, ASCENDING) for f in fields] + [("id", ASCENDING)], name="_".join(fields) + "_id")
+
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    "users": [
+        _unique_id(),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "programs": [
+        _unique_id(),
+    ],
+    "projects": [
+        _unique_id(),
+        _keyset("program_id"),
+        IndexModel([("parent_project_id", ASCENDING)], name="parent_project_id"),
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "tasks": [
+        _unique_id(),
+        _keyset("project_id"),
+        IndexModel([("project_id", ASCENDING), ("status", ASCENDING)], name="project_id_status"),
+        IndexModel([("parent_task_id", ASCENDING)], name="parent_task_id"),
+        IndexModel([("assigned_to", ASCENDING)], name="assigned_to"),
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "resources": [
+        _unique_id(),
+        _keyset("type", "clearance_level"),
+        _keyset("type"),
+        _keyset("clearance_level"),
+    ],
+    "budget": [
+        _unique_id(),
+        _keyset("project_id", "fiscal_year"),
+        _keyset("project_id"),
+        _keyset("fiscal_year"),
+    ],
+    "risks": [
+        _unique_id(),
+        _keyset("project_id", "level"),
+        _keyset("project_id"),
+        _keyset("level"),
+    ],
+    "issues": [
+        _unique_id(),
+        _keyset("project_id", "status"),
+        _keyset("project_id"),
+        _keyset("status"),
+    ],
+    "vendors": [
+        _unique_id(),
+        _keyset("status", "category"),
+        _keyset("status"),
+        _keyset("category"),
+    ],
+    "contracts": [
+        _unique_id(),
+        _keyset("vendor_id"),
+        _keyset("project_id"),
+    ],
+    "budget_rollups": [
+        IndexModel([("scope", ASCENDING), ("scope_id", ASCENDING), ("fiscal_year", ASCENDING), ("quarter", ASCENDING)],
+                   name="scope_scope_id_fiscal_year_quarter", unique=True),
+    ],
+    "approvals": [
+        _unique_id(),
+        IndexModel([("status", ASCENDING), ("sla_deadline", ASCENDING)], name="status_sla_deadline"),
+        _keyset("status", "entity_type"),
+        _keyset("status"),
+        _keyset("entity_type"),
+    ],
+}
+
+async def index_report(db) -> Dict[str, Dict[str, List[str]]]:
+    """Compare live indexes with INDEX_SPECS, per collection."""
+    report = {}
+    for collection, models in INDEX_SPECS.items():
+        declared = {m.document["name"] for m in models}
+        existing = set()
+        async for index in db[collection].list_indexes():
+            if index["name"] != "_id_":
+                existing.add(index["name"])
+        report[collection] = {
+            "missing": sorted(declared - existing),
+            "extra": sorted(existing - declared),
+        }
+    return report
+
+async def ensure_indexes(db, background: bool = False, drop_extra: bool = False) -> Dict:
+    """Idempotently create the declared index set and record its version.
+
+    A failing index (e.g. duplicate ids in legacy data) is logged and skipped so
+    one bad collection doesn't block startup.
+    """
+    failures = {}
+    for collection, models in INDEX_SPECS.items():
+        for model in models:
+            doc = dict(model.document)
+            keys = list(doc.pop("key").items())
+            if background:
+                doc["background"] = True
+            try:
+                await db[collection].create_index(keys, **doc)
+            except OperationFailure as e:
+                failures.setdefault(collection, []).append(f"{doc['name']}: {e}")
+                logger.error("Index %s.%s failed: %s", collection, doc['name'], e)
+
+    report = await index_report(db)
+    if drop_extra:
+        for collection, diff in report.items():
+            for name in diff["extra"]:
+                await db[collection].drop_index(name)
+                logger.info("Dropped undeclared index %s.%s", collection, name)
+        report = await index_report(db)
+
+    for collection, diff in report.items():
+        if diff["missing"] or diff["extra"]:
+            logger.warning("Index drift on %s: missing=%s extra=%s", collection, diff["missing"], diff["extra"])
+
+    if not failures:
+        await db.schema_meta.update_one(
+            {"_id": "indexes"},
+            {"$set": {"version": INDEX_VERSION, "applied_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True,
+        )
+    return {"version": INDEX_VERSION, "failures": failures, "collections": report}
+
+# ================= CLI =================
+# python indexes.py report | build [--background] [--drop-extra]
+async def _main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    db_name = os.environ.get('DB_NAME', 'defense_pm')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    try:
+        if args.command == "build":
+            print(f"Building index set v{INDEX_VERSION} on '{db_name}'...")
+            result = await ensure_indexes(db, background=args.background, drop_extra=args.drop_extra)
+            for collection, errors in result["failures"].items():
+                for error in errors:
+                    print(f"❌ {collection}: {error}")
+        meta = await db.schema_meta.find_one({"_id": "indexes"})
+        print(f"Declared version: {INDEX_VERSION}, applied version: {meta.get('version') if meta else None}")
+        for collection, diff in (await index_report(db)).items():
+            status = "✅" if not diff["missing"] and not diff["extra"] else "⚠️"
+            print(f"{status} {collection}: missing={diff['missing']} extra={diff['extra']}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    load_dotenv(Path(__file__).parent / '.env')
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes for the Defense PM backend")
+    parser.add_argument("command", choices=["report", "build"])
+    parser.add_argument("--background", action="store_true", help="Build without blocking writes on large collections")
+    parser.add_argument("--drop-extra", action="store_true", help="Drop indexes not declared in INDEX_SPECS")
+    asyncio.run(_main(parser.parse_args()))
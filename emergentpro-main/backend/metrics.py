@@ -0,0 +1,216 @@
+import hmac
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Bearer token scrapers must send to /api/metrics; empty leaves it open
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Cursor reply fields that carry documents back to us
+_BATCH_KEYS = ("firstBatch", "nextBatch")
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip((*map(repr, self.buckets), "+Inf"), self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Labels, **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class MetricsRegistry:
+    """Counters and histograms for HTTP routes and Mongo commands, rendered as Prometheus text.
+
+    HTTP metrics are recorded on the event loop, Mongo ones from pymongo's
+    monitoring threads, so every update takes the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.http_requests: Dict[Labels, int] = {}
+        self.http_latency: Dict[Labels, Histogram] = {}
+        self.http_in_flight = 0
+        self.mongo_latency: Dict[Labels, Histogram] = {}
+        self.mongo_failures: Dict[Labels, int] = {}
+        self.mongo_documents: Dict[Labels, int] = {}
+
+    def request_started(self):
+        with self._lock:
+            self.http_in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            self.http_in_flight -= 1
+            key = (method, route, str(status))
+            self.http_requests[key] = self.http_requests.get(key, 0) + 1
+            histogram = self.http_latency.get((method, route))
+            if histogram is None:
+                histogram = self.http_latency[(method, route)] = Histogram(HTTP_BUCKETS)
+            histogram.observe(seconds)
+
+    def command_finished(self, collection: str, command: str, seconds: float, documents: int = 0,
+                         failed: bool = False):
+        key = (collection, command)
+        with self._lock:
+            histogram = self.mongo_latency.get(key)
+            if histogram is None:
+                histogram = self.mongo_latency[key] = Histogram(MONGO_BUCKETS)
+            histogram.observe(seconds)
+            if documents:
+                self.mongo_documents[key] = self.mongo_documents.get(key, 0) + documents
+            if failed:
+                self.mongo_failures[key] = self.mongo_failures.get(key, 0) + 1
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def counter(name: str, help_text: str, label_names: Sequence[str], values: Dict[Labels, int]):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter"])
+            lines.extend(f"{name}{_labels(label_names, key)} {value}" for key, value in sorted(values.items()))
+
+        def histogram(name: str, help_text: str, label_names: Sequence[str], values: Dict[Labels, Histogram]):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} histogram"])
+            for key, hist in sorted(values.items()):
+                lines.extend(f"{name}_bucket{_labels(label_names, key, le=bound)} {count}"
+                             for bound, count in hist.cumulative())
+                lines.append(f"{name}_sum{_labels(label_names, key)} {hist.sum}")
+                lines.append(f"{name}_count{_labels(label_names, key)} {hist.count}")
+
+        with self._lock:
+            lines.extend(["# HELP process_start_time_seconds Start time of the process since unix epoch",
+                          "# TYPE process_start_time_seconds gauge",
+                          f"process_start_time_seconds {self.started_at}",
+                          "# HELP http_requests_in_flight Requests currently being served",
+                          "# TYPE http_requests_in_flight gauge",
+                          f"http_requests_in_flight {self.http_in_flight}"])
+            counter("http_requests_total", "Requests by route template and status",
+                    ("method", "route", "status"), self.http_requests)
+            histogram("http_request_duration_seconds", "Request latency by route template",
+                      ("method", "route"), self.http_latency)
+            histogram("mongo_command_duration_seconds", "Mongo command latency by collection",
+                      ("collection", "command"), self.mongo_latency)
+            counter("mongo_command_failures_total", "Failed Mongo commands by collection",
+                    ("collection", "command"), self.mongo_failures)
+            counter("mongo_documents_returned_total", "Documents returned by Mongo reads",
+                    ("collection", "command"), self.mongo_documents)
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# The ASGI scope of the request being served. Motor copies the context into its
+# executor threads, so command listeners can attribute queries to a route.
+request_scope: ContextVar[Optional[Scope]] = ContextVar("request_scope", default=None)
+
+def current_route() -> Optional[str]:
+    scope = request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+# ================= HTTP =================
+class MetricsMiddleware:
+    """Per-route request count, status and latency.
+
+    Routes are labelled by their template (``/api/tasks/{task_id}``), never
+    the raw path, so label cardinality stays bounded; unmatched paths share
+    one label.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.request_started()
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_scope.reset(token)
+            route = scope.get("route")
+            self.registry.request_finished(scope["method"], getattr(route, "path", "unmatched"), status,
+                                           time.perf_counter() - started)
+
+# ================= MONGO =================
+def command_collection(command_name: str, command) -> str:
+    target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return target if isinstance(target, str) else "-"
+
+def returned_documents(reply) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        for key in _BATCH_KEYS:
+            if key in cursor:
+                return len(cursor[key])
+    if "value" in reply:  # findAndModify
+        return 1 if reply["value"] is not None else 0
+    return 0
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds per-collection / per-command latency and document counts into ``registry``."""
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        self.registry = registry
+        self._pending: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        self._pending[self._key(event)] = command_collection(event.command_name, event.command)
+
+    def succeeded(self, event):
+        collection = self._pending.pop(self._key(event), "-")
+        self.registry.command_finished(collection, event.command_name, event.duration_micros / 1e6,
+                                       documents=returned_documents(event.reply))
+
+    def failed(self, event):
+        collection = self._pending.pop(self._key(event), "-")
+        self.registry.command_finished(collection, event.command_name, event.duration_micros / 1e6, failed=True)
+
+def metrics_authorized(token: Optional[str]) -> bool:
+    return not METRICS_TOKEN or (token is not None and hmac.compare_digest(token, METRICS_TOKEN))
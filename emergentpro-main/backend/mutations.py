@@ -0,0 +1,171 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from pymongo import ReturnDocument, UpdateOne
+
+# Every write through `mutate` bumps `version`; documents written before
+# versioning existed have no field and count as version 0.
+VERSION_FIELD = "version"
+
+# Never settable from a request body
+PROTECTED_FIELDS = ("_id", "id", VERSION_FIELD)
+
+Update = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+class VersionConflict(Exception):
+    """The document exists but no longer has the version the client based its edit on."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Document is at version {current_version}")
+        self.current_version = current_version
+
+class InvalidUpdate(ValueError):
+    """The request body can't be applied as the update it needs."""
+
+def clean_update(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in data.items() if k not in PROTECTED_FIELDS}
+
+def set_literal(values: Dict[str, Any]) -> Dict[str, Any]:
+    """`$set` stage for an update pipeline; values are taken verbatim, never as expressions."""
+    return {"$set": {k: {"$literal": v} for k, v in values.items()}}
+
+def field_update(values: Dict[str, Any], derived: Sequence[Dict[str, Any]] = ()) -> Update:
+    """A plain `$set` of client values, or a pipeline when ``derived`` stages must see the merged document.
+
+    Only the pipeline form pays for expressions. In it a dotted key such as
+    ``milestones.0.status`` would be read as a path into every array element
+    rather than element 0, so dotted keys are rejected there instead of
+    silently changing meaning.
+    """
+    if not derived:
+        return {"$set": values}
+    dotted = _field_paths(values)
+    if dotted:
+        raise InvalidUpdate(f"Field paths can't be combined with derived fields here: {', '.join(dotted)}")
+    return [set_literal(values), *derived]
+
+def _field_paths(values: Dict[str, Any]) -> List[str]:
+    return sorted(k for k in values if not k or "." in k or k.startswith("$"))
+
+def check_plain_fields(values: Dict[str, Any]) -> None:
+    """Raise InvalidUpdate unless every key is a plain top-level field name.
+
+    Batched writes validate up front: a bad path only fails on the server,
+    after other items in the batch have already been written.
+    """
+    paths = _field_paths(values)
+    if paths:
+        raise InvalidUpdate(f"Only top-level field names can be set here: {', '.join(repr(k) for k in paths)}")
+
+def parse_if_match(header: Optional[str]) -> Optional[int]:
+    """Version named by an If-Match header; None when absent or ``*``.
+
+    Accepts both the write ETag (``"3"``) and the read ETag (``W/"3-<hash>"``).
+    Raises ValueError for anything that isn't one of ours.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    value = header.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    return int(value.strip('"').split("-")[0])
+
+def entity_etag(doc: Dict[str, Any]) -> str:
+    return f'"{doc.get(VERSION_FIELD, 0)}"'
+
+def _versioned(update: Update) -> Update:
+    if isinstance(update, list):
+        bump = {"$add": [{"$ifNull": [f"${VERSION_FIELD}", 0]}, 1]}
+        return update + [{"$set": {VERSION_FIELD: bump}}]
+    update = dict(update)
+    update["$inc"] = {**update.get("$inc", {}), VERSION_FIELD: 1}
+    return update
+
+def _version_filter(entity_id: str, expected_version: Optional[int]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"id": entity_id}
+    if expected_version is not None:
+        # Missing and 0 are the same version; $in with None matches a missing field
+        query[VERSION_FIELD] = {"$in": [0, None]} if expected_version == 0 else expected_version
+    return query
+
+async def mutate(collection, entity_id: str, update: Update, expected_version: Optional[int] = None,
+                 projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Apply ``update`` (operator document or pipeline) and return the new document in one round trip.
+
+    Returns None if the document doesn't exist. With ``expected_version`` the
+    write only lands if the stored version still matches; otherwise
+    VersionConflict is raised. Only that failure path costs a second read.
+    """
+    doc = await collection.find_one_and_update(
+        _version_filter(entity_id, expected_version),
+        _versioned(update),
+        projection=projection or {"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is None and expected_version is not None:
+        current = await collection.find_one({"id": entity_id}, {"_id": 0, VERSION_FIELD: 1})
+        if current is not None:
+            raise VersionConflict(current.get(VERSION_FIELD, 0))
+    return doc
+
+async def bulk_mutate(collection, updates: Sequence[Tuple[str, Update, Optional[int]]],
+                      projection: Optional[Dict[str, Any]] = None) -> List[Union[Dict[str, Any], VersionConflict, None]]:
+    """`mutate` for many (id, update, expected version) items in one unordered bulk_write.
+
+    Outcomes are, per item, the updated document, None if it doesn't exist,
+    or the VersionConflict. One read of the stored versions settles missing
+    and stale items before anything is written; items sent without a version
+    are pinned to the stored one. Every write is then guarded by its expected
+    version, so it either lands at expected+1 or doesn't match, and one read
+    returns the written documents.
+    """
+    stored = await collection.find({"id": {"$in": [entity_id for entity_id, _, _ in updates]}},
+                                   {"_id": 0, "id": 1, VERSION_FIELD: 1}).to_list(None)
+    versions = {doc["id"]: doc.get(VERSION_FIELD, 0) for doc in stored}
+    outcomes: Dict[str, Union[Dict[str, Any], VersionConflict, None]] = {}
+    expected: Dict[str, int] = {}
+    for entity_id, _, version in updates:
+        if entity_id not in versions:
+            outcomes[entity_id] = None
+        elif version is not None and version != versions[entity_id]:
+            outcomes[entity_id] = VersionConflict(versions[entity_id])
+        else:
+            expected[entity_id] = versions[entity_id]
+
+    written = [(entity_id, update) for entity_id, update, _ in updates if entity_id in expected]
+    if written:
+        result = await collection.bulk_write(
+            [update_op(entity_id, update, expected[entity_id]) for entity_id, update in written], ordered=False)
+        docs = await collection.find({"id": {"$in": list(expected)}}, _with_version(projection)).to_list(None)
+        by_id = {doc["id"]: doc for doc in docs}
+        for entity_id, _ in written:
+            doc = by_id.get(entity_id)
+            if doc is None:
+                outcomes[entity_id] = None
+            elif result.matched_count == len(written) or doc.get(VERSION_FIELD, 0) == expected[entity_id] + 1:
+                outcomes[entity_id] = doc
+            else:
+                # Another writer got there between the two reads
+                outcomes[entity_id] = VersionConflict(doc.get(VERSION_FIELD, 0))
+    return [outcomes[entity_id] for entity_id, _, _ in updates]
+
+def _with_version(projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return {"_id": 0}
+    if any(value for key, value in projection.items() if key != "_id"):
+        # Inclusion projection: bulk_mutate still needs id and version to sort outcomes
+        return {**projection, "id": 1, VERSION_FIELD: 1}
+    return projection
+
+def update_op(entity_id: str, update: Update, expected_version: Optional[int] = None) -> UpdateOne:
+    """The bulk_write counterpart of `mutate` for a single document."""
+    return UpdateOne(_version_filter(entity_id, expected_version), _versioned(update))
+
+_transactions_supported: Optional[bool] = None
+
+async def supports_transactions(client) -> bool:
+    """Multi-document transactions need a replica set or a sharded cluster."""
+    global _transactions_supported
+    if _transactions_supported is None:
+        hello = await client.admin.command("hello")
+        _transactions_supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+    return _transactions_supported
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import bcrypt
+
+# Password hashing settings
+PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', 64))
+PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS', 12))
+
+# ================= SYNC PRIMITIVES =================
+# Module-level so they can be pickled into a process pool.
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(PASSWORD_HASH_ROUNDS)).decode('utf-8')
+
+def verify_password(password: str, hashed: str) -> bool:
+    if not hashed:
+        return False
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        # Malformed stored hash
+        return False
+
+# ================= BOUNDED EXECUTOR =================
+class HasherBusyError(RuntimeError):
+    """Raised when the password executor queue is full."""
+
+class _LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def as_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated pool so it never blocks the event loop.
+
+    At most ``workers`` operations run at once and at most ``queue_limit`` more
+    may wait; beyond that callers get ``HasherBusyError`` instead of piling up.
+    """
+
+    def __init__(self, kind: str = PASSWORD_HASH_EXECUTOR, workers: int = PASSWORD_HASH_WORKERS,
+                 queue_limit: int = PASSWORD_HASH_QUEUE_LIMIT):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.latency = {"hash": _LatencyStats(), "verify": _LatencyStats()}
+        self.wait = _LatencyStats()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pwhash')
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise HasherBusyError("Password hashing queue is full")
+            self._in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _run(self, fn, *args):
+        self._acquire()
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), _timed, fn, *args, submitted)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        result, wait_ms, run_ms = await self._run(hash_password, password)
+        self.wait.observe(wait_ms)
+        self.latency["hash"].observe(run_ms)
+        return result
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        result, wait_ms, run_ms = await self._run(verify_password, password, hashed)
+        self.wait.observe(wait_ms)
+        self.latency["verify"].observe(run_ms)
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "queue_wait": self.wait.as_dict(),
+            "hash": self.latency["hash"].as_dict(),
+            "verify": self.latency["verify"].as_dict(),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def _timed(fn, *args):
+    # Runs inside the worker; reports time spent queued and time spent hashing
+    *call_args, submitted = args
+    started = time.perf_counter()
+    result = fn(*call_args)
+    finished = time.perf_counter()
+    return result, (started - submitted) * 1000, (finished - started) * 1000
+
+hasher = PasswordHasher()
+
+async def hash_password_async(password: str) -> str:
+    return await hasher.hash(password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await hasher.verify(password, hashed)
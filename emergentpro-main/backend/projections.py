@@ -0,0 +1,99 @@
+import re
+from typing import Dict, List, Optional
+
+# Named projections per collection. `summary` carries what list views render and
+# leaves out the embedded arrays (milestones, kpis, scenarios, approval chains...).
+VIEWS: Dict[str, Dict[str, List[str]]] = {
+    "users": {
+        "summary": ["id", "name", "email", "role", "clearance_level", "department", "rank"],
+    },
+    "programs": {
+        "summary": ["id", "version", "name", "code", "status", "health_score", "start_date", "end_date",
+                    "budget_total", "budget_allocated", "owner_id", "updated_at"],
+    },
+    "projects": {
+        "summary": ["id", "version", "program_id", "parent_project_id", "name", "code", "status", "phase",
+                    "health_score", "progress", "start_date", "end_date", "budget_allocated", "budget_spent",
+                    "budget_forecast", "manager_id", "clearance_level", "updated_at"],
+    },
+    "tasks": {
+        "summary": ["id", "version", "project_id", "parent_task_id", "wbs_code", "wbs_level", "name", "status",
+                    "priority", "start_date", "end_date", "progress", "assigned_to", "is_critical_path",
+                    "updated_at"],
+    },
+    "resources": {
+        "summary": ["id", "version", "name", "type", "department", "unit", "clearance_level", "availability",
+                    "capacity_hours", "allocated_hours", "utilization", "burnout_risk"],
+    },
+    "budget": {
+        "summary": ["id", "version", "project_id", "category", "description", "fiscal_year", "quarter", "status",
+                    "amount_planned", "amount_actual", "amount_forecast", "amount_released", "variance",
+                    "is_overrun"],
+    },
+    "risks": {
+        "summary": ["id", "version", "project_id", "title", "category", "probability", "impact", "risk_score",
+                    "level", "status", "mitigation_status", "owner_id", "escalation_level", "updated_at"],
+    },
+    "issues": {
+        "summary": ["id", "version", "project_id", "title", "category", "severity", "status", "assigned_to",
+                    "due_date", "escalation_level", "updated_at"],
+    },
+    "vendors": {
+        "summary": ["id", "version", "name", "code", "category", "status", "rating", "contracts_active",
+                    "total_value", "sla_compliance", "due_diligence_status"],
+    },
+    "contracts": {
+        "summary": ["id", "version", "vendor_id", "project_id", "contract_number", "title", "value", "start_date",
+                    "end_date", "status"],
+    },
+    "approvals": {
+        "summary": ["id", "version", "entity_type", "entity_id", "title", "amount", "requested_by_name",
+                    "current_level", "total_levels", "status", "sla_deadline", "is_escalated", "is_emergency",
+                    "updated_at"],
+    },
+}
+
+# Never returned, whatever the client asks for
+HIDDEN_FIELDS: Dict[str, List[str]] = {
+    "users": ["password_hash"],
+}
+
+_FIELD_NAME = re.compile(r"^[A-Za-z][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+
+def _parse_fields(fields: str) -> List[str]:
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    for name in names:
+        if not _FIELD_NAME.match(name):
+            raise ValueError(f"Invalid field name '{name}'")
+    return names
+
+def build_projection(collection: str, fields: Optional[str] = None, view: Optional[str] = None) -> Dict[str, int]:
+    """Mongo projection for ``fields=a,b`` and/or ``view=<name>``; with neither, the full document.
+
+    `id` is always included since pagination keys on it.
+    """
+    hidden = HIDDEN_FIELDS.get(collection, [])
+    selected: List[str] = []
+    if view and view != "full":
+        views = VIEWS.get(collection, {})
+        if view not in views:
+            raise ValueError(f"Unknown view '{view}'; expected one of {', '.join(['full', *views])}")
+        selected.extend(views[view])
+    if fields:
+        selected.extend(_parse_fields(fields))
+
+    if not selected:
+        return {"_id": 0, **{name: 0 for name in hidden}}
+    projection = {"_id": 0, "id": 1}
+    for name in selected:
+        if name.split(".")[0] not in hidden:
+            projection[name] = 1
+    return _drop_overlaps(projection)
+
+def _drop_overlaps(projection: Dict[str, int]) -> Dict[str, int]:
+    # Mongo rejects "a" together with "a.b" (path collision); the parent wins
+    included = [name for name in projection if name != "_id"]
+    return {
+        name: value for name, value in projection.items()
+        if name == "_id" or not any(name.startswith(other + ".") for other in included)
+    }
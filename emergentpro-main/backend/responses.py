@@ -0,0 +1,40 @@
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+# datetimes, dates, enums, UUIDs and numpy arrays are encoded natively by orjson;
+# `_default` only sees the odd types that reach us from Mongo or models.
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """App-wide JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def json_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """Render ``content`` directly, skipping FastAPI's jsonable_encoder pass.
+
+    Hot read paths return raw Mongo documents, which orjson handles as-is.
+    Headers already set on the injected ``response`` are carried over.
+    """
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "content-type")}
+        status_code = response.status_code or status_code
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,653 @@
+import asyncio
+import gc
+import os
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from pymongo import UpdateOne
+
+from caching import TTLCache
+
+# ================= CRITICAL PATH (CPM) ENGINE =================
+# Times are integer day offsets from the earliest task start. A task occupies
+# [es, es + duration), so 2024-01-01..2024-01-03 (inclusive, as stored) is 3 days.
+#
+# Every dependency type reduces to a difference constraint es[succ] - es[pred] >= k:
+#   finish_to_start   k = lag + d_pred
+#   start_to_start    k = lag
+#   finish_to_finish  k = lag + d_pred - d_succ
+#   start_to_finish   k = lag - d_succ
+# so the forward pass is a longest path over k and the backward pass its mirror.
+
+FINISH_TO_START = "finish_to_start"
+START_TO_START = "start_to_start"
+FINISH_TO_FINISH = "finish_to_finish"
+START_TO_FINISH = "start_to_finish"
+DEPENDENCY_TYPES = (FINISH_TO_START, START_TO_START, FINISH_TO_FINISH, START_TO_FINISH)
+
+# Whether k includes the predecessor's / successor's duration, per dependency type
+_PRED_FINISH = {FINISH_TO_START: 1, START_TO_START: 0, FINISH_TO_FINISH: 1, START_TO_FINISH: 0}
+_SUCC_FINISH = {FINISH_TO_START: 0, START_TO_START: 0, FINISH_TO_FINISH: 1, START_TO_FINISH: 1}
+# The same, indexed by the small type code stored per edge
+_TYPE_CODE = {dep_type: code for code, dep_type in enumerate(DEPENDENCY_TYPES)}
+_PRED_FINISH_CODE = tuple(_PRED_FINISH[t] for t in DEPENDENCY_TYPES)
+_SUCC_FINISH_CODE = tuple(_SUCC_FINISH[t] for t in DEPENDENCY_TYPES)
+
+# Task fields that feed the schedule; edits touching anything else skip recomputation
+SCHEDULE_INPUTS = ("start_date", "end_date", "dependencies")
+
+# Fields the engine reads from task documents
+SCHEDULE_FIELDS = {"_id": 0, "id": 1, "start_date": 1, "end_date": 1, "dependencies": 1,
+                   "is_critical_path": 1, "float_days": 1}
+
+class ScheduleError(ValueError):
+    """Raised when a project's tasks cannot be scheduled."""
+
+class ScheduleCycleError(ScheduleError):
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("Dependency cycle: " + " -> ".join(cycle))
+
+@lru_cache(maxsize=4096)
+def _day_ordinal(text: str) -> Optional[int]:
+    # Large projects reuse a few hundred distinct dates, so memoize the parse
+    try:
+        return date.fromisoformat(text).toordinal()
+    except ValueError:
+        return None
+
+def _parse_day(value: Any) -> Optional[int]:
+    if not value:
+        return None
+    return _day_ordinal(str(value)[:10])
+
+def _lag_days(task_id: str, dep: Dict) -> int:
+    # Imports can carry lags as strings ("2", "1.0"); anything non-numeric is rejected
+    lag = dep.get("lag_days") or 0
+    if type(lag) is int:
+        return lag
+    try:
+        return int(float(lag))
+    except (TypeError, ValueError, OverflowError):
+        raise ScheduleError(f"Task {task_id}: invalid lag_days {lag!r}")
+
+class ScheduleGraph:
+    """Task dependency graph with early/late dates from a CPM forward/backward pass.
+
+    Each task id is mapped once to an integer node; durations, start floors and
+    early/late starts are flat lists indexed by node. ``pred``/``pred_k`` and
+    ``succ``/``succ_k`` are parallel per-node lists of neighbouring nodes and
+    the k of each constraint, so both passes walk plain ints in O(V + E).
+    ``pred_type`` and ``pred_lag`` keep the raw edge so k can be re-derived
+    when a duration changes. Removed tasks leave a free node for reuse.
+    """
+
+    def __init__(self):
+        self.ids: List[Optional[str]] = []  # node -> task id, None once removed
+        self.index: Dict[str, int] = {}
+        self._free: List[int] = []
+        self.duration: List[int] = []
+        self.not_before: List[Optional[int]] = []
+        self.pred: List[Sequence[int]] = []
+        self.pred_k: List[Sequence[int]] = []
+        self.pred_type: List[Sequence[int]] = []
+        self.pred_lag: List[Sequence[int]] = []
+        self.succ: List[List[int]] = []
+        self.succ_k: List[List[int]] = []
+        self.es: List[Optional[int]] = []
+        self.ls: List[Optional[int]] = []
+        self.unresolved: List[Dict[str, str]] = []
+        self.origin: Optional[int] = None
+        self.order: List[int] = []
+        self.finish: int = 0
+        self.computed_origin: Optional[int] = None
+        self.critical_changed = False
+
+    # ---------- construction ----------
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Dict]) -> "ScheduleGraph":
+        graph = cls()
+        by_id = {task["id"]: task for task in tasks}
+        count = len(by_id)
+        graph.ids = list(by_id)
+        graph.index = {task_id: node for node, task_id in enumerate(graph.ids)}
+        graph.duration = [0] * count
+        graph.not_before = [None] * count
+        for node, task in enumerate(by_id.values()):
+            graph._set_node(node, task)
+        # Incoming lists are only ever replaced whole, so tasks without dependencies can share one
+        graph.pred = [()] * count
+        graph.pred_k = [()] * count
+        graph.pred_type = [()] * count
+        graph.pred_lag = [()] * count
+        graph.succ = [[] for _ in range(count)]
+        graph.succ_k = [[] for _ in range(count)]
+        graph.es = [None] * count
+        graph.ls = [None] * count
+        for node, task in enumerate(by_id.values()):
+            dependencies = task.get("dependencies")
+            if dependencies:
+                graph._set_deps(node, dependencies)
+        return graph
+
+    def _new_node(self, task_id: str) -> int:
+        if self._free:
+            node = self._free.pop()
+            self.ids[node] = task_id
+        else:
+            node = len(self.ids)
+            self.ids.append(task_id)
+            for table in (self.pred, self.pred_k, self.pred_type, self.pred_lag, self.succ, self.succ_k):
+                table.append([])
+            self.duration.append(0)
+            self.not_before.append(None)
+            self.es.append(None)
+            self.ls.append(None)
+        self.index[task_id] = node
+        return node
+
+    def _set_node(self, node: int, task: Dict):
+        start = _parse_day(task.get("start_date"))
+        end = _parse_day(task.get("end_date"))
+        if start is None:
+            start = end
+        if end is None or end < start:
+            end = start
+        if start is None:
+            self.duration[node] = 0
+            self.not_before[node] = None
+        else:
+            self.duration[node] = end - start + 1
+            self.not_before[node] = start
+            if self.origin is None or start < self.origin:
+                self.origin = start
+
+    def _set_deps(self, node: int, dependencies: List[Dict]):
+        # Requires every node to be set first, since k depends on both durations
+        task_id, index = self.ids[node], self.index
+        preds, types, lags = [], [], []
+        for dep in dependencies:
+            pred_id = dep.get("task_id")
+            dep_type = dep.get("type") or FINISH_TO_START
+            code = _TYPE_CODE.get(dep_type)
+            if code is None:
+                raise ScheduleError(f"Task {task_id}: unknown dependency type '{dep_type}'")
+            pred = index.get(pred_id)
+            if pred is None:
+                self.unresolved.append({"task_id": task_id, "depends_on": str(pred_id)})
+                continue
+            preds.append(pred)
+            types.append(code)
+            lags.append(_lag_days(task_id, dep))
+        self._link_in(node, preds, types, lags)
+
+    def _link_in(self, node: int, preds: List[int], types: List[int], lags: List[int]):
+        duration, succ, succ_k = self.duration, self.succ, self.succ_k
+        d_node = duration[node]
+        ks = []
+        for pred, code, lag in zip(preds, types, lags):
+            k = lag + _PRED_FINISH_CODE[code] * duration[pred] - _SUCC_FINISH_CODE[code] * d_node
+            ks.append(k)
+            succ[pred].append(node)
+            succ_k[pred].append(k)
+        self.pred[node], self.pred_k[node], self.pred_type[node], self.pred_lag[node] = preds, ks, types, lags
+
+    # ---------- ordering ----------
+    def topological_order(self) -> List[int]:
+        pred, succ, ids = self.pred, self.succ, self.ids
+        indegree = [len(p) for p in pred]
+        order = [node for node, task_id in enumerate(ids) if task_id is not None and not indegree[node]]
+        # Kahn's algorithm, using the output list itself as the queue
+        for node in order:
+            for succ_node in succ[node]:
+                indegree[succ_node] -= 1
+                if not indegree[succ_node]:
+                    order.append(succ_node)
+        if len(order) != len(self.index):
+            raise ScheduleCycleError(self._find_cycle({n for n, d in enumerate(indegree) if d > 0}))
+        return order
+
+    def _find_cycle(self, remaining: Set[int]) -> List[str]:
+        # Every node left after Kahn's algorithm has a predecessor that is also left,
+        # so walking predecessors must eventually revisit a node.
+        node = next(iter(remaining))
+        seen: Dict[int, int] = {}
+        path: List[int] = []
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = next(p for p in self.pred[node] if p in remaining)
+        cycle = [self.ids[n] for n in reversed(path[seen[node]:])]
+        return cycle + [cycle[0]]
+
+    # ---------- passes ----------
+    def compute(self) -> "ScheduleGraph":
+        self.order = order = self.topological_order()
+        origin = self.origin or 0
+        duration, not_before, pred, pred_k, succ, succ_k = (self.duration, self.not_before, self.pred,
+                                                             self.pred_k, self.succ, self.succ_k)
+
+        es = [None] * len(self.ids)
+        finish = 0
+        for node in order:
+            floor = not_before[node]
+            start = floor - origin if floor is not None else 0
+            for pred_node, k in zip(pred[node], pred_k[node]):
+                candidate = es[pred_node] + k
+                if candidate > start:
+                    start = candidate
+            es[node] = start
+            if start + duration[node] > finish:
+                finish = start + duration[node]
+
+        ls = [None] * len(self.ids)
+        for node in reversed(order):
+            start = finish - duration[node]
+            for succ_node, k in zip(succ[node], succ_k[node]):
+                candidate = ls[succ_node] - k
+                if candidate < start:
+                    start = candidate
+            ls[node] = start
+
+        self.es, self.ls, self.finish = es, ls, finish
+        self.computed_origin = self.origin
+        return self
+
+    # ---------- incremental updates ----------
+    # Edits only touch the affected region: descendants of the edited task for
+    # early dates, ancestors for late dates. Within a region, a node is only
+    # re-evaluated if one of its inputs actually moved.
+    def _unlink_in(self, node: int):
+        succ, succ_k = self.succ, self.succ_k
+        for pred in set(self.pred[node]):
+            kept = [(s, k) for s, k in zip(succ[pred], succ_k[pred]) if s != node]
+            succ[pred] = [s for s, _ in kept]
+            succ_k[pred] = [k for _, k in kept]
+        self.pred[node], self.pred_k[node], self.pred_type[node], self.pred_lag[node] = [], [], [], []
+
+    def _relink_in(self, node: int):
+        # Re-derive incoming constraints after a duration change on either end
+        edges = self.pred[node], self.pred_type[node], self.pred_lag[node]
+        self._unlink_in(node)
+        self._link_in(node, *edges)
+
+    def _earliest_start(self) -> Optional[int]:
+        return min((start for start in self.not_before if start is not None), default=None)
+
+    def upsert_task(self, task: Dict) -> Tuple[Set[int], Set[int]]:
+        """Apply a created/edited task; returns (forward seeds, backward seeds) for recompute()."""
+        task_id = task["id"]
+        node = self.index.get(task_id)
+        is_new = node is None
+        if is_new:
+            node = self._new_node(task_id)
+        old_duration = self.duration[node]
+        old_start = self.not_before[node]
+        old_preds = set(self.pred[node])
+        self._set_node(node, task)
+        if old_start is not None and old_start == self.origin and self.not_before[node] != old_start:
+            # The task that defined the project start moved; find the new earliest start
+            self.origin = self._earliest_start()
+        duration_changed = not is_new and self.duration[node] != old_duration
+
+        self.unresolved = [u for u in self.unresolved if u["task_id"] != task_id]
+        self._unlink_in(node)
+        self._set_deps(node, task.get("dependencies") or [])
+
+        forward, backward = {node}, {node} | old_preds | set(self.pred[node])
+        if duration_changed:
+            for succ_node in set(self.succ[node]):
+                self._relink_in(succ_node)
+                forward.add(succ_node)
+        return forward, backward
+
+    def remove_task(self, task_id: str) -> Tuple[Set[int], Set[int]]:
+        node = self.index.get(task_id)
+        if node is None:
+            return set(), set()
+        preds = set(self.pred[node])
+        succs = set(self.succ[node])
+        self._unlink_in(node)
+        for succ_node in succs:
+            kept = [edge for edge in zip(self.pred[succ_node], self.pred_type[succ_node], self.pred_lag[succ_node])
+                    if edge[0] != node]
+            self._unlink_in(succ_node)
+            self._link_in(succ_node, [p for p, _, _ in kept], [t for _, t, _ in kept], [lag for _, _, lag in kept])
+            self.unresolved.append({"task_id": self.ids[succ_node], "depends_on": task_id})
+        self.unresolved = [u for u in self.unresolved if u["task_id"] != task_id]
+        del self.index[task_id]
+        self.ids[node] = None
+        self.duration[node] = 0
+        self.not_before[node] = None
+        self.es[node] = self.ls[node] = None
+        self.succ[node], self.succ_k[node] = [], []
+        self._free.append(node)
+        if self.origin is not None and self.origin not in self.not_before:
+            self.origin = self._earliest_start()
+        return succs, preds
+
+    def dependency_cycle(self, task_id: str, pred_ids: Iterable[str]) -> Optional[List[str]]:
+        """The cycle that making task_id depend on pred_ids would create, if any."""
+        targets = set(pred_ids)
+        if task_id in targets:
+            return [task_id, task_id]
+        start = self.index.get(task_id)
+        if start is None:
+            return None
+        targets = {self.index[t] for t in targets if t in self.index}
+        parent: Dict[int, Optional[int]] = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for succ_node in self.succ[node]:
+                if succ_node in parent:
+                    continue
+                parent[succ_node] = node
+                if succ_node in targets:
+                    path = [succ_node]
+                    while parent[path[-1]] is not None:
+                        path.append(parent[path[-1]])
+                    path.reverse()
+                    return [self.ids[n] for n in path] + [task_id]
+                queue.append(succ_node)
+        return None
+
+    def _region(self, seeds: Set[int], edges: List[List[int]]) -> Set[int]:
+        region = {s for s in seeds if self.ids[s] is not None}
+        stack = list(region)
+        while stack:
+            for other in edges[stack.pop()]:
+                if other not in region:
+                    region.add(other)
+                    stack.append(other)
+        return region
+
+    def _region_order(self, region: Set[int], inbound: List[List[int]], outbound: List[List[int]]) -> List[int]:
+        indegree = {n: sum(1 for o in inbound[n] if o in region) for n in region}
+        order = [n for n, d in indegree.items() if d == 0]
+        for node in order:
+            for other in outbound[node]:
+                if other in region:
+                    indegree[other] -= 1
+                    if indegree[other] == 0:
+                        order.append(other)
+        if len(order) != len(region):
+            raise ScheduleCycleError(self._find_cycle({n for n, d in indegree.items() if d > 0}))
+        return order
+
+    def recompute(self, forward_seeds: Set[int], backward_seeds: Set[int]) -> List[Tuple[str, bool, float]]:
+        """Re-run the passes over the affected region only; returns tasks whose flags changed."""
+        if not self.index:
+            return []
+        before: Dict[int, Optional[Tuple[bool, float]]] = {}
+        es, ls = self.es, self.ls
+
+        def remember(node):
+            if node not in before:
+                before[node] = (ls[node] <= es[node], ls[node] - es[node]) \
+                    if es[node] is not None and ls[node] is not None else None
+
+        if self.origin != self.computed_origin:
+            # Every offset moves; fall back to a full in-memory pass
+            for node in self.index.values():
+                remember(node)
+            self.compute()
+            es, ls = self.es, self.ls
+        else:
+            origin = self.origin or 0
+            duration, not_before, pred, pred_k, succ, succ_k = (self.duration, self.not_before, self.pred,
+                                                                 self.pred_k, self.succ, self.succ_k)
+            region = self._region(forward_seeds, succ)
+            dirty = set(forward_seeds)
+            for node in self._region_order(region, pred, succ):
+                if node not in dirty:
+                    continue
+                floor = not_before[node]
+                start = floor - origin if floor is not None else 0
+                for pred_node, k in zip(pred[node], pred_k[node]):
+                    candidate = es[pred_node] + k
+                    if candidate > start:
+                        start = candidate
+                remember(node)
+                if es[node] != start:
+                    es[node] = start
+                    dirty.update(succ[node])
+
+            finish = max(es[n] + duration[n] for n in self.index.values())
+            if finish != self.finish:
+                # Every sink's late finish moves, so redo the backward pass in full
+                for node in self.index.values():
+                    remember(node)
+                self.finish = finish
+                self.order = self.topological_order()
+                backward_order = list(reversed(self.order))
+                dirty = set(self.index.values())
+            else:
+                region = self._region(backward_seeds, pred)
+                backward_order = self._region_order(region, succ, pred)
+                dirty = set(backward_seeds)
+                self.order = []
+            for node in backward_order:
+                if node not in dirty:
+                    continue
+                start = finish - duration[node]
+                for succ_node, k in zip(succ[node], succ_k[node]):
+                    candidate = ls[succ_node] - k
+                    if candidate < start:
+                        start = candidate
+                remember(node)
+                if ls[node] != start:
+                    ls[node] = start
+                    dirty.update(pred[node])
+
+        changes = []
+        self.critical_changed = False
+        for node, previous in before.items():
+            if self.ids[node] is None or es[node] is None:
+                continue
+            current = (ls[node] <= es[node], ls[node] - es[node])
+            if current != previous:
+                changes.append((self.ids[node], *current))
+                if previous is None or previous[0] != current[0]:
+                    self.critical_changed = True
+        return changes
+
+    # ---------- results ----------
+    def task_ids(self) -> List[str]:
+        return list(self.index)
+
+    def scheduled(self, task_id: str) -> bool:
+        node = self.index.get(task_id)
+        return node is not None and self.es[node] is not None and self.ls[node] is not None
+
+    def early_start(self, task_id: str) -> int:
+        return self.es[self.index[task_id]]
+
+    def late_start(self, task_id: str) -> int:
+        return self.ls[self.index[task_id]]
+
+    def float_days(self, task_id: str) -> float:
+        node = self.index[task_id]
+        return self.ls[node] - self.es[node]
+
+    def is_critical(self, task_id: str) -> bool:
+        node = self.index[task_id]
+        return self.ls[node] <= self.es[node]
+
+    def predecessors(self, task_id: str) -> List[Tuple[str, int]]:
+        """(predecessor id, k) for each constraint into ``task_id``."""
+        node = self.index.get(task_id)
+        if node is None:
+            return []
+        return [(self.ids[p], k) for p, k in zip(self.pred[node], self.pred_k[node])]
+
+    def successors(self, task_id: str) -> List[Tuple[str, int]]:
+        """(successor id, k) for each constraint out of ``task_id``."""
+        node = self.index.get(task_id)
+        if node is None:
+            return []
+        return [(self.ids[s], k) for s, k in zip(self.succ[node], self.succ_k[node])]
+
+    def task_order(self) -> List[str]:
+        """Task ids in dependency order."""
+        if len(self.order) != len(self.index):
+            # Incremental updates leave the global order stale; rebuild on demand
+            self.order = self.topological_order()
+        return [self.ids[node] for node in self.order]
+
+    def critical_path(self) -> List[str]:
+        return [t for t in self.task_order() if self.is_critical(t)]
+
+    def _to_date(self, offset: float) -> Optional[str]:
+        if self.origin is None:
+            return None
+        return date.fromordinal(self.origin + int(offset)).isoformat()
+
+    def _finish_date(self, start: float, duration: int) -> Optional[str]:
+        # Reported inclusive, matching how tasks store end_date
+        return self._to_date(start + max(duration - 1, 0))
+
+    def task_schedule(self, task_id: str) -> Dict:
+        node = self.index[task_id]
+        d, es, ls = self.duration[node], self.es[node], self.ls[node]
+        return {
+            "id": task_id,
+            "duration_days": d,
+            "early_start": self._to_date(es),
+            "early_finish": self._finish_date(es, d),
+            "late_start": self._to_date(ls),
+            "late_finish": self._finish_date(ls, d),
+            "float_days": ls - es,
+            "is_critical_path": ls <= es,
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "critical_path": self.critical_path(),
+            "total_duration_days": self.finish,
+            "project_start": self._to_date(0),
+            "project_finish": self._finish_date(0, int(self.finish)),
+            "task_count": len(self.index),
+            "unresolved_dependencies": self.unresolved,
+        }
+
+@contextmanager
+def _gc_paused():
+    # A large graph allocates hundreds of thousands of small lists but no
+    # reference cycles, so cyclic collections while building it are pure overhead
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def compute_schedule(tasks: Iterable[Dict]) -> ScheduleGraph:
+    with _gc_paused():
+        return ScheduleGraph.from_tasks(tasks).compute()
+
+def changed_flags(graph: ScheduleGraph, tasks: Iterable[Dict]) -> List[Tuple[str, bool, float]]:
+    """(id, is_critical_path, float_days) for tasks whose stored values are stale."""
+    changes = []
+    for task in tasks:
+        task_id = task["id"]
+        if not graph.scheduled(task_id):
+            continue
+        critical = graph.is_critical(task_id)
+        slack = graph.float_days(task_id)
+        if task.get("is_critical_path") != critical or task.get("float_days") != slack:
+            changes.append((task_id, critical, slack))
+    return changes
+
+# ================= SCHEDULE SERVICE =================
+SCHEDULE_CACHE_PROJECTS = int(os.environ.get('SCHEDULE_CACHE_PROJECTS', 32))
+SCHEDULE_CACHE_TTL_SECONDS = float(os.environ.get('SCHEDULE_CACHE_TTL_SECONDS', 600))
+
+class ScheduleService:
+    """Keeps per-project schedule graphs in memory and applies task edits incrementally.
+
+    Graphs are cached per process, so edits made through another worker are
+    picked up once the cached graph expires (SCHEDULE_CACHE_TTL_SECONDS).
+    """
+
+    def __init__(self, db, max_projects: int = SCHEDULE_CACHE_PROJECTS, ttl: float = SCHEDULE_CACHE_TTL_SECONDS):
+        self.db = db
+        self.cache = TTLCache(maxsize=max_projects, ttl=ttl, name="schedules")
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _lock(self, project_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(project_id, asyncio.Lock())
+
+    async def _persist(self, project_id: str, graph: ScheduleGraph, changes: List[Tuple[str, bool, float]],
+                       critical_changed: bool = True):
+        # One unordered bulk_write covering only the tasks whose flags actually changed
+        if changes:
+            now = datetime.now(timezone.utc).isoformat()
+            await self.db.tasks.bulk_write([
+                UpdateOne({"id": task_id}, {"$set": {"is_critical_path": critical, "float_days": slack, "updated_at": now}})
+                for task_id, critical, slack in changes
+            ], ordered=False)
+        if critical_changed:
+            await self.db.projects.update_one({"id": project_id}, {"$set": {
+                "critical_path": graph.critical_path(),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }})
+
+    async def _load(self, project_id: str) -> Tuple[ScheduleGraph, List[Tuple[str, bool, float]]]:
+        tasks = await self.db.tasks.find({"project_id": project_id}, SCHEDULE_FIELDS).to_list(None)
+        graph = await asyncio.to_thread(compute_schedule, tasks)
+        changes = changed_flags(graph, tasks)
+        await self._persist(project_id, graph, changes)
+        self.cache.set(project_id, graph)
+        return graph, changes
+
+    async def graph(self, project_id: str, refresh: bool = False) -> ScheduleGraph:
+        async with self._lock(project_id):
+            graph = None if refresh else self.cache.get(project_id)
+            if graph is None:
+                graph, _ = await self._load(project_id)
+            return graph
+
+    async def check_dependencies(self, project_id: str, task_id: str, dependencies: List[Dict]):
+        """Raise before writing if the new dependencies are invalid or would close a cycle."""
+        for dep in dependencies:
+            if (dep.get("type") or FINISH_TO_START) not in _PRED_FINISH:
+                raise ScheduleError(f"Task {task_id}: unknown dependency type '{dep.get('type')}'")
+            _lag_days(task_id, dep)
+        graph = await self.graph(project_id)
+        cycle = graph.dependency_cycle(task_id, [d.get("task_id") for d in dependencies])
+        if cycle:
+            raise ScheduleCycleError(cycle)
+
+    async def _apply(self, project_id: str, mutate) -> List[Tuple[str, bool, float]]:
+        """Apply an edit to the cached graph and persist the flags that changed."""
+        async with self._lock(project_id):
+            graph = self.cache.get(project_id)
+            if graph is None:
+                # Nothing cached: a full load already reflects the edit
+                _, changes = await self._load(project_id)
+                return changes
+            try:
+                forward, backward = mutate(graph)
+                changes = graph.recompute(forward, backward)
+            except ScheduleError:
+                self.cache.invalidate(project_id)
+                raise
+            await self._persist(project_id, graph, changes, graph.critical_changed)
+            return changes
+
+    async def task_changed(self, task: Dict) -> List[Tuple[str, bool, float]]:
+        return await self._apply(task["project_id"], lambda graph: graph.upsert_task(task))
+
+    async def task_removed(self, project_id: str, task_id: str) -> List[Tuple[str, bool, float]]:
+        return await self._apply(project_id, lambda graph: graph.remove_task(task_id))
+
+    def invalidate(self, project_id: Optional[str] = None):
+        if project_id is None:
+            self.cache.clear()
+        else:
+            self.cache.invalidate(project_id)
@@ -1,49 +1,113 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 import os
+import asyncio
 import logging
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
-import bcrypt
 from enum import Enum
-import io
-import csv
 import json
+import base64
 from contextlib import asynccontextmanager
+from passwords import hasher, hash_password_async, verify_password_async, HasherBusyError
+from caching import TTLCache
+from indexes import ensure_indexes, index_report, INDEX_VERSION
+from etags import docs_etag, doc_etag, etag_matches, with_fingerprint, strip_fields
+from exports import (export_cursor, schema_fields, stream_csv, stream_json_array, stream_ndjson,
+                     stream_columnar, columnar_available, COLUMNAR_FORMATS)
+from bulk import (BULK_UPDATE_MAX_ITEMS, BulkPayloadError, detect_format, parse_rows, validate_rows, derive_wbs_levels,
+                  referenced_ids, resolve_references, error_report)
+from dashboard import DashboardSnapshot, server_timing
+from metrics import (metrics, MetricsMiddleware, MongoCommandListener, metrics_authorized,
+                     PROMETHEUS_CONTENT_TYPE)
+from mutations import (mutate, bulk_mutate, update_op, clean_update, field_update, check_plain_fields,
+                       InvalidUpdate, parse_if_match, entity_etag, supports_transactions, VersionConflict)
+from projections import build_projection
+from responses import FastJSONResponse, json_response
+from compression import CompressionMiddleware
+from slowlog import SlowQueryLog
+from scheduling import ScheduleService, ScheduleError, ScheduleCycleError, SCHEDULE_INPUTS
+from synthetic import SYNTHETIC_MAX_TASKS, populate as populate_synthetic
+from allocation import (ALLOCATION_RESOURCE_FIELDS, ALLOCATION_TASK_FIELDS, INACTIVE_TASK_STATUSES, LEVELING_TASK_FIELDS,
+                        allocation_totals, format_day, level_resources, over_allocations, parse_day, shifted)
+from budget_rollups import (BUDGET_ROLLUP_FIELDS, BUDGET_ROLLUP_INPUTS, PROGRAM_TOTALS, PROJECT_TOTALS,
+                            BudgetRollups, project_health_fields)
+from utilization import (ALLOCATION_FIELDS, ALLOCATION_INPUTS, DERIVED_RESOURCE_FIELDS, ResourceUtilization,
+                         resource_burnout_fields, resource_utilization_fields)
+from hierarchy import ProjectHierarchy, tree_nodes
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+slow_query_log = SlowQueryLog()
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandListener(), slow_query_log])
 db_name = os.environ.get('DB_NAME', 'defense_pm')
 db = client[db_name]
 
+# Materialized dashboard; write routes mark the sections they touch stale
+dashboard_snapshot = DashboardSnapshot(db)
+
+# In-memory per-project dependency graphs for incremental critical-path updates
+schedule_service = ScheduleService(db)
+
+# Resource allocation / utilization derived from task assignments
+resource_utilization = ResourceUtilization(db)
+
 # JWT Settings
 JWT_SECRET = os.environ.get('JWT_SECRET', 'defense-pm-secret-key-2024')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Authenticated principal cache (user documents keyed by user id)
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 4096))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', 60))
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS, name="principals")
+
+# List pagination
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 200))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 1000))
+
+# Create the declared index set on startup (disable for very large datasets and use `python indexes.py build`)
+INDEX_BOOTSTRAP = os.environ.get('INDEX_BOOTSTRAP', 'true').lower() == 'true'
+
 security = HTTPBearer()
+# For routes where authentication depends on the parameters
+optional_security = HTTPBearer(auto_error=False)
 
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Nothing needed here as MongoDB client is already initialized
+    # Startup: MongoDB client is already initialized; make sure indexes exist
+    if INDEX_BOOTSTRAP:
+        try:
+            result = await ensure_indexes(db)
+            logger.info("Index set v%s ensured (failures: %s)", result["version"], list(result["failures"]))
+        except Exception as e:
+            logger.error("Index bootstrap failed: %s", e)
+    await slow_query_log.start(db)
+    resource_utilization.start()
     yield
-    # Shutdown: Close MongoDB client
+    # Shutdown: stop background snapshot rebuilds, reconciliation and the slow query log, then close MongoDB client and the password hashing pool
+    await dashboard_snapshot.close()
+    await resource_utilization.close()
+    await slow_query_log.close()
     client.close()
+    hasher.shutdown()
 
-app = FastAPI(title="Defense Project Management System", lifespan=lifespan)
+app = FastAPI(title="Defense Project Management System", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -145,6 +209,7 @@ class TokenResponse(BaseModel):
 class ProgramBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     name: str
     code: str
     description: Optional[str] = None
@@ -155,6 +220,9 @@ class ProgramBase(BaseModel):
     end_date: str
     budget_total: float = 0
     budget_allocated: float = 0
+    budget_spent: float = 0
+    budget_forecast: float = 0
+    budget_released: float = 0
     status: ProjectStatus = ProjectStatus.PLANNING
     health_score: int = 100
     owner_id: Optional[str] = None
@@ -177,6 +245,7 @@ class ProgramCreate(BaseModel):
 class ProjectBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     program_id: str
     parent_project_id: Optional[str] = None
     name: str
@@ -190,8 +259,10 @@ class ProjectBase(BaseModel):
     actual_start: Optional[str] = None
     actual_end: Optional[str] = None
     budget_allocated: float = 0
+    budget_planned: float = 0
     budget_spent: float = 0
     budget_forecast: float = 0
+    budget_released: float = 0
     status: ProjectStatus = ProjectStatus.PLANNING
     health_score: int = 100
     progress: int = 0
@@ -229,6 +300,7 @@ class ProjectCreate(BaseModel):
 class TaskBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     project_id: str
     parent_task_id: Optional[str] = None
     wbs_code: str
@@ -278,10 +350,22 @@ class TaskCreate(BaseModel):
     assigned_vendor: Optional[str] = None
     acceptance_criteria: Optional[str] = None
 
+class TaskBulkChange(BaseModel):
+    id: str
+    changes: Dict[str, Any]
+    version: Optional[int] = None  # per-item If-Match
+
+class LevelingChange(BaseModel):
+    id: str
+    new_start_date: str
+    new_end_date: str
+    version: Optional[int] = None
+
 # Resource Model with enhanced capacity planning
 class ResourceBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     name: str
     type: str
     department: Optional[str] = None
@@ -315,6 +399,7 @@ class ResourceCreate(BaseModel):
 class BudgetEntryBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     project_id: str
     category: str
     sub_category: Optional[str] = None
@@ -350,6 +435,7 @@ class BudgetCreate(BaseModel):
 class RiskBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     project_id: str
     title: str
     description: Optional[str] = None
@@ -386,6 +472,7 @@ class RiskCreate(BaseModel):
 class VendorBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     name: str
     code: str
     contact_email: str
@@ -416,6 +503,7 @@ class VendorCreate(BaseModel):
 class ContractBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     vendor_id: str
     project_id: str
     contract_number: str
@@ -443,6 +531,7 @@ class ContractCreate(BaseModel):
 class ApprovalBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     entity_type: str
     entity_id: str
     title: str
@@ -478,6 +567,7 @@ class ApprovalCreate(BaseModel):
 class IssueBase(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
     project_id: str
     title: str
     description: Optional[str] = None
@@ -504,11 +594,18 @@ class IssueCreate(BaseModel):
     due_date: Optional[str] = None
 
 # ================= AUTH HELPERS =================
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# bcrypt runs on the bounded pool in passwords.py; never call it inline in a handler.
+async def hash_password(password: str) -> str:
+    try:
+        return await hash_password_async(password)
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Authentication service busy, retry shortly")
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def verify_password(password: str, hashed: str) -> bool:
+    try:
+        return await verify_password_async(password, hashed)
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Authentication service busy, retry shortly")
 
 def create_token(user_id: str, email: str, role: str) -> str:
     payload = {
@@ -519,18 +616,154 @@ def create_token(user_id: str, email: str, role: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def invalidate_principal(user_id: Optional[str] = None):
+    # Call whenever a user document is changed or deleted; no id clears everything
+    if user_id is None:
+        principal_cache.clear()
+    else:
+        principal_cache.invalidate(user_id)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict:
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user = await db.users.find_one({"id": payload["sub"]}, {"_id": 0, "password_hash": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        user_id = payload["sub"]
+        user = principal_cache.get(user_id)
+        if user is None:
+            user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            principal_cache.set(user_id, user)
+        # Hand out a copy so handlers can't mutate the cached principal
+        return dict(user)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def get_admin_user(current_user: Dict = Depends(get_current_user)) -> Dict:
+    if current_user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+# ================= PAGINATION HELPERS =================
+# Keyset pagination on the unique `id` field. Every list filter has a compound
+# index ending in `id` (see indexes.py) so pages are index walks, not skips.
+def encode_cursor(last_id: str) -> str:
+    return base64.urlsafe_b64encode(last_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_', validate=True).decode('utf-8')
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(collection, query: Dict, projection: Dict, limit: int, after: Optional[str],
+                     request: Request, response: Response) -> List[Dict]:
+    """One page of documents sorted by id, setting X-Next-Cursor / Link when more remain."""
+    if after:
+        query = {**query, "id": {"$gt": decode_cursor(after)}}
+    docs = await collection.find(query, projection).sort("id", 1).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["id"])
+        response.headers["X-Next-Cursor"] = next_cursor
+        next_url = request.url.include_query_params(after=next_cursor, limit=limit)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return docs
+
+async def paginate(collection, query: Dict, projection: Dict, limit: int, after: Optional[str],
+                   request: Request, response: Response) -> List[Dict]:
+    """Return one page sorted by id; the next cursor goes in X-Next-Cursor / Link headers.
+
+    The page carries a weak ETag over its documents' versions, and a matching
+    If-None-Match short-circuits to 304 before anything is serialized.
+    """
+    projection, added = with_fingerprint(projection)
+    docs = await fetch_page(collection, query, projection, limit, after, request, response)
+    response.headers["ETag"] = docs_etag(docs, request.url.path, str(request.url.query))
+    if etag_matches(request.headers.get("if-none-match"), response.headers["ETag"]):
+        return not_modified(response)
+    strip_fields(docs, added)
+    return json_response(docs, response)
+
+def not_modified(response: Response) -> Response:
+    # Keep validators and pagination headers; drop the body entirely
+    headers = {k: v for k, v in response.headers.items() if k.lower() in ("etag", "x-next-cursor", "link")}
+    return Response(status_code=304, headers=headers)
+
+async def find_one_conditional(collection, query: Dict, projection: Dict, request: Request, response: Response,
+                               label: str):
+    """find_one for detail routes, with ETag / If-None-Match handling."""
+    projection, added = with_fingerprint(projection)
+    doc = await collection.find_one(query, projection)
+    if not doc:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    response.headers["ETag"] = doc_etag(doc, request.url.path, str(request.url.query))
+    if etag_matches(request.headers.get("if-none-match"), response.headers["ETag"]):
+        return not_modified(response)
+    strip_fields([doc], added)
+    return json_response(doc, response)
+
+def page_params(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[str] = None) -> Dict:
+    return {"limit": limit, "after": after}
+
+def projection_params(collection: str):
+    """Dependency turning ?fields=a,b and ?view=summary into a Mongo projection."""
+    def dependency(fields: Optional[str] = None, view: Optional[str] = None) -> Dict:
+        try:
+            return build_projection(collection, fields, view)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return dependency
+
+# ================= MUTATION HELPERS =================
+# Writes go through mutate(): one find_one_and_update that bumps `version` and returns
+# the new document. Clients may send If-Match: "<version>" to reject stale edits.
+async def mutate_entity(collection, entity_id: str, update, request: Request, response: Response, label: str) -> Dict:
+    try:
+        expected_version = parse_if_match(request.headers.get("if-match"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header")
+    try:
+        doc = await mutate(collection, entity_id, update, expected_version)
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail={
+            "message": f"{label} was modified by another request",
+            "current_version": e.current_version,
+        })
+    if doc is None:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    response.headers["ETag"] = entity_etag(doc)
+    return doc
+
+def entity_update(values: Dict[str, Any], derived: List[Dict]):
+    try:
+        return field_update(values, derived)
+    except InvalidUpdate as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def risk_level_expr(score) -> Dict:
+    return {"$switch": {"branches": [
+        {"case": {"$gte": [score, 15]}, "then": "critical"},
+        {"case": {"$gte": [score, 10]}, "then": "high"},
+        {"case": {"$gte": [score, 5]}, "then": "medium"},
+    ], "default": "low"}}
+
+def budget_variance_fields() -> Dict:
+    planned = {"$ifNull": ["$amount_planned", 0]}
+    actual = {"$ifNull": ["$amount_actual", 0]}
+    overrun = {"$gt": [actual, planned]}
+    return {
+        "variance": {"$subtract": [planned, actual]},
+        "is_overrun": overrun,
+        # In real app, trigger alert notification when this flips to true
+        "overrun_alert_sent": {"$cond": [overrun, True, "$overrun_alert_sent"]},
+    }
+
+# Budget totals per project / program, maintained from budget entry writes
+budget_rollups = BudgetRollups(db, project_stages=[{"$set": project_health_fields()}])
+project_hierarchy = ProjectHierarchy(db)
+
 # ================= AUTH ROUTES =================
 @api_router.post("/auth/register", response_model=TokenResponse)
 async def register(user_data: UserCreate):
@@ -548,10 +781,15 @@ async def register(user_data: UserCreate):
     )
     
     user_dict = user.model_dump()
-    user_dict['password_hash'] = hash_password(user_data.password)
+    user_dict['password_hash'] = await hash_password(user_data.password)
     user_dict['created_at'] = user_dict['created_at'].isoformat()
     
-    await db.users.insert_one(user_dict)
+    try:
+        await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        # users.email is unique; covers concurrent registrations
+        raise HTTPException(status_code=400, detail="Email already registered")
+    invalidate_principal(user.id)
     
     token = create_token(user.id, user.email, user.role.value)
     return TokenResponse(
@@ -575,7 +813,7 @@ async def login(credentials: UserLogin):
         
     # Check password
     stored_hash = user.get('password_hash', '')
-    if not verify_password(credentials.password, stored_hash):
+    if not await verify_password(credentials.password, stored_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_token(user['id'], user['email'], user['role'])
@@ -597,22 +835,20 @@ async def get_me(current_user: Dict = Depends(get_current_user)):
     return UserResponse(**current_user)
 
 @api_router.get("/users")
-async def get_users(current_user: Dict = Depends(get_current_user)):
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
-    return users
+async def get_users(request: Request, response: Response, page: Dict = Depends(page_params),
+                    projection: Dict = Depends(projection_params("users")), current_user: Dict = Depends(get_current_user)):
+    return await paginate(db.users, {}, projection, page["limit"], page["after"], request, response)
 
 # ================= PROGRAMS ROUTES =================
 @api_router.get("/programs")
-async def get_programs():
-    programs = await db.programs.find({}, {"_id": 0}).to_list(1000)
-    return programs
+async def get_programs(request: Request, response: Response, page: Dict = Depends(page_params),
+                       projection: Dict = Depends(projection_params("programs"))):
+    return await paginate(db.programs, {}, projection, page["limit"], page["after"], request, response)
 
 @api_router.get("/programs/{program_id}")
-async def get_program(program_id: str):
-    program = await db.programs.find_one({"id": program_id}, {"_id": 0})
-    if not program:
-        raise HTTPException(status_code=404, detail="Program not found")
-    return program
+async def get_program(program_id: str, request: Request, response: Response,
+                      projection: Dict = Depends(projection_params("programs"))):
+    return await find_one_conditional(db.programs, {"id": program_id}, projection, request, response, "Program")
 
 @api_router.post("/programs")
 async def create_program(program_data: ProgramCreate, current_user: Dict = Depends(get_current_user)):
@@ -622,38 +858,63 @@ async def create_program(program_data: ProgramCreate, current_user: Dict = Depen
     program_dict['updated_at'] = program_dict['updated_at'].isoformat()
     await db.programs.insert_one(program_dict)
     program_dict.pop('_id', None)
+    dashboard_snapshot.invalidate("programs")
     return program_dict
 
 @api_router.put("/programs/{program_id}")
-async def update_program(program_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def update_program(program_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    # Budget totals are rolled up from budget entries; clients can't set them
+    update_data = {k: v for k, v in clean_update(update_data).items() if k not in PROGRAM_TOTALS.values()}
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-    result = await db.programs.update_one({"id": program_id}, {"$set": update_data})
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Program not found")
-    return await db.programs.find_one({"id": program_id}, {"_id": 0})
+    program = await mutate_entity(db.programs, program_id, {"$set": update_data}, request, response, "Program")
+    dashboard_snapshot.invalidate("programs")
+    return program
 
 @api_router.delete("/programs/{program_id}")
 async def delete_program(program_id: str, current_user: Dict = Depends(get_current_user)):
     result = await db.programs.delete_one({"id": program_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Program not found")
+    dashboard_snapshot.invalidate("programs")
     return {"message": "Program deleted"}
 
 # ================= PROJECTS ROUTES =================
 @api_router.get("/projects")
-async def get_projects(program_id: Optional[str] = None, include_subprojects: bool = True):
-    query = {}
+async def get_projects(request: Request, response: Response, program_id: Optional[str] = None, include_subprojects: bool = True,
+                       page: Dict = Depends(page_params),
+                       projection: Dict = Depends(projection_params("projects"))):
+    """Projects, sub-projects included unless ``include_subprojects=false``.
+
+    With ``program_id``, sub-projects filed under another program are pulled
+    in too, resolved in one $graphLookup from the program's projects.
+    """
+    query: Dict[str, Any] = {}
     if program_id:
         query["program_id"] = program_id
-    projects = await db.projects.find(query, {"_id": 0}).to_list(1000)
-    return projects
+    if not include_subprojects:
+        query["parent_project_id"] = None
+    elif program_id:
+        subprojects = await project_hierarchy.subproject_ids(query)
+        if subprojects:
+            query = {"$or": [query, {"id": {"$in": subprojects}}]}
+    return await paginate(db.projects, query, projection, page["limit"], page["after"], request, response)
+
+@api_router.get("/projects/{project_id}/tree")
+async def get_project_tree(project_id: str, request: Request, response: Response,
+                           max_depth: Optional[int] = Query(None, ge=0)):
+    """The project with its nested sub-projects, each carrying a roll-up of its whole subtree."""
+    tree = await project_hierarchy.tree(project_id, max_depth)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    response.headers["ETag"] = docs_etag(tree_nodes(tree), request.url.path, str(request.url.query))
+    if etag_matches(request.headers.get("if-none-match"), response.headers["ETag"]):
+        return not_modified(response)
+    return json_response(tree, response)
 
 @api_router.get("/projects/{project_id}")
-async def get_project(project_id: str):
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return project
+async def get_project(project_id: str, request: Request, response: Response,
+                      projection: Dict = Depends(projection_params("projects"))):
+    return await find_one_conditional(db.projects, {"id": project_id}, projection, request, response, "Project")
 
 @api_router.post("/projects")
 async def create_project(project_data: ProjectCreate, current_user: Dict = Depends(get_current_user)):
@@ -663,66 +924,62 @@ async def create_project(project_data: ProjectCreate, current_user: Dict = Depen
     project_dict['updated_at'] = project_dict['updated_at'].isoformat()
     await db.projects.insert_one(project_dict)
     project_dict.pop('_id', None)
+    project_hierarchy.invalidate()
+    dashboard_snapshot.invalidate("projects")
     return project_dict
 
 @api_router.put("/projects/{project_id}")
-async def update_project(project_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def update_project(project_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    # Budget totals are rolled up from budget entries; clients can't set them
+    update_data = {k: v for k, v in clean_update(update_data).items() if k not in PROJECT_TOTALS.values()}
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    # Health score and cost variance are derived server-side from the merged document
+    derived = [{"$set": project_health_fields()}] if 'progress' in update_data or 'budget_allocated' in update_data else []
+    update = entity_update(update_data, derived)
     
-    # Calculate health score based on various factors
-    if 'progress' in update_data or 'budget_spent' in update_data:
-        project = await db.projects.find_one({"id": project_id}, {"_id": 0})
-        if project:
-            progress = update_data.get('progress', project.get('progress', 0))
-            budget_allocated = project.get('budget_allocated', 1)
-            budget_spent = update_data.get('budget_spent', project.get('budget_spent', 0))
-            
-            # Simple health score calculation
-            budget_health = 100 - min(100, max(0, ((budget_spent / budget_allocated) - 1) * 100)) if budget_allocated > 0 else 100
-            schedule_health = min(100, progress + 20)  # Simplified
-            update_data['health_score'] = int((budget_health + schedule_health) / 2)
-            
-            # Calculate variance
-            if budget_allocated > 0:
-                update_data['cost_variance'] = ((budget_allocated - budget_spent) / budget_allocated) * 100
-    
-    result = await db.projects.update_one({"id": project_id}, {"$set": update_data})
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return await db.projects.find_one({"id": project_id}, {"_id": 0})
+    before = await db.projects.find_one({"id": project_id}, {"_id": 0, "program_id": 1}) if 'program_id' in update_data else None
+    project = await mutate_entity(db.projects, project_id, update, request, response, "Project")
+    if before:
+        await budget_rollups.project_moved(project_id, before.get('program_id'), project.get('program_id'))
+    project_hierarchy.invalidate()
+    dashboard_snapshot.invalidate("projects")
+    return project
 
 @api_router.delete("/projects/{project_id}")
 async def delete_project(project_id: str, current_user: Dict = Depends(get_current_user)):
     result = await db.projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    project_hierarchy.invalidate()
+    dashboard_snapshot.invalidate("projects")
     return {"message": "Project deleted"}
 
 @api_router.post("/projects/{project_id}/go-no-go")
-async def update_go_no_go(project_id: str, decision: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def update_go_no_go(project_id: str, decision: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     update_data = {
         "go_no_go_status": decision.get("status", "pending"),
         "phase_gate_status": decision.get("status", "pending"),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    result = await db.projects.update_one({"id": project_id}, {"$set": update_data})
-    return await db.projects.find_one({"id": project_id}, {"_id": 0})
+    return await mutate_entity(db.projects, project_id, {"$set": update_data}, request, response, "Project")
 
 @api_router.post("/projects/{project_id}/scenarios")
-async def add_scenario(project_id: str, scenario: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def add_scenario(project_id: str, scenario: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     scenario['id'] = str(uuid.uuid4())
     scenario['created_at'] = datetime.now(timezone.utc).isoformat()
-    result = await db.projects.update_one(
-        {"id": project_id},
-        {"$push": {"scenarios": scenario}}
-    )
-    return await db.projects.find_one({"id": project_id}, {"_id": 0})
+    return await mutate_entity(db.projects, project_id, {"$push": {"scenarios": scenario}}, request, response, "Project")
 
 # ================= GANTT / SCHEDULING ROUTES =================
 @api_router.get("/projects/{project_id}/gantt")
-async def get_gantt_data(project_id: str):
-    tasks = await db.tasks.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+async def get_gantt_data(project_id: str, request: Request, response: Response, page: Dict = Depends(page_params)):
+    """Gantt rows for one page of the project's tasks; the project and milestones come with every page."""
+    tasks, project = await asyncio.gather(
+        fetch_page(db.tasks, {"project_id": project_id}, {"_id": 0}, page["limit"], page["after"], request, response),
+        db.projects.find_one({"id": project_id}, {"_id": 0}),
+    )
+    response.headers["ETag"] = docs_etag([project, *tasks], request.url.path, str(request.url.query))
+    if etag_matches(request.headers.get("if-none-match"), response.headers["ETag"]):
+        return not_modified(response)
     
     gantt_data = []
     for task in tasks:
@@ -739,40 +996,62 @@ async def get_gantt_data(project_id: str):
             "assignees": task.get('assigned_to', [])
         })
     
-    return {
+    return json_response({
         "project": project,
         "tasks": gantt_data,
         "milestones": project.get('milestones', []) if project else []
-    }
+    }, response)
+
+def schedule_http_error(e: ScheduleError) -> HTTPException:
+    if isinstance(e, ScheduleCycleError):
+        return HTTPException(status_code=422, detail={"message": str(e), "cycle": e.cycle})
+    return HTTPException(status_code=422, detail=str(e))
+
+async def reschedule_task(task: Dict):
+    # Incrementally refresh critical-path flags after a schedule-relevant edit
+    try:
+        changes = await schedule_service.task_changed(task)
+    except ScheduleError as e:
+        logger.warning("Schedule for project %s not updated: %s", task.get('project_id'), e)
+        return
+    for task_id, critical, slack in changes:
+        if task_id == task['id']:
+            task['is_critical_path'] = critical
+            task['float_days'] = slack
+
+async def reallocate(changes: List[Tuple[Optional[Dict], Optional[Dict]]]):
+    # Apply (before, after) task edits to resource allocation; the reconciliation job repairs misses
+    try:
+        await resource_utilization.tasks_changed(changes)
+    except PyMongoError as e:
+        logger.warning("Resource allocation not updated: %s", e)
+
+def allocation_changed(update_data: Dict) -> bool:
+    return any(field in update_data for field in ALLOCATION_INPUTS)
 
 @api_router.get("/projects/{project_id}/critical-path")
-async def get_critical_path(project_id: str):
-    tasks = await db.tasks.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    
-    # Simple critical path calculation based on dependencies and duration
-    critical_tasks = []
-    for task in tasks:
-        if task.get('is_critical_path') or task.get('float_days', 0) == 0:
-            critical_tasks.append(task['id'])
+async def get_critical_path(project_id: str, include_schedule: bool = False, refresh: bool = False):
+    try:
+        graph = await schedule_service.graph(project_id, refresh=refresh)
+    except ScheduleError as e:
+        raise schedule_http_error(e)
     
-    return {
-        "critical_path": critical_tasks,
-        "total_duration_days": len(tasks) * 5  # Simplified
-    }
+    result = graph.summary()
+    if include_schedule:
+        result["schedule"] = [graph.task_schedule(task_id) for task_id in graph.task_order()]
+    return result
 
 # ================= TASKS ROUTES =================
 @api_router.get("/tasks")
-async def get_tasks(project_id: Optional[str] = None):
+async def get_tasks(request: Request, response: Response, project_id: Optional[str] = None, page: Dict = Depends(page_params),
+                    projection: Dict = Depends(projection_params("tasks"))):
     query = {"project_id": project_id} if project_id else {}
-    tasks = await db.tasks.find(query, {"_id": 0}).to_list(1000)
-    return tasks
+    return await paginate(db.tasks, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.get("/tasks/{task_id}")
-async def get_task(task_id: str):
-    task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return task
+async def get_task(task_id: str, request: Request, response: Response,
+                   projection: Dict = Depends(projection_params("tasks"))):
+    return await find_one_conditional(db.tasks, {"id": task_id}, projection, request, response, "Task")
 
 @api_router.post("/tasks")
 async def create_task(task_data: TaskCreate, current_user: Dict = Depends(get_current_user)):
@@ -785,25 +1064,235 @@ async def create_task(task_data: TaskCreate, current_user: Dict = Depends(get_cu
     task_dict['updated_at'] = task_dict['updated_at'].isoformat()
     await db.tasks.insert_one(task_dict)
     task_dict.pop('_id', None)
+    await reschedule_task(task_dict)
+    await reallocate([(None, task_dict)])
+    dashboard_snapshot.invalidate("tasks")
     return task_dict
 
+# Fields the server owns on imported tasks
+TASK_IMPORT_SERVER_FIELDS = ("version", "wbs_level", "is_critical_path", "float_days", "created_at", "updated_at")
+
+async def read_bulk_payload(request: Request, format: Optional[str]) -> Tuple[bytes, str]:
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected a 'file' upload")
+        return await upload.read(), format or detect_format(upload.content_type, upload.filename)
+    return await request.body(), format or detect_format(content_type)
+
+@api_router.post("/tasks/bulk")
+async def bulk_import_tasks(request: Request, format: Optional[str] = None, current_user: Dict = Depends(get_current_user)):
+    """Import many tasks at once from a JSON array, or a CSV / NDJSON body or upload.
+
+    Rows are validated in batches and their parent/dependency references resolved
+    against this import plus the stored tasks; valid rows go in with one unordered
+    insert_many and every rejected row is reported with its index.
+    """
+    content, format = await read_bulk_payload(request, format)
+    try:
+        rows, errors = parse_rows(content, format)
+    except BulkPayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    documents = await asyncio.to_thread(validate_rows, rows, TaskBase, TASK_IMPORT_SERVER_FIELDS, errors)
+    derive_wbs_levels(documents)
+    
+    # One query each for referenced tasks and target projects
+    project_ids = list({doc['project_id'] for _, doc in documents})
+    stored_tasks, stored_projects = await asyncio.gather(
+        db.tasks.find({"id": {"$in": list(referenced_ids(documents))}}, {"_id": 0, "id": 1, "project_id": 1}).to_list(None),
+        db.projects.find({"id": {"$in": project_ids}}, {"_id": 0, "id": 1}).to_list(None),
+    )
+    documents = resolve_references(
+        documents,
+        {t['id']: t.get('project_id') for t in stored_tasks},
+        {p['id'] for p in stored_projects},
+        errors,
+    )
+    
+    now = datetime.now(timezone.utc).isoformat()
+    docs = []
+    for _, doc in documents:
+        doc['created_at'] = now
+        doc['updated_at'] = now
+        docs.append(doc)
+    
+    inserted_ids = [doc['id'] for doc in docs]
+    if docs:
+        try:
+            await db.tasks.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = set()
+            for write_error in e.details.get('writeErrors', []):
+                row = documents[write_error['index']][0]
+                failed.add(write_error['index'])
+                errors.setdefault(row, []).append(write_error.get('errmsg', 'Write failed'))
+            inserted_ids = [doc['id'] for i, doc in enumerate(docs) if i not in failed]
+    
+    # Full rebuild of each touched project's schedule; cycles surface as warnings
+    schedule_warnings = {}
+    for project_id in {doc['project_id'] for doc in docs}:
+        try:
+            await schedule_service.graph(project_id, refresh=True)
+        except ScheduleError as e:
+            schedule_warnings[project_id] = str(e)
+    if inserted_ids:
+        inserted = set(inserted_ids)
+        await reallocate([(None, doc) for doc in docs if doc['id'] in inserted])
+        dashboard_snapshot.invalidate("tasks")
+    
+    return {
+        "received": len(rows),
+        "inserted": len(inserted_ids),
+        "failed": len(errors),
+        "inserted_ids": inserted_ids,
+        "errors": error_report(errors),
+        "schedule_warnings": schedule_warnings,
+    }
+
+@api_router.patch("/tasks/bulk")
+async def bulk_update_tasks(updates: List[TaskBulkChange], atomic: bool = False, current_user: Dict = Depends(get_current_user)):
+    """Apply many task edits (Gantt drags, multi-select) in one bulk_write.
+
+    By default edits are independent and per-item failures are reported. With
+    atomic=true they run in a transaction and either all land or none do; that
+    needs a replica set.
+    """
+    if len(updates) > BULK_UPDATE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_UPDATE_MAX_ITEMS} updates per request")
+    if len({u.id for u in updates}) != len(updates):
+        raise HTTPException(status_code=400, detail="Each task may appear only once")
+    if atomic and not await supports_transactions(client):
+        raise HTTPException(status_code=400, detail="atomic=true requires a replica set")
+    
+    try:
+        for u in updates:
+            check_plain_fields(u.changes)
+    except InvalidUpdate as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    now = datetime.now(timezone.utc).isoformat()
+    changes = {u.id: {**clean_update(u.changes), 'updated_at': now} for u in updates}
+    errors: Dict[str, Dict] = {}
+    
+    # Cycle checks for dependency edits, against the cached schedule graphs
+    dependency_edits = [u.id for u in updates if 'dependencies' in changes[u.id]]
+    if dependency_edits:
+        owners = await db.tasks.find({"id": {"$in": dependency_edits}}, {"_id": 0, "id": 1, "project_id": 1}).to_list(None)
+        owner_of = {t['id']: t['project_id'] for t in owners}
+        for task_id in dependency_edits:
+            if task_id not in owner_of:
+                errors[task_id] = {"status": 404, "detail": "Task not found"}
+                continue
+            try:
+                await schedule_service.check_dependencies(owner_of[task_id], task_id, changes[task_id]['dependencies'] or [])
+            except ScheduleError as e:
+                errors[task_id] = {"status": 422, "detail": schedule_http_error(e).detail}
+    
+    pending = [u for u in updates if u.id not in errors]
+    if atomic and errors:
+        raise HTTPException(status_code=422, detail={"errors": [{"id": k, **v} for k, v in errors.items()]})
+    
+    # Pre-images for edits that move allocated hours
+    reallocating = [u.id for u in pending if allocation_changed(changes[u.id])]
+    before = {}
+    if reallocating:
+        before = {t['id']: t for t in await db.tasks.find({"id": {"$in": reallocating}}, ALLOCATION_FIELDS).to_list(None)}
+    
+    updated = []
+    if pending and atomic:
+        ops = [update_op(u.id, {"$set": changes[u.id]}, u.version) for u in pending]
+        async with await client.start_session() as session:
+            async with session.start_transaction():
+                result = await db.tasks.bulk_write(ops, ordered=True, session=session)
+                if result.matched_count != len(ops):
+                    await session.abort_transaction()
+                else:
+                    # Read back inside the transaction, so the documents are exactly what was written
+                    docs = await db.tasks.find({"id": {"$in": [u.id for u in pending]}}, {"_id": 0},
+                                               session=session).to_list(None)
+                    by_id = {doc['id']: doc for doc in docs}
+                    updated = [by_id[u.id] for u in pending]
+        if result.matched_count != len(ops):
+            current = await db.tasks.find({"id": {"$in": [u.id for u in pending]}}, {"_id": 0, "id": 1, "version": 1}).to_list(None)
+            versions = {t['id']: t.get('version', 0) for t in current}
+            failures = [
+                {"id": u.id, "status": 404, "detail": "Task not found"} if u.id not in versions
+                else {"id": u.id, "status": 412, "detail": "Task was modified by another request", "current_version": versions[u.id]}
+                for u in pending if u.id not in versions or (u.version is not None and versions[u.id] != u.version)
+            ]
+            raise HTTPException(status_code=409, detail={"message": "No changes applied", "errors": failures})
+    elif pending:
+        # One unordered bulk_write; each item's outcome comes from its own version-guarded write
+        outcomes = await bulk_mutate(db.tasks, [(u.id, {"$set": changes[u.id]}, u.version) for u in pending])
+        for u, outcome in zip(pending, outcomes):
+            if outcome is None:
+                errors[u.id] = {"status": 404, "detail": "Task not found"}
+            elif isinstance(outcome, VersionConflict):
+                errors[u.id] = {"status": 412, "detail": "Task was modified by another request",
+                                "current_version": outcome.current_version}
+            else:
+                updated.append(outcome)
+    
+    if any('project_id' in changes[doc['id']] for doc in updated):
+        schedule_service.invalidate()
+    else:
+        for doc in updated:
+            if any(field in changes[doc['id']] for field in SCHEDULE_INPUTS):
+                await reschedule_task(doc)
+    if before:
+        await reallocate([(before[doc['id']], doc) for doc in updated if doc['id'] in before])
+    if updated:
+        dashboard_snapshot.invalidate("tasks")
+    
+    return {
+        "updated": updated,
+        "errors": [{"id": task_id, **error} for task_id, error in errors.items()],
+    }
+
 @api_router.put("/tasks/{task_id}")
-async def update_task(task_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def update_task(task_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    update_data = clean_update(update_data)
+    if 'dependencies' in update_data:
+        # Reject cycles before anything is written
+        existing = await db.tasks.find_one({"id": task_id}, {"_id": 0, "project_id": 1})
+        if not existing:
+            raise HTTPException(status_code=404, detail="Task not found")
+        try:
+            await schedule_service.check_dependencies(existing['project_id'], task_id, update_data['dependencies'] or [])
+        except ScheduleError as e:
+            raise schedule_http_error(e)
+    
+    before = await db.tasks.find_one({"id": task_id}, ALLOCATION_FIELDS) if allocation_changed(update_data) else None
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-    result = await db.tasks.update_one({"id": task_id}, {"$set": update_data})
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    task = await mutate_entity(db.tasks, task_id, {"$set": update_data}, request, response, "Task")
+    if before:
+        await reallocate([(before, task)])
+    if 'project_id' in update_data:
+        # Moved between projects; both graphs are rebuilt lazily
+        schedule_service.invalidate()
+    elif any(field in update_data for field in SCHEDULE_INPUTS):
+        await reschedule_task(task)
+    dashboard_snapshot.invalidate("tasks")
+    return task
 
 @api_router.delete("/tasks/{task_id}")
 async def delete_task(task_id: str, current_user: Dict = Depends(get_current_user)):
-    result = await db.tasks.delete_one({"id": task_id})
-    if result.deleted_count == 0:
+    task = await db.tasks.find_one_and_delete({"id": task_id}, projection=ALLOCATION_FIELDS)
+    if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    await reallocate([(task, None)])
+    try:
+        await schedule_service.task_removed(task['project_id'], task_id)
+    except ScheduleError as e:
+        logger.warning("Schedule for project %s not updated: %s", task['project_id'], e)
+    dashboard_snapshot.invalidate("tasks")
     return {"message": "Task deleted"}
 
 @api_router.post("/tasks/{task_id}/accept")
-async def accept_task(task_id: str, acceptance: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def accept_task(task_id: str, acceptance: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     update_data = {
         "acceptance_status": acceptance.get("status", "accepted"),
         "accepted_by": current_user['id'],
@@ -812,26 +1301,29 @@ async def accept_task(task_id: str, acceptance: Dict[str, Any], current_user: Di
         "closure_notes": acceptance.get("notes", ""),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    result = await db.tasks.update_one({"id": task_id}, {"$set": update_data})
-    return await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    before = await db.tasks.find_one({"id": task_id}, ALLOCATION_FIELDS)
+    task = await mutate_entity(db.tasks, task_id, {"$set": update_data}, request, response, "Task")
+    if before:
+        await reallocate([(before, task)])
+    dashboard_snapshot.invalidate("tasks")
+    return task
 
 # ================= RESOURCES ROUTES =================
 @api_router.get("/resources")
-async def get_resources(type: Optional[str] = None, clearance: Optional[str] = None):
+async def get_resources(request: Request, response: Response, type: Optional[str] = None, clearance: Optional[str] = None,
+                        page: Dict = Depends(page_params),
+                        projection: Dict = Depends(projection_params("resources"))):
     query = {}
     if type:
         query["type"] = type
     if clearance:
         query["clearance_level"] = clearance
-    resources = await db.resources.find(query, {"_id": 0}).to_list(1000)
-    return resources
+    return await paginate(db.resources, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.get("/resources/{resource_id}")
-async def get_resource(resource_id: str):
-    resource = await db.resources.find_one({"id": resource_id}, {"_id": 0})
-    if not resource:
-        raise HTTPException(status_code=404, detail="Resource not found")
-    return resource
+async def get_resource(resource_id: str, request: Request, response: Response,
+                       projection: Dict = Depends(projection_params("resources"))):
+    return await find_one_conditional(db.resources, {"id": resource_id}, projection, request, response, "Resource")
 
 @api_router.post("/resources")
 async def create_resource(resource_data: ResourceCreate, current_user: Dict = Depends(get_current_user)):
@@ -840,60 +1332,162 @@ async def create_resource(resource_data: ResourceCreate, current_user: Dict = De
     resource_dict['created_at'] = resource_dict['created_at'].isoformat()
     await db.resources.insert_one(resource_dict)
     resource_dict.pop('_id', None)
+    dashboard_snapshot.invalidate("resources")
     return resource_dict
 
 @api_router.put("/resources/{resource_id}")
-async def update_resource(resource_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
-    # Calculate utilization and burnout risk
-    if 'allocated_hours' in update_data:
-        resource = await db.resources.find_one({"id": resource_id}, {"_id": 0})
-        if resource:
-            capacity = resource.get('capacity_hours', 160)
-            allocated = update_data.get('allocated_hours', 0)
-            utilization = min(100, int((allocated / capacity) * 100)) if capacity > 0 else 0
-            update_data['utilization'] = utilization
-            
-            if utilization > 100:
-                update_data['burnout_risk'] = "critical"
-            elif utilization > 85:
-                update_data['burnout_risk'] = "high"
-            elif utilization > 70:
-                update_data['burnout_risk'] = "medium"
-            else:
-                update_data['burnout_risk'] = "low"
+async def update_resource(resource_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    # Allocation fields are derived from task assignments; clients can't set them
+    update_data = {k: v for k, v in clean_update(update_data).items() if k not in DERIVED_RESOURCE_FIELDS}
+    # Utilization and burnout risk follow capacity in the same write
+    derived = []
+    if 'capacity_hours' in update_data:
+        derived = [{"$set": resource_utilization_fields()}, {"$set": resource_burnout_fields()}]
+    update = entity_update(update_data, derived)
     
-    result = await db.resources.update_one({"id": resource_id}, {"$set": update_data})
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Resource not found")
-    return await db.resources.find_one({"id": resource_id}, {"_id": 0})
+    resource = await mutate_entity(db.resources, resource_id, update, request, response, "Resource")
+    dashboard_snapshot.invalidate("resources")
+    return resource
 
 @api_router.get("/resources/conflicts/check")
-async def check_resource_conflicts():
-    resources = await db.resources.find({}, {"_id": 0}).to_list(1000)
-    conflicts = []
+async def check_resource_conflicts(start: Optional[str] = None, end: Optional[str] = None,
+                                   resource_id: Optional[str] = None, project_id: Optional[str] = None):
+    """Day ranges in which each resource's assigned work exceeds its daily capacity.
+
+    ``start``/``end`` limit the window reported; ``project_id`` limits it to
+    that project's assignees, whose load still counts work on every project.
+    """
+    window = (parse_day(start), parse_day(end))
+    if (start and window[0] is None) or (end and window[1] is None):
+        raise HTTPException(status_code=400, detail="start and end must be ISO dates")
+
+    resource_query: Dict[str, Any] = {}
+    if resource_id:
+        resource_query["id"] = resource_id
+    elif project_id:
+        assignees = await db.tasks.distinct("assigned_to", {"project_id": project_id})
+        resource_query["id"] = {"$in": assignees}
+    resources = await db.resources.find(resource_query, ALLOCATION_RESOURCE_FIELDS).to_list(None)
+    if not resources:
+        return []
+
+    task_query: Dict[str, Any] = {"status": {"$nin": list(INACTIVE_TASK_STATUSES)},
+                                  "assigned_to": {"$in": [r["id"] for r in resources]}}
+    if start:
+        task_query["end_date"] = {"$gte": format_day(window[0])}
+    if end:
+        task_query["start_date"] = {"$lt": format_day(window[1] + 1)}
+    tasks = await db.tasks.find(task_query, ALLOCATION_TASK_FIELDS).to_list(None)
+    return over_allocations(tasks, resources, window)
+
+async def leveling_inputs(project_id: Optional[str], program_id: Optional[str]):
+    if project_id:
+        project_ids = [project_id]
+    elif program_id:
+        project_ids = await db.projects.distinct("id", {"program_id": program_id})
+    else:
+        raise HTTPException(status_code=400, detail="project_id or program_id is required")
+    tasks = await db.tasks.find({"project_id": {"$in": project_ids}}, LEVELING_TASK_FIELDS).to_list(None)
+    if not tasks:
+        raise HTTPException(status_code=404, detail="No tasks found")
+    
+    graphs, schedule_errors = {}, {}
+    for pid in project_ids:
+        try:
+            graphs[pid] = await schedule_service.graph(pid)
+        except ScheduleError as e:
+            schedule_errors[pid] = str(e)  # its tasks stay where they are
+    
+    assignees = {a for t in tasks for a in t.get("assigned_to") or []}
+    resources = await db.resources.find({"id": {"$in": list(assignees)}}, ALLOCATION_RESOURCE_FIELDS).to_list(None)
+    background = await db.tasks.find({
+        "project_id": {"$nin": project_ids},
+        "status": {"$nin": list(INACTIVE_TASK_STATUSES)},
+        "assigned_to": {"$in": [r["id"] for r in resources]},
+    }, ALLOCATION_TASK_FIELDS).to_list(None)
+    return tasks, graphs, schedule_errors, resources, background
+
+@api_router.get("/resources/leveling/plan")
+async def propose_resource_leveling(project_id: Optional[str] = None, program_id: Optional[str] = None):
+    """Proposed task shifts that resolve over-allocation without moving any finish date.
+
+    Nothing is written; send the returned ``changes`` to POST
+    /resources/leveling/apply to accept them.
+    """
+    tasks, graphs, schedule_errors, resources, background = await leveling_inputs(project_id, program_id)
+    
+    def run():
+        proposal = level_resources(tasks, graphs, resources, background)
+        before = over_allocations(tasks + background, resources)
+        after = over_allocations(shifted(tasks, proposal["changes"]) + background, resources)
+        return proposal, allocation_totals(before), allocation_totals(after)
+    
+    proposal, before, after = await asyncio.to_thread(run)
+    return {
+        **proposal,
+        "task_count": len(tasks),
+        "resource_count": len(resources),
+        "before": before,
+        "after": after,
+        "schedule_errors": schedule_errors,
+    }
+
+@api_router.post("/resources/leveling/apply")
+async def apply_resource_leveling(changes: List[LevelingChange], current_user: Dict = Depends(get_current_user)):
+    """Write an accepted leveling proposal in one unordered bulk_write.
+
+    Each change carries the task version it was computed from; tasks edited
+    since then are skipped and reported rather than overwritten.
+    """
+    if len(changes) > BULK_UPDATE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_UPDATE_MAX_ITEMS} changes per request")
+    if len({c.id for c in changes}) != len(changes):
+        raise HTTPException(status_code=400, detail="Each task may appear only once")
+    for c in changes:
+        start, end = parse_day(c.new_start_date), parse_day(c.new_end_date)
+        if start is None or end is None:
+            raise HTTPException(status_code=400, detail="new_start_date and new_end_date must be ISO dates")
+        if end < start:
+            raise HTTPException(status_code=400, detail=f"Task {c.id}: new_end_date is before new_start_date")
+    
+    now = datetime.now(timezone.utc).isoformat()
+    outcomes = await bulk_mutate(db.tasks, [
+        (c.id, {"$set": {"start_date": c.new_start_date, "end_date": c.new_end_date, "updated_at": now}}, c.version)
+        for c in changes
+    ], projection={"_id": 0, "id": 1, "project_id": 1})
+    applied, errors, projects = [], [], set()
+    for c, outcome in zip(changes, outcomes):
+        if outcome is None:
+            errors.append({"id": c.id, "status": 404, "detail": "Task not found"})
+        elif isinstance(outcome, VersionConflict):
+            errors.append({"id": c.id, "status": 412, "detail": "Task was modified by another request",
+                           "current_version": outcome.current_version})
+        else:
+            applied.append(c.id)
+            projects.add(outcome['project_id'])
     
-    for resource in resources:
-        if resource.get('utilization', 0) > 100:
-            conflicts.append({
-                "resource_id": resource['id'],
-                "resource_name": resource['name'],
-                "type": "over_allocation",
-                "utilization": resource.get('utilization', 0),
-                "allocated_projects": resource.get('allocated_projects', [])
-            })
+    schedule_warnings = {}
+    for pid in projects:
+        try:
+            await schedule_service.graph(pid, refresh=True)
+        except ScheduleError as e:
+            schedule_warnings[pid] = str(e)
+    if applied:
+        dashboard_snapshot.invalidate("tasks")
     
-    return conflicts
+    return {"applied": applied, "errors": errors, "schedule_warnings": schedule_warnings}
 
 # ================= BUDGET ROUTES =================
 @api_router.get("/budget")
-async def get_budget_entries(project_id: Optional[str] = None, fiscal_year: Optional[str] = None):
+async def get_budget_entries(request: Request, response: Response, project_id: Optional[str] = None, fiscal_year: Optional[str] = None,
+                             page: Dict = Depends(page_params),
+                             projection: Dict = Depends(projection_params("budget"))):
     query = {}
     if project_id:
         query["project_id"] = project_id
     if fiscal_year:
         query["fiscal_year"] = fiscal_year
-    entries = await db.budget.find(query, {"_id": 0}).to_list(1000)
-    return entries
+    return await paginate(db.budget, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.post("/budget")
 async def create_budget_entry(budget_data: BudgetCreate, current_user: Dict = Depends(get_current_user)):
@@ -902,29 +1496,32 @@ async def create_budget_entry(budget_data: BudgetCreate, current_user: Dict = De
     entry_dict['created_at'] = entry_dict['created_at'].isoformat()
     await db.budget.insert_one(entry_dict)
     entry_dict.pop('_id', None)
+    await budget_rollups.entry_changed(None, entry_dict)
+    project_hierarchy.invalidate()
+    dashboard_snapshot.invalidate("budget")
     return entry_dict
 
+async def roll_up_entry(entry_id: str, update, update_data: Dict, request: Request, response: Response) -> Dict:
+    # Write a budget entry and move its amounts between roll-ups if any of them changed
+    rolls_up = any(field in update_data for field in BUDGET_ROLLUP_INPUTS)
+    before = await db.budget.find_one({"id": entry_id}, BUDGET_ROLLUP_FIELDS) if rolls_up else None
+    entry = await mutate_entity(db.budget, entry_id, update, request, response, "Budget entry")
+    if before:
+        await budget_rollups.entry_changed(before, entry)
+        project_hierarchy.invalidate()
+        dashboard_snapshot.invalidate("budget")
+    return entry
+
 @api_router.put("/budget/{entry_id}")
-async def update_budget_entry(entry_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
-    # Calculate variance and check for overrun
-    entry = await db.budget.find_one({"id": entry_id}, {"_id": 0})
-    if entry:
-        planned = entry.get('amount_planned', 0)
-        actual = update_data.get('amount_actual', entry.get('amount_actual', 0))
-        update_data['variance'] = planned - actual
-        update_data['is_overrun'] = actual > planned
-        
-        if update_data['is_overrun'] and not entry.get('overrun_alert_sent'):
-            update_data['overrun_alert_sent'] = True
-            # In real app, trigger alert notification
-    
-    result = await db.budget.update_one({"id": entry_id}, {"$set": update_data})
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Budget entry not found")
-    return await db.budget.find_one({"id": entry_id}, {"_id": 0})
+async def update_budget_entry(entry_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    update_data = clean_update(update_data)
+    # Variance and overrun flags are derived from the merged document in the same write
+    derived = [{"$set": budget_variance_fields()}] if 'amount_planned' in update_data or 'amount_actual' in update_data else []
+    update = entity_update(update_data, derived)
+    return await roll_up_entry(entry_id, update, update_data, request, response)
 
 @api_router.post("/budget/{entry_id}/release")
-async def release_budget(entry_id: str, release_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def release_budget(entry_id: str, release_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     update_data = {
         "amount_released": release_data.get("amount", 0),
         "status": "released",
@@ -932,19 +1529,27 @@ async def release_budget(entry_id: str, release_data: Dict[str, Any], current_us
         "approved_at": datetime.now(timezone.utc).isoformat(),
         "release_stage": release_data.get("stage", "initial")
     }
-    result = await db.budget.update_one({"id": entry_id}, {"$set": update_data})
-    return await db.budget.find_one({"id": entry_id}, {"_id": 0})
+    return await roll_up_entry(entry_id, {"$set": update_data}, update_data, request, response)
+
+@api_router.get("/budget/rollups")
+async def get_budget_rollups(project_id: Optional[str] = None, program_id: Optional[str] = None,
+                             fiscal_year: Optional[str] = None):
+    """Precomputed budget totals by fiscal year and quarter, per project (default) or per program."""
+    if program_id:
+        return await budget_rollups.breakdown("program", program_id, fiscal_year)
+    return await budget_rollups.breakdown("project", project_id, fiscal_year)
 
 # ================= RISKS ROUTES =================
 @api_router.get("/risks")
-async def get_risks(project_id: Optional[str] = None, level: Optional[str] = None):
+async def get_risks(request: Request, response: Response, project_id: Optional[str] = None, level: Optional[str] = None,
+                    page: Dict = Depends(page_params),
+                    projection: Dict = Depends(projection_params("risks"))):
     query = {}
     if project_id:
         query["project_id"] = project_id
     if level:
         query["level"] = level
-    risks = await db.risks.find(query, {"_id": 0}).to_list(1000)
-    return risks
+    return await paginate(db.risks, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.post("/risks")
 async def create_risk(risk_data: RiskCreate, current_user: Dict = Depends(get_current_user)):
@@ -963,51 +1568,45 @@ async def create_risk(risk_data: RiskCreate, current_user: Dict = Depends(get_cu
     risk_dict['updated_at'] = risk_dict['updated_at'].isoformat()
     await db.risks.insert_one(risk_dict)
     risk_dict.pop('_id', None)
+    dashboard_snapshot.invalidate("risks")
     return risk_dict
 
 @api_router.put("/risks/{risk_id}")
-async def update_risk(risk_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def update_risk(risk_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    update_data = clean_update(update_data)
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    # Re-score against whichever of probability/impact wasn't sent
+    derived = []
     if 'probability' in update_data or 'impact' in update_data:
-        current = await db.risks.find_one({"id": risk_id}, {"_id": 0})
-        prob = update_data.get('probability', current.get('probability', 1))
-        imp = update_data.get('impact', current.get('impact', 1))
-        update_data['risk_score'] = prob * imp
-        if update_data['risk_score'] >= 15:
-            update_data['level'] = 'critical'
-        elif update_data['risk_score'] >= 10:
-            update_data['level'] = 'high'
-        elif update_data['risk_score'] >= 5:
-            update_data['level'] = 'medium'
-        else:
-            update_data['level'] = 'low'
+        derived = [{"$set": {"risk_score": {"$multiply": [{"$ifNull": ["$probability", 1]}, {"$ifNull": ["$impact", 1]}]}}},
+                   {"$set": {"level": risk_level_expr("$risk_score")}}]
+    update = entity_update(update_data, derived)
     
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-    result = await db.risks.update_one({"id": risk_id}, {"$set": update_data})
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Risk not found")
-    return await db.risks.find_one({"id": risk_id}, {"_id": 0})
+    risk = await mutate_entity(db.risks, risk_id, update, request, response, "Risk")
+    dashboard_snapshot.invalidate("risks")
+    return risk
 
 @api_router.post("/risks/{risk_id}/escalate")
-async def escalate_risk(risk_id: str, escalation: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def escalate_risk(risk_id: str, escalation: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     update_data = {
         "escalation_level": escalation.get("level", 1),
         "escalated_to": escalation.get("escalated_to"),
         "escalation_reason": escalation.get("reason", ""),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    result = await db.risks.update_one({"id": risk_id}, {"$set": update_data})
-    return await db.risks.find_one({"id": risk_id}, {"_id": 0})
+    return await mutate_entity(db.risks, risk_id, {"$set": update_data}, request, response, "Risk")
 
 # ================= ISSUES ROUTES =================
 @api_router.get("/issues")
-async def get_issues(project_id: Optional[str] = None, status: Optional[str] = None):
+async def get_issues(request: Request, response: Response, project_id: Optional[str] = None, status: Optional[str] = None,
+                     page: Dict = Depends(page_params),
+                     projection: Dict = Depends(projection_params("issues"))):
     query = {}
     if project_id:
         query["project_id"] = project_id
     if status:
         query["status"] = status
-    issues = await db.issues.find(query, {"_id": 0}).to_list(1000)
-    return issues
+    return await paginate(db.issues, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.post("/issues")
 async def create_issue(issue_data: IssueCreate, current_user: Dict = Depends(get_current_user)):
@@ -1020,33 +1619,33 @@ async def create_issue(issue_data: IssueCreate, current_user: Dict = Depends(get
     return issue_dict
 
 @api_router.put("/issues/{issue_id}")
-async def update_issue(issue_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def update_issue(issue_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    update_data = clean_update(update_data)
     if update_data.get('status') == 'resolved':
         update_data['resolved_at'] = datetime.now(timezone.utc).isoformat()
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-    result = await db.issues.update_one({"id": issue_id}, {"$set": update_data})
-    return await db.issues.find_one({"id": issue_id}, {"_id": 0})
+    return await mutate_entity(db.issues, issue_id, {"$set": update_data}, request, response, "Issue")
 
 @api_router.post("/issues/{issue_id}/escalate")
-async def escalate_issue(issue_id: str, escalation: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def escalate_issue(issue_id: str, escalation: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     update_data = {
         "escalation_level": escalation.get("level", 1),
         "escalated_to": escalation.get("escalated_to"),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    result = await db.issues.update_one({"id": issue_id}, {"$set": update_data})
-    return await db.issues.find_one({"id": issue_id}, {"_id": 0})
+    return await mutate_entity(db.issues, issue_id, {"$set": update_data}, request, response, "Issue")
 
 # ================= VENDORS ROUTES =================
 @api_router.get("/vendors")
-async def get_vendors(status: Optional[str] = None, category: Optional[str] = None):
+async def get_vendors(request: Request, response: Response, status: Optional[str] = None, category: Optional[str] = None,
+                      page: Dict = Depends(page_params),
+                      projection: Dict = Depends(projection_params("vendors"))):
     query = {}
     if status:
         query["status"] = status
     if category:
         query["category"] = category
-    vendors = await db.vendors.find(query, {"_id": 0}).to_list(1000)
-    return vendors
+    return await paginate(db.vendors, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.post("/vendors")
 async def create_vendor(vendor_data: VendorCreate, current_user: Dict = Depends(get_current_user)):
@@ -1058,41 +1657,38 @@ async def create_vendor(vendor_data: VendorCreate, current_user: Dict = Depends(
     return vendor_dict
 
 @api_router.put("/vendors/{vendor_id}")
-async def update_vendor(vendor_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
-    result = await db.vendors.update_one({"id": vendor_id}, {"$set": update_data})
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Vendor not found")
-    return await db.vendors.find_one({"id": vendor_id}, {"_id": 0})
+async def update_vendor(vendor_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    update_data = clean_update(update_data)
+    return await mutate_entity(db.vendors, vendor_id, {"$set": update_data}, request, response, "Vendor")
 
 @api_router.post("/vendors/{vendor_id}/due-diligence")
-async def complete_due_diligence(vendor_id: str, diligence: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def complete_due_diligence(vendor_id: str, diligence: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     update_data = {
         "due_diligence_status": diligence.get("status", "completed"),
         "due_diligence_date": datetime.now(timezone.utc).isoformat()
     }
-    result = await db.vendors.update_one({"id": vendor_id}, {"$set": update_data})
-    return await db.vendors.find_one({"id": vendor_id}, {"_id": 0})
+    return await mutate_entity(db.vendors, vendor_id, {"$set": update_data}, request, response, "Vendor")
 
 @api_router.post("/vendors/{vendor_id}/blacklist")
-async def blacklist_vendor(vendor_id: str, reason: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def blacklist_vendor(vendor_id: str, reason: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     update_data = {
         "status": "blacklisted",
         "blacklist_reason": reason.get("reason", ""),
         "risk_flags": reason.get("flags", [])
     }
-    result = await db.vendors.update_one({"id": vendor_id}, {"$set": update_data})
-    return await db.vendors.find_one({"id": vendor_id}, {"_id": 0})
+    return await mutate_entity(db.vendors, vendor_id, {"$set": update_data}, request, response, "Vendor")
 
 # ================= CONTRACTS ROUTES =================
 @api_router.get("/contracts")
-async def get_contracts(vendor_id: Optional[str] = None, project_id: Optional[str] = None):
+async def get_contracts(request: Request, response: Response, vendor_id: Optional[str] = None, project_id: Optional[str] = None,
+                        page: Dict = Depends(page_params),
+                        projection: Dict = Depends(projection_params("contracts"))):
     query = {}
     if vendor_id:
         query["vendor_id"] = vendor_id
     if project_id:
         query["project_id"] = project_id
-    contracts = await db.contracts.find(query, {"_id": 0}).to_list(1000)
-    return contracts
+    return await paginate(db.contracts, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.post("/contracts")
 async def create_contract(contract_data: ContractCreate, current_user: Dict = Depends(get_current_user)):
@@ -1104,27 +1700,29 @@ async def create_contract(contract_data: ContractCreate, current_user: Dict = De
     # Update vendor contract count
     await db.vendors.update_one(
         {"id": contract_data.vendor_id},
-        {"$inc": {"contracts_active": 1, "total_value": contract_data.value}}
+        {"$inc": {"contracts_active": 1, "total_value": contract_data.value},
+         "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}}
     )
     
     contract_dict.pop('_id', None)
     return contract_dict
 
 @api_router.put("/contracts/{contract_id}")
-async def update_contract(contract_id: str, update_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
-    result = await db.contracts.update_one({"id": contract_id}, {"$set": update_data})
-    return await db.contracts.find_one({"id": contract_id}, {"_id": 0})
+async def update_contract(contract_id: str, update_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    update_data = clean_update(update_data)
+    return await mutate_entity(db.contracts, contract_id, {"$set": update_data}, request, response, "Contract")
 
 # ================= APPROVALS ROUTES =================
 @api_router.get("/approvals")
-async def get_approvals(status: Optional[str] = None, entity_type: Optional[str] = None):
+async def get_approvals(request: Request, response: Response, status: Optional[str] = None, entity_type: Optional[str] = None,
+                        page: Dict = Depends(page_params),
+                        projection: Dict = Depends(projection_params("approvals"))):
     query = {}
     if status:
         query["status"] = status
     if entity_type:
         query["entity_type"] = entity_type
-    approvals = await db.approvals.find(query, {"_id": 0}).to_list(1000)
-    return approvals
+    return await paginate(db.approvals, query, projection, page["limit"], page["after"], request, response)
 
 @api_router.post("/approvals")
 async def create_approval(approval_data: ApprovalCreate, current_user: Dict = Depends(get_current_user)):
@@ -1141,43 +1739,34 @@ async def create_approval(approval_data: ApprovalCreate, current_user: Dict = De
     approval_dict['updated_at'] = approval_dict['updated_at'].isoformat()
     await db.approvals.insert_one(approval_dict)
     approval_dict.pop('_id', None)
+    dashboard_snapshot.invalidate("approvals")
     return approval_dict
 
 @api_router.post("/approvals/{approval_id}/approve")
-async def approve_request(approval_id: str, approval_data: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
-    approval = await db.approvals.find_one({"id": approval_id}, {"_id": 0})
-    if not approval:
-        raise HTTPException(status_code=404, detail="Approval not found")
-    
-    # Add to approval chain
+async def approve_request(approval_id: str, approval_data: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
+    # Add to approval chain and advance (or close) the level in a single pipeline update,
+    # so two approvers at the same level can't both advance it from a stale read
     approval_entry = {
-        "level": approval['current_level'],
-        "approved_by": current_user['id'],
-        "approved_by_name": current_user.get('name', ''),
-        "approved_at": datetime.now(timezone.utc).isoformat(),
-        "comments": approval_data.get("comments", ""),
-        "digital_signature": f"SIG-{current_user['id'][:8]}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        "level": "$current_level",
+        "approved_by": {"$literal": current_user['id']},
+        "approved_by_name": {"$literal": current_user.get('name', '')},
+        "approved_at": {"$literal": datetime.now(timezone.utc).isoformat()},
+        "comments": {"$literal": approval_data.get("comments", "")},
+        "digital_signature": {"$literal": f"SIG-{current_user['id'][:8]}-{datetime.now().strftime('%Y%m%d%H%M%S')}"}
     }
-    
-    if approval['current_level'] >= approval['total_levels']:
-        update_data = {
-            "status": "approved",
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }
-    else:
-        update_data = {
-            "current_level": approval['current_level'] + 1,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }
-    
-    await db.approvals.update_one(
-        {"id": approval_id},
-        {"$set": update_data, "$push": {"approval_chain": approval_entry}}
-    )
-    return await db.approvals.find_one({"id": approval_id}, {"_id": 0})
+    final_level = {"$gte": ["$current_level", "$total_levels"]}
+    update = [{"$set": {
+        "approval_chain": {"$concatArrays": [{"$ifNull": ["$approval_chain", []]}, [approval_entry]]},
+        "status": {"$cond": [final_level, "approved", "$status"]},
+        "current_level": {"$cond": [final_level, "$current_level", {"$add": ["$current_level", 1]}]},
+        "updated_at": {"$literal": datetime.now(timezone.utc).isoformat()}
+    }}]
+    approval = await mutate_entity(db.approvals, approval_id, update, request, response, "Approval")
+    dashboard_snapshot.invalidate("approvals")
+    return approval
 
 @api_router.post("/approvals/{approval_id}/reject")
-async def reject_request(approval_id: str, rejection: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def reject_request(approval_id: str, rejection: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     rejection_entry = {
         "level": 0,
         "rejected_by": current_user['id'],
@@ -1185,15 +1774,16 @@ async def reject_request(approval_id: str, rejection: Dict[str, Any], current_us
         "reason": rejection.get("reason", "")
     }
     
-    result = await db.approvals.update_one(
-        {"id": approval_id},
-        {"$set": {"status": "rejected", "updated_at": datetime.now(timezone.utc).isoformat()},
-         "$push": {"approval_chain": rejection_entry}}
-    )
-    return await db.approvals.find_one({"id": approval_id}, {"_id": 0})
+    update = {
+        "$set": {"status": "rejected", "updated_at": datetime.now(timezone.utc).isoformat()},
+        "$push": {"approval_chain": rejection_entry}
+    }
+    approval = await mutate_entity(db.approvals, approval_id, update, request, response, "Approval")
+    dashboard_snapshot.invalidate("approvals")
+    return approval
 
 @api_router.post("/approvals/{approval_id}/delegate")
-async def delegate_approval(approval_id: str, delegation: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def delegate_approval(approval_id: str, delegation: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     delegate_entry = {
         "delegated_from": current_user['id'],
         "delegated_to": delegation.get("delegate_to"),
@@ -1201,15 +1791,14 @@ async def delegate_approval(approval_id: str, delegation: Dict[str, Any], curren
         "reason": delegation.get("reason", "")
     }
     
-    result = await db.approvals.update_one(
-        {"id": approval_id},
-        {"$set": {"updated_at": datetime.now(timezone.utc).isoformat()},
-         "$push": {"approval_chain": delegate_entry}}
-    )
-    return await db.approvals.find_one({"id": approval_id}, {"_id": 0})
+    update = {
+        "$set": {"updated_at": datetime.now(timezone.utc).isoformat()},
+        "$push": {"approval_chain": delegate_entry}
+    }
+    return await mutate_entity(db.approvals, approval_id, update, request, response, "Approval")
 
 @api_router.post("/approvals/{approval_id}/emergency-override")
-async def emergency_override(approval_id: str, override: Dict[str, Any], current_user: Dict = Depends(get_current_user)):
+async def emergency_override(approval_id: str, override: Dict[str, Any], request: Request, response: Response, current_user: Dict = Depends(get_current_user)):
     if current_user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Only admins can use emergency override")
     
@@ -1221,156 +1810,86 @@ async def emergency_override(approval_id: str, override: Dict[str, Any], current
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
-    result = await db.approvals.update_one({"id": approval_id}, {"$set": update_data})
-    return await db.approvals.find_one({"id": approval_id}, {"_id": 0})
+    approval = await mutate_entity(db.approvals, approval_id, {"$set": update_data}, request, response, "Approval")
+    dashboard_snapshot.invalidate("approvals")
+    return approval
 
 # ================= DASHBOARD ROUTES =================
 @api_router.get("/dashboard/stats")
-async def get_dashboard_stats():
-    programs_count = await db.programs.count_documents({})
-    projects_count = await db.projects.count_documents({})
-    tasks_count = await db.tasks.count_documents({})
-    resources_count = await db.resources.count_documents({})
-    
-    projects = await db.projects.find({}, {"_id": 0, "status": 1, "budget_allocated": 1, "budget_spent": 1, "health_score": 1, "budget_forecast": 1}).to_list(1000)
-    status_breakdown = {}
-    total_budget = 0
-    total_spent = 0
-    total_forecast = 0
-    avg_health = 0
-    
-    for p in projects:
-        status = p.get('status', 'planning')
-        status_breakdown[status] = status_breakdown.get(status, 0) + 1
-        total_budget += p.get('budget_allocated', 0)
-        total_spent += p.get('budget_spent', 0)
-        total_forecast += p.get('budget_forecast', 0)
-        avg_health += p.get('health_score', 100)
-    
-    if projects:
-        avg_health = avg_health // len(projects)
-    
-    risks = await db.risks.find({}, {"_id": 0, "level": 1}).to_list(1000)
-    risk_breakdown = {}
-    for r in risks:
-        level = r.get('level', 'low')
-        risk_breakdown[level] = risk_breakdown.get(level, 0) + 1
-    
-    tasks = await db.tasks.find({}, {"_id": 0, "status": 1}).to_list(1000)
-    task_breakdown = {}
-    for t in tasks:
-        status = t.get('status', 'todo')
-        task_breakdown[status] = task_breakdown.get(status, 0) + 1
-    
-    pending_approvals = await db.approvals.count_documents({"status": "pending"})
-    
-    return {
-        "counts": {
-            "programs": programs_count,
-            "projects": projects_count,
-            "tasks": tasks_count,
-            "resources": resources_count,
-            "pending_approvals": pending_approvals
-        },
-        "projects": {
-            "status_breakdown": status_breakdown,
-            "total_budget": total_budget,
-            "total_spent": total_spent,
-            "total_forecast": total_forecast,
-            "budget_utilization": round((total_spent / total_budget * 100) if total_budget > 0 else 0, 1),
-            "avg_health_score": avg_health
-        },
-        "risks": risk_breakdown,
-        "tasks": task_breakdown
-    }
+async def get_dashboard_stats(request: Request, response: Response):
+    snapshot = await dashboard_snapshot.get()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "Server-Timing": server_timing(snapshot.timings)}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return json_response(snapshot.payload(), response)
+
+@api_router.get("/dashboard/snapshot-stats")
+async def get_dashboard_snapshot_stats(current_user: Dict = Depends(get_admin_user)):
+    return dashboard_snapshot.stats_summary()
 
 # ================= EXPORT ROUTES =================
-@api_router.get("/export/projects")
-async def export_projects(format: str = "csv"):
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    
+# Exports stream straight from the cursor; no row cap and constant memory.
+# format: csv | json | ndjson | parquet | arrow (the last two need pyarrow)
+# nested: struct keeps known embedded arrays as typed struct columns, json flattens them to text
+EXPORT_MEDIA_TYPES = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+def export_response(collection, query: Dict, model, name: str, format: str, nested: str = "struct"):
+    if format in COLUMNAR_FORMATS and not columnar_available():
+        raise HTTPException(status_code=400, detail=f"{format} export requires pyarrow on the server")
+    if nested not in ("struct", "json"):
+        raise HTTPException(status_code=400, detail="nested must be 'struct' or 'json'")
+    cursor = export_cursor(collection, query)
     if format == "csv":
-        output = io.StringIO()
-        if projects:
-            writer = csv.DictWriter(output, fieldnames=projects[0].keys())
-            writer.writeheader()
-            writer.writerows(projects)
-        
-        output.seek(0)
-        return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=projects.csv"}
-        )
+        body = stream_csv(cursor, schema_fields(model))
+    elif format == "ndjson":
+        body = stream_ndjson(cursor)
+    elif format in COLUMNAR_FORMATS:
+        body = stream_columnar(cursor, model, format, nested)
     else:
-        return projects
+        return StreamingResponse(stream_json_array(cursor), media_type="application/json")
+    media_type, extension = EXPORT_MEDIA_TYPES[format]
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={name}.{extension}"}
+    )
+
+@api_router.get("/export/projects")
+async def export_projects(format: str = "csv", nested: str = "struct"):
+    return export_response(db.projects, {}, ProjectBase, "projects", format, nested)
 
 @api_router.get("/export/tasks")
-async def export_tasks(project_id: Optional[str] = None, format: str = "csv"):
+async def export_tasks(project_id: Optional[str] = None, format: str = "csv", nested: str = "struct"):
     query = {"project_id": project_id} if project_id else {}
-    tasks = await db.tasks.find(query, {"_id": 0}).to_list(1000)
-    
-    if format == "csv":
-        output = io.StringIO()
-        if tasks:
-            writer = csv.DictWriter(output, fieldnames=tasks[0].keys())
-            writer.writeheader()
-            writer.writerows(tasks)
-        
-        output.seek(0)
-        return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=tasks.csv"}
-        )
-    else:
-        return tasks
+    return export_response(db.tasks, query, TaskBase, "tasks", format, nested)
 
 @api_router.get("/export/budget")
-async def export_budget(project_id: Optional[str] = None, format: str = "csv"):
+async def export_budget(project_id: Optional[str] = None, format: str = "csv", nested: str = "struct"):
     query = {"project_id": project_id} if project_id else {}
-    budget = await db.budget.find(query, {"_id": 0}).to_list(1000)
-    
-    if format == "csv":
-        output = io.StringIO()
-        if budget:
-            writer = csv.DictWriter(output, fieldnames=budget[0].keys())
-            writer.writeheader()
-            writer.writerows(budget)
-        
-        output.seek(0)
-        return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=budget.csv"}
-        )
-    else:
-        return budget
+    return export_response(db.budget, query, BudgetEntryBase, "budget", format, nested)
 
 @api_router.get("/export/risks")
-async def export_risks(project_id: Optional[str] = None, format: str = "csv"):
+async def export_risks(project_id: Optional[str] = None, format: str = "csv", nested: str = "struct"):
     query = {"project_id": project_id} if project_id else {}
-    risks = await db.risks.find(query, {"_id": 0}).to_list(1000)
-    
-    if format == "csv":
-        output = io.StringIO()
-        if risks:
-            writer = csv.DictWriter(output, fieldnames=risks[0].keys())
-            writer.writeheader()
-            writer.writerows(risks)
-        
-        output.seek(0)
-        return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=risks.csv"}
-        )
-    else:
-        return risks
+    return export_response(db.risks, query, RiskBase, "risks", format, nested)
 
 # ================= SEED DATA ROUTE =================
 @api_router.post("/seed")
-async def seed_data():
+async def seed_data(scale: Optional[int] = Query(None, ge=1, description="Generate this many synthetic programs"),
+                    projects: int = Query(10, ge=1, le=1000), tasks: int = Query(100, ge=1, le=100000),
+                    seed: int = 42, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    if scale is not None:
+        if credentials is None:
+            raise HTTPException(status_code=403, detail="Not authenticated")
+        await get_admin_user(await get_current_user(credentials))
+        return await seed_synthetic(scale, projects, tasks, seed)
+
     # Clear existing data
     await db.programs.delete_many({})
     await db.projects.delete_many({})
@@ -1385,6 +1904,12 @@ async def seed_data():
     
     # Force delete existing specific users to ensure password reset
     await db.users.delete_many({"email": {"$in": ["admin@defense.gov", "manager@defense.gov", "user@defense.gov"]}})
+    invalidate_principal()
+
+    # Hash demo passwords concurrently on the password pool
+    admin_hash, manager_hash, user_hash = await asyncio.gather(
+        hash_password("admin123"), hash_password("password123"), hash_password("password123")
+    )
 
     # Create fresh admin user (Always)
     print("Creating fresh admin user...")
@@ -1397,18 +1922,17 @@ async def seed_data():
         "department": "Command Operations",
         "rank": "Colonel",
         "can_delegate": True,
-        "password_hash": hash_password("admin123"),
+        "password_hash": admin_hash,
         "created_at": datetime.now(timezone.utc).isoformat()
     })
     
     # Create additional users (Always)
     users_to_create = [
-        {"id": "user-mgr-001", "email": "manager@defense.gov", "name": "Maj. Priya Singh", "role": "manager", "clearance_level": "secret", "department": "Engineering", "rank": "Major"},
-        {"id": "user-usr-001", "email": "user@defense.gov", "name": "Capt. Amit Sharma", "role": "user", "clearance_level": "confidential", "department": "Operations", "rank": "Captain"}
+        {"id": "user-mgr-001", "email": "manager@defense.gov", "name": "Maj. Priya Singh", "role": "manager", "clearance_level": "secret", "department": "Engineering", "rank": "Major", "password_hash": manager_hash},
+        {"id": "user-usr-001", "email": "user@defense.gov", "name": "Capt. Amit Sharma", "role": "user", "clearance_level": "confidential", "department": "Operations", "rank": "Captain", "password_hash": user_hash}
     ]
     
     for user in users_to_create:
-        user["password_hash"] = hash_password("password123")
         user["created_at"] = datetime.now(timezone.utc).isoformat()
         await db.users.insert_one(user)
     
@@ -1643,7 +2167,7 @@ async def seed_data():
             "estimated_hours": 200,
             "actual_hours": 85,
             "progress": 42,
-            "assigned_to": ["user-mgr-001"],
+            "assigned_to": ["user-mgr-001", "res-001"],
             "assigned_vendor": "vendor-001",
             "clearance_level": "confidential",
             "is_critical_path": True,
@@ -1665,6 +2189,7 @@ async def seed_data():
             "estimated_hours": 640,
             "actual_hours": 280,
             "progress": 44,
+            "assigned_to": ["res-003"],
             "clearance_level": "secret",
             "is_critical_path": False,
             "float_days": 15,
@@ -1704,6 +2229,7 @@ async def seed_data():
             "estimated_hours": 480,
             "actual_hours": 120,
             "progress": 25,
+            "assigned_to": ["res-004"],
             "clearance_level": "top_secret",
             "dependencies": [{"task_id": "task-004", "type": "finish_to_start"}],
             "created_at": now,
@@ -1757,6 +2283,7 @@ async def seed_data():
             "estimated_hours": 400,
             "actual_hours": 180,
             "progress": 45,
+            "assigned_to": ["res-002", "res-004"],
             "clearance_level": "top_secret",
             "created_at": now,
             "updated_at": now
@@ -2031,6 +2558,76 @@ async def seed_data():
             "quarter": "Q3",
             "status": "approved",
             "created_at": now
+        },
+        {
+            "id": "budget-004",
+            "project_id": "proj-001",
+            "category": "OPEX",
+            "sub_category": "Program Management",
+            "description": "Program office, travel and site surveys",
+            "amount_planned": 1200000000,
+            "amount_actual": 300000000,
+            "amount_forecast": 1020000000,
+            "fiscal_year": "2024",
+            "quarter": "Q1",
+            "status": "approved",
+            "created_at": now
+        },
+        {
+            "id": "budget-005",
+            "project_id": "proj-002",
+            "category": "OPEX",
+            "sub_category": "Licenses",
+            "description": "Platform software licenses",
+            "amount_planned": 500000000,
+            "amount_actual": 220000000,
+            "amount_forecast": 480000000,
+            "fiscal_year": "2024",
+            "quarter": "Q2",
+            "status": "approved",
+            "created_at": now
+        },
+        {
+            "id": "budget-006",
+            "project_id": "proj-003",
+            "category": "CAPEX",
+            "sub_category": "Equipment",
+            "description": "EMP-shielded transformers and switchgear",
+            "amount_planned": 2000000000,
+            "amount_actual": 1280000000,
+            "amount_forecast": 1900000000,
+            "fiscal_year": "2024",
+            "quarter": "Q2",
+            "status": "released",
+            "created_at": now
+        },
+        {
+            "id": "budget-007",
+            "project_id": "proj-004",
+            "category": "OPEX",
+            "sub_category": "Research",
+            "description": "Model development and data labelling",
+            "amount_planned": 900000000,
+            "amount_actual": 450000000,
+            "amount_forecast": 880000000,
+            "fiscal_year": "2024",
+            "quarter": "Q3",
+            "status": "approved",
+            "created_at": now
+        },
+        {
+            "id": "budget-008",
+            "project_id": "proj-005",
+            "category": "CAPEX",
+            "sub_category": "Infrastructure",
+            "description": "Secure communications hardware",
+            "amount_planned": 1200000000,
+            "amount_actual": 720000000,
+            "amount_forecast": 1150000000,
+            "fiscal_year": "2024",
+            "quarter": "Q3",
+            "status": "approved",
+            "created_at": now
         }
     ]
     
@@ -2115,6 +2712,12 @@ async def seed_data():
     await db.budget.insert_many(budget_entries)
     await db.approvals.insert_many(approvals)
     await db.issues.insert_many(issues)
+    await resource_utilization.reconcile()
+    await budget_rollups.rebuild()
+    # Only once everything is in place, so no rebuild publishes a half-seeded snapshot
+    project_hierarchy.invalidate()
+    schedule_service.invalidate()
+    dashboard_snapshot.invalidate()
     
     return {"message": "Demo data seeded successfully", "counts": {
         "programs": len(programs),
@@ -2128,6 +2731,67 @@ async def seed_data():
         "issues": len(issues)
     }}
 
+async def seed_synthetic(programs: int, projects: int, tasks: int, seed: int) -> Dict:
+    if programs * projects * tasks > SYNTHETIC_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"At most {SYNTHETIC_MAX_TASKS} tasks per request; use synthetic.py for more")
+    started = time.perf_counter()
+    counts = await populate_synthetic(db, programs, projects, tasks, seed=seed,
+                                      utilization=resource_utilization, rollups=budget_rollups)
+    project_hierarchy.invalidate()
+    schedule_service.invalidate()
+    dashboard_snapshot.invalidate()
+    return {"message": "Synthetic data generated", "seed": seed, "counts": counts,
+            "elapsed_seconds": round(time.perf_counter() - started, 2)}
+
+# ================= ADMIN ROUTES =================
+@api_router.get("/admin/hasher-stats")
+async def get_hasher_stats(current_user: Dict = Depends(get_admin_user)):
+    return hasher.stats()
+
+@api_router.get("/admin/principal-cache-stats")
+async def get_principal_cache_stats(current_user: Dict = Depends(get_admin_user)):
+    return principal_cache.stats()
+
+@api_router.get("/admin/indexes")
+async def get_index_report(current_user: Dict = Depends(get_admin_user)):
+    meta = await db.schema_meta.find_one({"_id": "indexes"}, {"_id": 0})
+    return {
+        "declared_version": INDEX_VERSION,
+        "applied_version": meta.get("version") if meta else None,
+        "collections": await index_report(db)
+    }
+
+@api_router.get("/metrics", include_in_schema=False)
+async def get_metrics(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Prometheus exposition of per-route and per-collection latency."""
+    if not metrics_authorized(credentials.credentials if credentials else None):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(collection: Optional[str] = None, route: Optional[str] = None,
+                           collscan: Optional[bool] = None, limit: int = Query(100, ge=1, le=1000),
+                           current_user: Dict = Depends(get_admin_user)):
+    """Most recent slow queries first; ``collscan=true`` keeps only explained collection scans."""
+    return {
+        **slow_query_log.stats(),
+        "entries": await slow_query_log.recent(collection, route, collscan, limit),
+    }
+
+@api_router.post("/admin/budget/rebuild")
+async def rebuild_budget_rollups(current_user: Dict = Depends(get_admin_user)):
+    """Recompute every budget roll-up from the budget entries."""
+    result = await budget_rollups.rebuild()
+    project_hierarchy.invalidate()
+    dashboard_snapshot.invalidate("budget")
+    return result
+
+@api_router.post("/admin/resources/reconcile")
+async def reconcile_resources(current_user: Dict = Depends(get_admin_user)):
+    """Recompute every resource's allocation from its tasks now, instead of waiting for the next pass."""
+    result = await resource_utilization.reconcile()
+    return {**resource_utilization.stats(), "result": result}
+
 # Health check
 @api_router.get("/health")
 async def health_check():
@@ -2142,8 +2806,14 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
+# Added last so it wraps everything, streamed exports included
+app.add_middleware(CompressionMiddleware)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from caching import TTLCache
+from metrics import current_route
+
+logger = logging.getLogger(__name__)
+
+# Slow query log settings
+SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.25))
+# How long a query shape's plan is reused before it may be explained again
+SLOW_QUERY_PLAN_TTL_SECONDS = float(os.environ.get('SLOW_QUERY_PLAN_TTL_SECONDS', 600))
+SLOW_QUERY_LOG_SIZE_MB = int(os.environ.get('SLOW_QUERY_LOG_SIZE_MB', 16))
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+EXPLAINABLE_COMMANDS = ("find", "aggregate", "count", "distinct", "findAndModify", "update", "delete")
+MONITORED_COMMANDS = EXPLAINABLE_COMMANDS + ("getMore",)
+
+# Driver and session fields that explain rejects or that don't affect the plan
+_SESSION_FIELDS = ("lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern")
+_MAX_TEXT = 2000
+
+def command_filter(command_name: str, command) -> Tuple[Any, Any]:
+    """(filter, sort) of a command, wherever that command keeps them."""
+    if command_name in ("find", "findAndModify"):
+        return command.get("filter", command.get("query")), command.get("sort")
+    if command_name in ("count", "distinct"):
+        return command.get("query"), None
+    if command_name == "aggregate":
+        return command.get("pipeline"), None
+    if command_name in ("update", "delete"):
+        statements = command.get(f"{command_name}s") or [{}]
+        return statements[0].get("q"), None
+    return None, None
+
+def query_shape(value: Any) -> Any:
+    """The filter with every literal replaced by 1, so equivalent queries group together."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(value[0])] if value else []
+    return 1
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = json_util.dumps(value)
+    return text if len(text) <= _MAX_TEXT else text[:_MAX_TEXT] + "..."
+
+def explain_command(command_name: str, command) -> Dict:
+    explained = {key: value for key, value in command.items()
+                 if not key.startswith("$") and key not in _SESSION_FIELDS}
+    if command_name in ("update", "delete"):
+        # explain takes a single statement
+        explained[f"{command_name}s"] = explained[f"{command_name}s"][:1]
+    return explained
+
+def _find_key(document: Any, key: str) -> Any:
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+def _stages(plan: Any, stages: List[str], indexes: List[str]):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        if "indexName" in plan:
+            indexes.append(plan["indexName"])
+        for child in plan.values():
+            _stages(child, stages, indexes)
+    elif isinstance(plan, list):
+        for child in plan:
+            _stages(child, stages, indexes)
+
+def plan_summary(explain: Dict) -> Dict[str, Any]:
+    """Winning plan stages and indexes from an explain result, flagging collection scans."""
+    winning = _find_key(explain, "winningPlan")
+    stages: List[str] = []
+    indexes: List[str] = []
+    _stages(winning, stages, indexes)
+    return {"stages": stages, "indexes": sorted(set(indexes)), "collscan": "COLLSCAN" in stages}
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Command listener that logs queries slower than ``threshold_ms`` to a capped collection.
+
+    Listener callbacks run on Motor's executor threads, so they only hand
+    entries to the event loop; explain() and the insert happen in a
+    background task. A sample of each query shape is explained, and its plan
+    is reused for later entries with the same shape.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE, enabled: bool = SLOW_QUERY_LOG_ENABLED):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.db = None
+        self._pending: Dict[Tuple, Tuple] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._plans = TTLCache(maxsize=1024, ttl=SLOW_QUERY_PLAN_TTL_SECONDS, name="slow_query_plans")
+        self.recorded = 0
+        self.explained = 0
+        self.dropped = 0
+
+    async def start(self, db):
+        if not self.enabled:
+            return
+        self.db = db
+        try:
+            await db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_LOG_SIZE_MB * 1024 * 1024)
+        except CollectionInvalid:
+            pass  # already there
+        except PyMongoError as e:
+            logger.warning("Could not create capped %s collection: %s", SLOW_QUERY_COLLECTION, e)
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=1000)
+        self._task = asyncio.create_task(self._drain())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._loop = None
+
+    # ---- listener callbacks (driver threads) ----
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        if self._loop is None or event.command_name not in MONITORED_COMMANDS:
+            return
+        name = event.command_name
+        collection = event.command.get("collection") if name == "getMore" else event.command.get(name)
+        if collection == SLOW_QUERY_COLLECTION:
+            return
+        self._pending[self._key(event)] = (event.database_name, collection, event.command, current_route())
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event, error=str(event.failure))
+
+    def _finished(self, event, error: Optional[str] = None):
+        pending = self._pending.pop(self._key(event), None)
+        duration_ms = event.duration_micros / 1000
+        if pending is None or duration_ms < self.threshold_ms:
+            return
+        database, collection, command, route = pending
+        query, sort = command_filter(event.command_name, command)
+        entry = {
+            "id": str(uuid.uuid4()),
+            "at": datetime.now(timezone.utc),
+            "duration_ms": round(duration_ms, 2),
+            "database": database,
+            "collection": collection if isinstance(collection, str) else None,
+            "command": event.command_name,
+            "route": route,
+            "filter": _text(query),
+            "sort": _text(sort),
+            "shape": _text(query_shape(query)),
+            "plan": None,
+            "error": error,
+        }
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, entry, command)
+        except RuntimeError:
+            pass  # loop already closed
+
+    # ---- event loop side ----
+    def _enqueue(self, entry: Dict, command):
+        try:
+            self._queue.put_nowait((entry, command))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _drain(self):
+        while True:
+            entry, command = await self._queue.get()
+            try:
+                if entry["command"] in EXPLAINABLE_COMMANDS and entry["error"] is None:
+                    entry["plan"] = await self._plan(entry, command)
+                await self.db[SLOW_QUERY_COLLECTION].insert_one(entry)
+                self.recorded += 1
+                logger.warning("Slow query %.0fms %s.%s from %s filter=%s%s", entry["duration_ms"],
+                               entry["collection"], entry["command"], entry["route"] or "-", entry["filter"],
+                               " COLLSCAN" if entry["plan"] and entry["plan"]["collscan"] else "")
+            except Exception:
+                logger.exception("Could not record slow query")
+
+    async def _plan(self, entry: Dict, command) -> Optional[Dict]:
+        key = (entry["database"], entry["collection"], entry["command"], entry["shape"])
+        plan = self._plans.get(key)
+        if plan is not None or random.random() >= self.sample_rate:
+            return plan
+        try:
+            result = await self.db.client[entry["database"]].command(
+                {"explain": explain_command(entry["command"], command), "verbosity": "queryPlanner"})
+        except PyMongoError as e:
+            logger.info("explain failed for %s.%s: %s", entry["collection"], entry["command"], e)
+            return None
+        plan = plan_summary(result)
+        self._plans.set(key, plan)
+        self.explained += 1
+        return plan
+
+    async def recent(self, collection: Optional[str] = None, route: Optional[str] = None,
+                     collscan: Optional[bool] = None, limit: int = 100) -> List[Dict]:
+        if self.db is None:
+            return []
+        query: Dict[str, Any] = {}
+        if collection:
+            query["collection"] = collection
+        if route:
+            query["route"] = route
+        if collscan is not None:
+            query["plan.collscan"] = collscan
+        return await self.db[SLOW_QUERY_COLLECTION].find(query, {"_id": 0}).sort("$natural", -1).to_list(limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "threshold_ms": self.threshold_ms, "explain_sample_rate": self.sample_rate,
+                "recorded": self.recorded, "explained": self.explained, "dropped": self.dropped,
+                "plan_cache": self._plans.stats()}
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from allocation import INACTIVE_TASK_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Seconds between full reconciliation passes; 0 disables the background job
+RESOURCE_RECONCILE_INTERVAL_SECONDS = float(os.environ.get('RESOURCE_RECONCILE_INTERVAL_SECONDS', 3600))
+
+# Resource fields owned by the server, derived from task assignments
+DERIVED_RESOURCE_FIELDS = ("allocated_hours", "allocated_projects", "utilization", "burnout_risk")
+
+# Task fields that feed the derived fields; edits touching anything else skip the update
+ALLOCATION_INPUTS = ("assigned_to", "estimated_hours", "status", "project_id")
+ALLOCATION_FIELDS = {"_id": 0, "id": 1, "project_id": 1, "assigned_to": 1, "estimated_hours": 1, "status": 1}
+
+# (utilization above, burnout risk), checked in order
+BURNOUT_THRESHOLDS = ((100, "critical"), (85, "high"), (70, "medium"))
+
+# ================= DERIVATION =================
+# Each open task's estimated hours are shared equally by its assignees. The
+# Mongo expressions below and their Python twins must agree.
+
+def resource_utilization_fields() -> Dict:
+    capacity = {"$ifNull": ["$capacity_hours", 160]}
+    allocated = {"$ifNull": ["$allocated_hours", 0]}
+    return {"utilization": {"$cond": [
+        {"$gt": [capacity, 0]},
+        {"$toInt": {"$trunc": {"$multiply": [{"$divide": [allocated, capacity]}, 100]}}},
+        0,
+    ]}}
+
+def resource_burnout_fields() -> Dict:
+    return {"burnout_risk": {"$switch": {"branches": [
+        {"case": {"$gt": ["$utilization", threshold]}, "then": risk} for threshold, risk in BURNOUT_THRESHOLDS
+    ], "default": "low"}}}
+
+def utilization_of(allocated_hours: float, capacity_hours: float) -> int:
+    return int(allocated_hours / capacity_hours * 100) if capacity_hours > 0 else 0
+
+def burnout_of(utilization: int) -> str:
+    return next((risk for threshold, risk in BURNOUT_THRESHOLDS if utilization > threshold), "low")
+
+def task_shares(task: Optional[Dict]) -> Dict[str, Tuple[float, str]]:
+    """assignee -> (hours, project) that ``task`` contributes; empty once it's closed or gone."""
+    if not task or task.get("status") in INACTIVE_TASK_STATUSES:
+        return {}
+    assignees = task.get("assigned_to") or []
+    if not isinstance(assignees, list) or not assignees:
+        return {}
+    share = (task.get("estimated_hours") or 0) / len(assignees)
+    return {assignee: (share, task.get("project_id")) for assignee in assignees}
+
+def allocation_deltas(changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]
+                      ) -> Tuple[Dict[str, float], Dict[str, Set[str]], Set[Tuple[str, str]]]:
+    """Per-assignee hour deltas, projects gained, and (assignee, project) pairs that may have been lost."""
+    hours: Dict[str, float] = {}
+    gained: Dict[str, Set[str]] = {}
+    lost: Set[Tuple[str, str]] = set()
+    for before, after in changes:
+        old, new = task_shares(before), task_shares(after)
+        for assignee, (share, project_id) in old.items():
+            hours[assignee] = hours.get(assignee, 0.0) - share
+            if new.get(assignee, (0, None))[1] != project_id:
+                lost.add((assignee, project_id))
+        for assignee, (share, project_id) in new.items():
+            hours[assignee] = hours.get(assignee, 0.0) + share
+            if project_id and old.get(assignee, (0, None))[1] != project_id:
+                gained.setdefault(assignee, set()).add(project_id)
+    hours = {assignee: delta for assignee, delta in hours.items() if abs(delta) > 1e-9}
+    return hours, gained, lost
+
+def allocation_pipeline() -> List[Dict]:
+    """Allocated hours and projects per assignee, computed from scratch over open tasks."""
+    return [
+        {"$match": {"status": {"$nin": list(INACTIVE_TASK_STATUSES)}, "assigned_to.0": {"$exists": True}}},
+        {"$project": {"_id": 0, "project_id": 1, "assigned_to": 1,
+                      "share": {"$divide": [{"$ifNull": ["$estimated_hours", 0]}, {"$size": "$assigned_to"}]}}},
+        {"$unwind": "$assigned_to"},
+        {"$group": {"_id": "$assigned_to", "allocated_hours": {"$sum": "$share"},
+                    "allocated_projects": {"$addToSet": "$project_id"}}},
+    ]
+
+# ================= SERVICE =================
+class ResourceUtilization:
+    """Keeps each resource's allocated hours, projects, utilization and burnout risk in step with tasks.
+
+    Task writes apply deltas: one pipeline update per affected resource adds
+    the hour change and recomputes utilization and burnout risk in the same
+    write. Deltas can drift (direct DB edits, writes that failed halfway), so
+    a background job periodically recomputes everything with one
+    aggregation and corrects only the resources that are off.
+    """
+
+    def __init__(self, db, interval: float = RESOURCE_RECONCILE_INTERVAL_SECONDS):
+        self.db = db
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.last_reconciled_at: Optional[str] = None
+        self.last_reconcile: Optional[Dict[str, Any]] = None
+        self.delta_writes = 0
+
+    # ---------- incremental ----------
+    async def tasks_changed(self, changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]) -> int:
+        """Apply the effect of task (before, after) pairs; None stands for created / deleted."""
+        hours, gained, lost = allocation_deltas(changes)
+        if not hours and not gained and not lost:
+            return 0
+        now = datetime.now(timezone.utc).isoformat()
+        ops = []
+        for assignee in set(hours) | set(gained):
+            allocated = {"$add": [{"$ifNull": ["$allocated_hours", 0]}, hours.get(assignee, 0.0)]}
+            ops.append(UpdateOne({"id": assignee}, [
+                {"$set": {
+                    "allocated_hours": {"$max": [0, {"$round": [allocated, 2]}]},
+                    "allocated_projects": {"$setUnion": [{"$ifNull": ["$allocated_projects", []]},
+                                                         sorted(gained.get(assignee, ()))]},
+                    "updated_at": now,
+                }},
+                {"$set": resource_utilization_fields()},
+                {"$set": resource_burnout_fields()},
+            ]))
+        # A project is only dropped once none of the assignee's open tasks are in it
+        for assignee, project_id in lost:
+            remaining = await self.db.tasks.find_one({"project_id": project_id, "assigned_to": assignee,
+                                                      "status": {"$nin": list(INACTIVE_TASK_STATUSES)}}, {"_id": 1})
+            if remaining is None:
+                ops.append(UpdateOne({"id": assignee}, {"$pull": {"allocated_projects": project_id},
+                                                        "$set": {"updated_at": now}}))
+        if not ops:
+            return 0
+        # Assignees that aren't resources (user ids) match nothing
+        result = await self.db.resources.bulk_write(ops, ordered=False)
+        self.delta_writes += len(ops)
+        return result.modified_count
+
+    async def task_changed(self, before: Optional[Dict], after: Optional[Dict]) -> int:
+        return await self.tasks_changed([(before, after)])
+
+    # ---------- reconciliation ----------
+    async def reconcile(self) -> Dict[str, Any]:
+        """Recompute every resource from the tasks and fix the ones that drifted.
+
+        Resources are read before the tasks are aggregated, and each correction
+        only lands if the resource still holds the values read. A delta applied
+        in between is kept, and the next pass checks that resource again.
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            resources = await self.db.resources.find({}, {"_id": 0, "id": 1, "capacity_hours": 1, **{
+                field: 1 for field in DERIVED_RESOURCE_FIELDS}}).to_list(None)
+            derived = {row["_id"]: row for row in await self.db.tasks.aggregate(allocation_pipeline()).to_list(None)}
+            now = datetime.now(timezone.utc).isoformat()
+            ops = []
+            for resource in resources:
+                row = derived.get(resource["id"], {})
+                allocated = round(row.get("allocated_hours", 0.0), 2)
+                projects = sorted(p for p in row.get("allocated_projects", []) if p)
+                capacity = resource.get("capacity_hours")
+                # Null capacity counts as the default, as $ifNull does in resource_utilization_fields
+                utilization = utilization_of(allocated, 160 if capacity is None else capacity)
+                expected = {"allocated_hours": allocated, "allocated_projects": projects,
+                            "utilization": utilization, "burnout_risk": burnout_of(utilization)}
+                stored = {field: resource.get(field) for field in DERIVED_RESOURCE_FIELDS}
+                stored["allocated_projects"] = sorted(stored["allocated_projects"] or [])
+                if abs((stored["allocated_hours"] or 0) - allocated) > 0.01 or any(
+                        stored[field] != expected[field] for field in DERIVED_RESOURCE_FIELDS[1:]):
+                    unchanged = {field: resource.get(field) for field in ("allocated_hours", "allocated_projects")}
+                    ops.append(UpdateOne({"id": resource["id"], **unchanged}, {"$set": {**expected, "updated_at": now}}))
+            skipped = 0
+            if ops:
+                result = await self.db.resources.bulk_write(ops, ordered=False)
+                skipped = len(ops) - result.matched_count
+            self.last_reconciled_at = now
+            self.last_reconcile = {"resources": len(resources), "corrected": len(ops) - skipped, "skipped": skipped,
+                                   "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+            return self.last_reconcile
+
+    async def _run(self):
+        while True:
+            try:
+                result = await self.reconcile()
+                if result["corrected"]:
+                    logger.info("Resource utilization reconciled: %s", result)
+            except PyMongoError as e:
+                logger.warning("Resource utilization reconciliation failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"interval_seconds": self.interval, "last_reconciled_at": self.last_reconciled_at,
+                "last_reconcile": self.last_reconcile, "delta_writes": self.delta_writes}
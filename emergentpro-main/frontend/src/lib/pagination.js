@@ -0,0 +1,24 @@
+import axios from "axios";
+
+// Largest page the API serves (MAX_PAGE_SIZE on the backend)
+const PAGE_SIZE = 1000;
+
+// GET a keyset-paginated endpoint, following X-Next-Cursor until the last page.
+// Resolves to an axios-like { data } so callers can swap it in for axios.get.
+// `key` names the array to collect when pages are objects (e.g. "tasks" for gantt).
+export async function getAll(url, { key } = {}) {
+  let after = null;
+  let data = null;
+  do {
+    const res = await axios.get(url, { params: { limit: PAGE_SIZE, ...(after ? { after } : {}) } });
+    if (data === null) {
+      data = res.data;
+    } else if (key) {
+      data[key] = data[key].concat(res.data[key]);
+    } else {
+      data = data.concat(res.data);
+    }
+    after = res.headers["x-next-cursor"];
+  } while (after);
+  return { data };
+}
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API, useAuth } from "../App";
+import { getAll } from "../lib/pagination";
 import { Check, X, Clock, FileCheck, Plus } from "lucide-react";
 import { Button } from "../components/ui/button";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from "../components/ui/dialog";
@@ -18,7 +19,7 @@ export default function Approvals() {
 
   const fetchApprovals = async () => {
     try {
-      const res = await axios.get(`${API}/approvals`);
+      const res = await getAll(`${API}/approvals`);
       setApprovals(res.data);
     } catch (error) { toast.error("Failed to load approvals"); } 
     finally { setLoading(false); }
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import {
   IndianRupee,
   Plus,
@@ -66,8 +67,8 @@ export default function Budget() {
   const fetchData = async () => {
     try {
       const [budgetRes, projectsRes] = await Promise.all([
-        axios.get(`${API}/budget`),
-        axios.get(`${API}/projects`)
+        getAll(`${API}/budget`),
+        getAll(`${API}/projects`)
       ]);
       setBudgetEntries(budgetRes.data);
       setProjects(projectsRes.data);
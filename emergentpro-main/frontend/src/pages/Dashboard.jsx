@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import { 
   BarChart3, 
   TrendingUp, 
@@ -66,10 +67,10 @@ export default function Dashboard() {
     try {
       const [statsRes, programsRes, projectsRes, risksRes, approvalsRes] = await Promise.all([
         axios.get(`${API}/dashboard/stats`),
-        axios.get(`${API}/programs`),
-        axios.get(`${API}/projects`),
-        axios.get(`${API}/risks`),
-        axios.get(`${API}/approvals?status=pending`)
+        getAll(`${API}/programs`),
+        getAll(`${API}/projects`),
+        getAll(`${API}/risks`),
+        getAll(`${API}/approvals?status=pending`)
       ]);
       setStats(statsRes.data);
       setPrograms(programsRes.data);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import { Link } from "react-router-dom";
 import {
   Boxes,
@@ -57,8 +58,8 @@ export default function Programs() {
   const fetchData = async () => {
     try {
       const [programsRes, projectsRes] = await Promise.all([
-        axios.get(`${API}/programs`),
-        axios.get(`${API}/projects`)
+        getAll(`${API}/programs`),
+        getAll(`${API}/projects`)
       ]);
       setPrograms(programsRes.data);
       setProjects(projectsRes.data);
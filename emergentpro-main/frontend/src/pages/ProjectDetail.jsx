@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import { useParams, Link } from "react-router-dom";
 import {
   ArrowLeft,
@@ -41,10 +42,10 @@ export default function ProjectDetail() {
     try {
       const [projectRes, tasksRes, risksRes, budgetRes, ganttRes] = await Promise.all([
         axios.get(`${API}/projects/${id}`),
-        axios.get(`${API}/tasks?project_id=${id}`),
-        axios.get(`${API}/risks?project_id=${id}`),
-        axios.get(`${API}/budget?project_id=${id}`),
-        axios.get(`${API}/projects/${id}/gantt`)
+        getAll(`${API}/tasks?project_id=${id}`),
+        getAll(`${API}/risks?project_id=${id}`),
+        getAll(`${API}/budget?project_id=${id}`),
+        getAll(`${API}/projects/${id}/gantt`, { key: "tasks" })
       ]);
       setProject(projectRes.data);
       setTasks(tasksRes.data);
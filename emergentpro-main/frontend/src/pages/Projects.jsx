@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import { Link, useSearchParams } from "react-router-dom";
 import {
   FolderKanban,
@@ -80,8 +81,8 @@ export default function Projects() {
   const fetchData = async () => {
     try {
       const [projectsRes, programsRes] = await Promise.all([
-        axios.get(`${API}/projects`),
-        axios.get(`${API}/programs`)
+        getAll(`${API}/projects`),
+        getAll(`${API}/programs`)
       ]);
       setProjects(projectsRes.data);
       setPrograms(programsRes.data);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import {
   BarChart3,
   FileText,
@@ -64,10 +65,10 @@ export default function Reports() {
     try {
       const [statsRes, projectsRes, programsRes, risksRes, vendorsRes] = await Promise.all([
         axios.get(`${API}/dashboard/stats`),
-        axios.get(`${API}/projects`),
-        axios.get(`${API}/programs`),
-        axios.get(`${API}/risks`),
-        axios.get(`${API}/vendors`)
+        getAll(`${API}/projects`),
+        getAll(`${API}/programs`),
+        getAll(`${API}/risks`),
+        getAll(`${API}/vendors`)
       ]);
       setStats(statsRes.data);
       setProjects(projectsRes.data);
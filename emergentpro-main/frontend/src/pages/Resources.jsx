@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import {
   Users,
   Plus,
@@ -66,7 +67,7 @@ export default function Resources() {
   const fetchData = async () => {
     try {
       const [resourcesRes, conflictsRes] = await Promise.all([
-        axios.get(`${API}/resources`),
+        getAll(`${API}/resources`),
         axios.get(`${API}/resources/conflicts/check`)
       ]);
       setResources(resourcesRes.data);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import {
   AlertTriangle,
   Plus,
@@ -57,9 +58,9 @@ export default function Risks() {
   const fetchData = async () => {
     try {
       const [risksRes, issuesRes, projectsRes] = await Promise.all([
-        axios.get(`${API}/risks`),
-        axios.get(`${API}/issues`),
-        axios.get(`${API}/projects`)
+        getAll(`${API}/risks`),
+        getAll(`${API}/issues`),
+        getAll(`${API}/projects`)
       ]);
       setRisks(risksRes.data);
       setIssues(issuesRes.data);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import {
   ListTodo,
   Plus,
@@ -62,8 +63,8 @@ export default function Tasks() {
   const fetchData = async () => {
     try {
       const [tasksRes, projectsRes] = await Promise.all([
-        axios.get(`${API}/tasks`),
-        axios.get(`${API}/projects`)
+        getAll(`${API}/tasks`),
+        getAll(`${API}/projects`)
       ]);
       setTasks(tasksRes.data);
       setProjects(projectsRes.data);
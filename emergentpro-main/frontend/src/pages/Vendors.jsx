@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { API } from "../App";
+import { getAll } from "../lib/pagination";
 import {
   Building2,
   Plus,
@@ -64,8 +65,8 @@ export default function Vendors() {
   const fetchData = async () => {
     try {
       const [vendorsRes, contractsRes] = await Promise.all([
-        axios.get(`${API}/vendors`),
-        axios.get(`${API}/contracts`)
+        getAll(`${API}/vendors`),
+        getAll(`${API}/contracts`)
       ]);
       setVendors(vendorsRes.data);
       setContracts(contractsRes.data);
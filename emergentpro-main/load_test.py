@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+# Weighted scenario mixes; weights are relative
+MIXES = {
+    "login_storm": {"login": 1},
+    "read_heavy": {"dashboard": 5, "gantt": 3, "task_list": 2, "approvals_list": 1},
+    "write_heavy": {"task_write": 5, "approve": 2, "gantt": 1, "dashboard": 1},
+    "mixed": {"dashboard": 4, "gantt": 3, "task_list": 2, "task_write": 2, "approvals_list": 1, "approve": 1,
+              "login": 1},
+}
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def parse_mix(value):
+    if value in MIXES:
+        return dict(MIXES[value])
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(LoadTester.SCENARIOS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return mix
+
+class LoadTester:
+    """Drives the API with ``concurrency`` workers, each looping over a weighted scenario mix."""
+
+    SCENARIOS = ("login", "dashboard", "gantt", "task_list", "task_write", "approvals_list", "approve")
+
+    def __init__(self, base_url, concurrency, mix, duration, email, password, seed=None):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.mix = mix
+        self.duration = duration
+        self.email = email
+        self.password = password
+        self.rng = random.Random(seed)
+        self.token = None
+        self.project_ids = []
+        self.task_ids = []
+        self.approval_ids = []
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    # ---- bookkeeping ----
+    async def request(self, client, label, method, path, **kwargs):
+        """Send one request and record its latency under the route ``label``."""
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, f"{self.base_url}{path}", headers=headers, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        elapsed = (time.perf_counter() - started) * 1000
+        self.latencies.setdefault(label, []).append(elapsed)
+        counts = self.statuses.setdefault(label, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+        if response is None or status >= 400:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return response
+
+    # ---- setup ----
+    async def setup(self, client, seed_data):
+        if seed_data:
+            response = await client.post(f"{self.base_url}/seed", timeout=600)
+            response.raise_for_status()
+        self.token = await self.login(client)
+        projects = await client.get(f"{self.base_url}/projects", params={"view": "summary", "limit": 500},
+                                    headers={"Authorization": f"Bearer {self.token}"})
+        tasks = await client.get(f"{self.base_url}/tasks", params={"fields": "id", "limit": 1000},
+                                 headers={"Authorization": f"Bearer {self.token}"})
+        # Only pending approvals; approving a closed one still appends to its chain
+        approvals = await client.get(f"{self.base_url}/approvals",
+                                     params={"status": "pending", "fields": "id", "limit": 500},
+                                     headers={"Authorization": f"Bearer {self.token}"})
+        for response in (projects, tasks, approvals):
+            response.raise_for_status()
+        self.project_ids = [p["id"] for p in projects.json()]
+        self.task_ids = [t["id"] for t in tasks.json()]
+        self.approval_ids = [a["id"] for a in approvals.json()]
+        if not self.project_ids or not self.task_ids:
+            raise RuntimeError("No projects or tasks found; run with --seed or seed the database first")
+
+    async def login(self, client):
+        response = await client.post(f"{self.base_url}/auth/login",
+                                     json={"email": self.email, "password": self.password})
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    # ---- scenarios ----
+    async def scenario_login(self, client):
+        await self.request(client, "POST /auth/login", "POST", "/auth/login",
+                           json={"email": self.email, "password": self.password})
+
+    async def scenario_dashboard(self, client):
+        await self.request(client, "GET /dashboard/stats", "GET", "/dashboard/stats")
+
+    async def scenario_gantt(self, client):
+        project_id = self.rng.choice(self.project_ids)
+        await self.request(client, "GET /projects/{id}/gantt", "GET", f"/projects/{project_id}/gantt")
+
+    async def scenario_task_list(self, client):
+        project_id = self.rng.choice(self.project_ids)
+        await self.request(client, "GET /tasks", "GET", "/tasks",
+                           params={"project_id": project_id, "view": "summary", "limit": 100})
+
+    async def scenario_task_write(self, client):
+        task_id = self.rng.choice(self.task_ids)
+        await self.request(client, "PUT /tasks/{id}", "PUT", f"/tasks/{task_id}",
+                           json={"progress": self.rng.randint(0, 100)})
+
+    async def scenario_approvals_list(self, client):
+        await self.request(client, "GET /approvals", "GET", "/approvals", params={"status": "pending", "limit": 50})
+
+    async def scenario_approve(self, client):
+        if not self.approval_ids:
+            return await self.scenario_approvals_list(client)
+        approval_id = self.rng.choice(self.approval_ids)
+        response = await self.request(client, "POST /approvals/{id}/approve", "POST",
+                                      f"/approvals/{approval_id}/approve", json={"comments": "load test"})
+        # Retire it once its last level is signed, so documents don't grow for the rest of the run
+        if (response is not None and response.status_code == 200 and response.json().get("status") == "approved"
+                and approval_id in self.approval_ids):
+            self.approval_ids.remove(approval_id)
+
+    # ---- run ----
+    async def worker(self, client, deadline):
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            name = self.rng.choices(names, weights=weights)[0]
+            await getattr(self, f"scenario_{name}")(client)
+
+    async def run(self, seed_data=False, warmup=0.0):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+            await self.setup(client, seed_data)
+            if warmup:
+                await asyncio.gather(*(self.worker(client, time.perf_counter() + warmup)
+                                       for _ in range(self.concurrency)))
+                self.latencies, self.statuses, self.errors = {}, {}, {}
+            started = time.perf_counter()
+            deadline = started + self.duration
+            await asyncio.gather(*(self.worker(client, deadline) for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - started
+        return self.summary(elapsed)
+
+    def summary(self, elapsed):
+        def stats(latencies, errors, statuses=None):
+            ordered = sorted(latencies)
+            row = {
+                "count": len(ordered),
+                "errors": errors,
+                "rps": round(len(ordered) / elapsed, 2) if elapsed else 0,
+                "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0,
+                "p50_ms": round(percentile(ordered, 50), 2),
+                "p95_ms": round(percentile(ordered, 95), 2),
+                "p99_ms": round(percentile(ordered, 99), 2),
+                "max_ms": round(ordered[-1], 2) if ordered else 0,
+            }
+            if statuses is not None:
+                row["statuses"] = statuses
+            return row
+
+        routes = {label: stats(values, self.errors.get(label, 0), self.statuses.get(label, {}))
+                  for label, values in sorted(self.latencies.items())}
+        everything = [value for values in self.latencies.values() for value in values]
+        return {
+            "meta": {
+                "base_url": self.base_url,
+                "concurrency": self.concurrency,
+                "duration_s": round(elapsed, 2),
+                "mix": self.mix,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            },
+            "routes": routes,
+            "total": stats(everything, sum(self.errors.values())),
+        }
+
+# ---- reporting ----
+COLUMNS = ("count", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+
+def print_report(result):
+    meta = result["meta"]
+    print(f"🚀 {meta['base_url']} - concurrency {meta['concurrency']}, {meta['duration_s']}s, mix {meta['mix']}")
+    print(f"{'route':<32}" + "".join(f"{column:>10}" for column in COLUMNS))
+    for label, row in [*result["routes"].items(), ("TOTAL", result["total"])]:
+        print(f"{label:<32}" + "".join(f"{row[column]:>10}" for column in COLUMNS))
+
+def _delta(before, after):
+    if not before:
+        return "     n/a"
+    return f"{(after - before) / before * 100:+7.1f}%"
+
+def print_comparison(baseline, candidate):
+    """Per-route change from ``baseline`` to ``candidate``; negative latency deltas are improvements."""
+    metrics = ("rps", "p50_ms", "p95_ms", "p99_ms")
+    print(f"{'route':<32}" + "".join(f"{metric:>28}" for metric in metrics))
+    labels = sorted(set(baseline["routes"]) | set(candidate["routes"]))
+    rows = [(label, baseline["routes"].get(label), candidate["routes"].get(label)) for label in labels]
+    rows.append(("TOTAL", baseline["total"], candidate["total"]))
+    for label, before, after in rows:
+        if before is None or after is None:
+            print(f"{label:<32}  only in {'candidate' if before is None else 'baseline'}")
+            continue
+        cells = "".join(f"{before[m]:>10} -> {after[m]:<8}{_delta(before[m], after[m])}" for m in metrics)
+        print(f"{label:<32}{cells}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the Defense PM API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Drive the API and report per-route throughput and latency")
+    run.add_argument("--base-url", default=os.environ.get("LOADTEST_BASE_URL", "http://localhost:8001/api"))
+    run.add_argument("--concurrency", type=int, default=50)
+    run.add_argument("--duration", type=float, default=30, help="Seconds to run after warmup")
+    run.add_argument("--warmup", type=float, default=0, help="Seconds of unrecorded traffic first")
+    run.add_argument("--mix", type=parse_mix, default=MIXES["mixed"],
+                     help=f"One of {', '.join(MIXES)} or name=weight,... over {', '.join(LoadTester.SCENARIOS)}")
+    run.add_argument("--email", default="admin@defense.gov")
+    run.add_argument("--password", default="admin123")
+    run.add_argument("--seed", action="store_true", help="POST /seed before running")
+    run.add_argument("--random-seed", type=int, default=None)
+    run.add_argument("--output", help="Write the results as JSON, for later comparison")
+    run.add_argument("--compare", help="Baseline results JSON to compare this run against")
+
+    compare = commands.add_parser("compare", help="Compare two saved runs")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        with open(args.baseline) as f_baseline, open(args.candidate) as f_candidate:
+            print_comparison(json.load(f_baseline), json.load(f_candidate))
+        return 0
+
+    tester = LoadTester(args.base_url, args.concurrency, args.mix, args.duration, args.email, args.password,
+                        seed=args.random_seed)
+    result = asyncio.run(tester.run(seed_data=args.seed, warmup=args.warmup))
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print()
+            print_comparison(json.load(f), result)
+    return 0 if result["total"]["errors"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import random
+from datetime import date
+
+from allocation import (_EPSILON, allocation_totals, daily_capacity, format_day, group_assignments,
+                        leave_windows, level_resources, over_allocations, parse_day, shifted, sweep)
+from scheduling import compute_schedule
+from synthetic import generate_program
+
+DAY0 = date(2024, 3, 1).toordinal()
+
+def _task(task_id, start, end, assignees, hours, **fields):
+    return {"id": task_id, "project_id": "p", "start_date": format_day(DAY0 + start),
+            "end_date": format_day(DAY0 + end), "assigned_to": assignees, "estimated_hours": hours,
+            "status": "todo", **fields}
+
+# ---------- over-allocation sweep ----------
+def _brute_force(assignments, capacity, leaves, low, high):
+    """Per-day loads: {day: (load, available)} for every overloaded day in [low, high]."""
+    overloaded = {}
+    for day in range(low, high + 1):
+        load = sum(a.hours_per_day for a in assignments if a.start <= day <= a.end)
+        available = 0.0 if any(start <= day <= end for start, end in leaves) else capacity
+        if load > available + _EPSILON:
+            overloaded[day] = (load, available)
+    return overloaded
+
+def test_sweep_matches_per_day_brute_force():
+    rng = random.Random(21)
+    for _ in range(200):
+        resource = {"id": "r", "capacity_hours": 240, "availability": rng.choice((50, 100)),
+                    "leave_schedule": [{"start_date": format_day(DAY0 + s), "end_date": format_day(DAY0 + s + rng.randrange(0, 4))}
+                                       for s in rng.sample(range(60), rng.randrange(0, 3))]}
+        tasks = []
+        for i in range(rng.randrange(1, 12)):
+            start = rng.randrange(0, 60)
+            tasks.append(_task(f"t{i}", start, start + rng.randrange(0, 15), ["r"] + (["u"] if rng.random() < 0.2 else []),
+                               rng.choice((0, 8, 40, 80, 200))))
+        assignments = group_assignments(tasks, {"r"}).get("r", [])
+        capacity, leaves = daily_capacity(resource), leave_windows(resource)
+        low, high = DAY0 + rng.randrange(0, 20), DAY0 + rng.randrange(40, 80)
+
+        ranges = sweep(assignments, capacity, leaves, (low, high))
+        expected = _brute_force(assignments, capacity, leaves, low, high)
+
+        days = [d for r in ranges for d in range(parse_day(r["start_date"]), parse_day(r["end_date"]) + 1)]
+        assert sorted(days) == sorted(expected)
+        assert sum(r["days"] for r in ranges) == len(expected)
+        for r in ranges:
+            in_range = [expected[d] for d in range(parse_day(r["start_date"]), parse_day(r["end_date"]) + 1)]
+            assert r["peak_hours_per_day"] == round(max(load for load, _ in in_range), 2)
+            assert abs(r["excess_hours"] - sum(load - available for load, available in in_range)) < 0.02
+        # Adjacent overloaded days always end up in one range
+        for before, after in zip(ranges, ranges[1:]):
+            assert parse_day(after["start_date"]) > parse_day(before["end_date"]) + 1
+
+def test_over_allocations_report():
+    resources = [{"id": "r1", "name": "Ana", "capacity_hours": 240},
+                 {"id": "r2", "name": "Ben", "capacity_hours": 240}]
+    tasks = [
+        _task("a", 0, 4, ["r1"], 40),
+        _task("b", 2, 6, ["r1", "user-9"], 80),
+        _task("c", 0, 9, ["r2"], 40),
+        _task("done", 0, 9, ["r2"], 400, status="completed"),
+    ]
+    (conflict,) = over_allocations(tasks, resources)
+    assert conflict["resource_id"] == "r1"
+    assert conflict["allocated_projects"] == ["p"]
+    # 8 h/day from a plus 8 h/day from r1's half of b (the other assignee isn't a resource) on days 2-4
+    assert conflict["ranges"] == [{
+        "start_date": format_day(DAY0 + 2), "end_date": format_day(DAY0 + 4), "days": 3,
+        "peak_hours_per_day": 16.0, "capacity_hours_per_day": 8.0, "excess_hours": 24.0,
+        "on_leave": False, "task_ids": ["a", "b"],
+    }]
+    assert allocation_totals([conflict]) == {"resources_over_capacity": 1, "excess_hours": 24.0}
+
+def test_leave_days_have_no_capacity():
+    resource = {"id": "r", "capacity_hours": 240,
+                "leave_schedule": [{"start_date": format_day(DAY0 + 3), "end_date": format_day(DAY0 + 3)}]}
+    (conflict,) = over_allocations([_task("a", 0, 4, ["r"], 20)], [resource])
+    assert [(r["start_date"], r["on_leave"], r["excess_hours"]) for r in conflict["ranges"]] == [
+        (format_day(DAY0 + 3), True, 4.0)]
+
+# ---------- leveling ----------
+def _graphs(tasks):
+    return {project_id: compute_schedule([t for t in tasks if t["project_id"] == project_id])
+            for project_id in {t["project_id"] for t in tasks}}
+
+def _chain(tail_days):
+    fs = lambda pred: [{"task_id": pred, "type": "finish_to_start", "lag_days": 0}]
+    return [
+        _task("a", 0, 4, ["r"], 40, priority="high"),
+        _task("b", 0, 1, ["r"], 16),
+        _task("c", 5, 4 + tail_days, [], 0, dependencies=fs("a")),
+    ]
+
+RESOURCE = {"id": "r", "capacity_hours": 240}
+
+def test_leveling_delays_the_task_with_float():
+    tasks = _chain(tail_days=5)
+    plan = level_resources(tasks, _graphs(tasks), [RESOURCE])
+    assert [(c["id"], c["new_start_date"], c["new_end_date"], c["delay_days"]) for c in plan["changes"]] == [
+        ("b", format_day(DAY0 + 5), format_day(DAY0 + 6), 5)]
+    assert plan["unplaced"] == []
+    assert over_allocations(shifted(tasks, plan["changes"]), [RESOURCE]) == []
+
+def test_leveling_never_moves_past_the_late_start():
+    # b's late start is day 4, so the first free slot (day 5) would delay the project
+    tasks = _chain(tail_days=1)
+    plan = level_resources(tasks, _graphs(tasks), [RESOURCE])
+    assert plan == {"changes": [], "unplaced": ["b"]}
+
+def test_leveling_keeps_cpm_late_starts_and_finish_dates():
+    for seed in (1, 2, 3):
+        generated = generate_program(seed, 0, 4, 80, 4, "2024-01-01T00:00:00+00:00")
+        tasks, resources = generated["tasks"], generated["resources"]
+        graphs = _graphs(tasks)
+        plan = level_resources(tasks, graphs, resources)
+        assert plan["changes"], f"seed {seed} should need leveling"
+
+        for change in plan["changes"]:
+            graph = graphs[change["project_id"]]
+            assert parse_day(change["new_start_date"]) <= graph.origin + graph.late_start(change["id"])
+            assert change["delay_days"] > 0
+
+        leveled = shifted(tasks, plan["changes"])
+        for project_id, graph in _graphs(leveled).items():
+            assert graph.finish == graphs[project_id].finish
+        # Finish-to-start dependencies that held before still hold
+        before, after = {t["id"]: t for t in tasks}, {t["id"]: t for t in leveled}
+        for task in tasks:
+            for dep in task["dependencies"]:
+                if parse_day(before[dep["task_id"]]["end_date"]) < parse_day(task["start_date"]):
+                    assert parse_day(after[dep["task_id"]]["end_date"]) < parse_day(after[task["id"]]["start_date"])
+        assert (allocation_totals(over_allocations(leveled, resources))["excess_hours"]
+                <= allocation_totals(over_allocations(tasks, resources))["excess_hours"])
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pyarrow as pa
+from pydantic import BaseModel
+
+from exports import stream_columnar
+
+class Project(BaseModel):
+    id: str
+    progress: int = 0
+    archived: bool = False
+    kpis: List[Dict[str, Any]] = []
+
+async def _cursor(docs):
+    for doc in docs:
+        yield doc
+
+def _export(docs, format="arrow") -> pa.Table:
+    async def collect():
+        return b"".join([chunk async for chunk in stream_columnar(_cursor(docs), Project, format)])
+    data = asyncio.run(collect())
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(pa.BufferReader(data))
+    return pa.ipc.open_stream(data).read_all()
+
+def test_struct_fields_are_coerced_and_bad_values_become_null():
+    table = _export([{"id": "p1", "progress": "40", "kpis": [
+        {"name": "Uptime", "target": "95%", "current": "97.5", "unit": "%"},
+        {"name": 7, "target": 10, "extra": "dropped"},
+    ]}])
+    assert table.column("progress").to_pylist() == [40]
+    assert table.column("kpis").to_pylist() == [[
+        {"name": "Uptime", "target": None, "current": 97.5, "unit": "%"},
+        {"name": "7", "target": 10.0, "current": None, "unit": None},
+    ]]
+
+def test_parquet_export_survives_free_form_structs():
+    table = _export([{"id": "p1", "kpis": [{"target": {"nested": True}}]}, {"id": "p2", "kpis": "not a list"}],
+                    format="parquet")
+    assert table.column("id").to_pylist() == ["p1", "p2"]
+    assert table.column("kpis").to_pylist() == [[{"name": None, "target": None, "current": None, "unit": None}], None]
+
+def test_string_flags_are_parsed_not_truth_tested():
+    values = [True, "false", "True", " 1 ", "0", 0, 1, 2, "yes", "", [False], None]
+    table = _export([{"id": f"p{i}", "archived": value} for i, value in enumerate(values)], format="parquet")
+    assert table.column("archived").to_pylist() == [True, False, True, True, False, False, True,
+                                                    None, None, None, None, None]
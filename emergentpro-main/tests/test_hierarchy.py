@@ -0,0 +1,65 @@
+from hierarchy import build_tree, tree_nodes
+
+
+def project(project_id, parent=None, **fields):
+    return {"id": project_id, "parent_project_id": parent, "progress": 0, "health_score": 100, **fields}
+
+
+def test_rollups_sum_budgets_and_weight_averages():
+    root = project("p", budget_allocated=100, budget_spent=40, progress=50, health_score=90)
+    descendants = [
+        project("c1", "p", budget_allocated=300, budget_spent=60.5, progress=10, health_score=50),
+        project("g1", "c1", budget_allocated=0, budget_spent=1.25, progress=100, health_score=20),
+        project("c2", "p", progress=30),
+    ]
+    tree = build_tree(root, descendants)
+
+    assert tree["rollup"] == {
+        "project_count": 4, "depth": 2,
+        "budget_allocated": 400, "budget_planned": 0, "budget_spent": 101.75,
+        "budget_forecast": 0, "budget_released": 0,
+        # Weighted by budget_allocated: unfunded projects don't move the average
+        "progress": 20.0, "health_score": 60.0,
+        "min_health_score": 20,
+    }
+    c1 = tree["children"][0]
+    assert c1["rollup"]["project_count"] == 2
+    assert c1["rollup"]["depth"] == 1
+    assert c1["rollup"]["budget_spent"] == 61.75
+    assert c1["rollup"]["progress"] == 10.0
+    assert c1["rollup"]["min_health_score"] == 20
+
+
+def test_averages_fall_back_to_plain_mean_without_budget():
+    tree = build_tree(project("p", progress=10), [project("a", "p", progress=20, health_score=70),
+                                                  project("b", "p", progress=60, health_score=40)])
+    assert tree["rollup"]["progress"] == 30.0
+    assert tree["rollup"]["health_score"] == 70.0
+    assert tree["children"][1]["rollup"] == {
+        "project_count": 1, "depth": 0,
+        "budget_allocated": 0, "budget_planned": 0, "budget_spent": 0, "budget_forecast": 0, "budget_released": 0,
+        "progress": 60.0, "health_score": 40.0, "min_health_score": 40,
+    }
+
+
+def test_children_sorted_and_nodes_listed_root_first():
+    tree = build_tree(project("p"), [project("b", "p"), project("b2", "b"), project("a", "p"), project("b1", "b")])
+    assert [child["id"] for child in tree["children"]] == ["a", "b"]
+    assert [node["id"] for node in tree_nodes(tree)] == ["p", "a", "b", "b1", "b2"]
+    assert all("_subtree" not in node for node in tree_nodes(tree))
+
+
+def test_cycles_are_cut():
+    # A parent link back to the root (bad data) must not loop or count anything twice
+    tree = build_tree(project("p", "b"), [project("a", "p"), project("b", "a"), project("p", "b")])
+    assert [node["id"] for node in tree_nodes(tree)] == ["p", "a", "b"]
+    assert tree["rollup"]["project_count"] == 3
+    assert tree["rollup"]["depth"] == 2
+
+
+def test_deep_chain_does_not_recurse():
+    descendants = [project(f"p{i}", f"p{i - 1}", budget_spent=1) for i in range(1, 2000)]
+    tree = build_tree(project("p0", budget_spent=1), descendants)
+    assert tree["rollup"]["project_count"] == 2000
+    assert tree["rollup"]["depth"] == 1999
+    assert tree["rollup"]["budget_spent"] == 2000
@@ -0,0 +1,136 @@
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from scheduling import ScheduleCycleError, ScheduleError, compute_schedule
+
+def task(task_id, start, end, *deps, **fields):
+    return {"id": task_id, "start_date": start, "end_date": end,
+            "dependencies": [{"task_id": p, "type": t, "lag_days": lag} for p, t, lag in deps], **fields}
+
+def test_forward_and_backward_pass():
+    graph = compute_schedule([
+        task("a", "2024-01-01", "2024-01-03"),
+        task("b", "2024-01-01", "2024-01-02"),
+        task("c", "2024-01-04", "2024-01-05", ("a", "finish_to_start", 0), ("b", "finish_to_start", 0)),
+    ])
+    assert {t: graph.early_start(t) for t in "abc"} == {"a": 0, "b": 0, "c": 3}
+    assert {t: graph.late_start(t) for t in "abc"} == {"a": 0, "b": 1, "c": 3}
+    assert graph.finish == 5
+    assert graph.critical_path() == ["a", "c"]
+    assert graph.task_schedule("b") == {
+        "id": "b", "duration_days": 2, "early_start": "2024-01-01", "early_finish": "2024-01-02",
+        "late_start": "2024-01-02", "late_finish": "2024-01-03", "float_days": 1, "is_critical_path": False,
+    }
+    assert graph.summary()["project_finish"] == "2024-01-05"
+
+@pytest.mark.parametrize("dep_type, lag, early_start", [
+    ("finish_to_start", 2, "2024-01-07"),
+    ("start_to_start", 1, "2024-01-02"),
+    ("finish_to_finish", 0, "2024-01-03"),
+    ("start_to_finish", 3, "2024-01-02"),
+])
+def test_dependency_types(dep_type, lag, early_start):
+    graph = compute_schedule([
+        task("p", "2024-01-01", "2024-01-04"),
+        task("s", "2024-01-01", "2024-01-02", ("p", dep_type, lag)),
+    ])
+    assert graph.task_schedule("s")["early_start"] == early_start
+
+def test_string_lag_is_coerced():
+    graph = compute_schedule([
+        task("p", "2024-01-01", "2024-01-01"),
+        task("s", "2024-01-01", "2024-01-01", ("p", "finish_to_start", "2")),
+    ])
+    assert graph.task_schedule("s")["early_start"] == "2024-01-04"
+
+@pytest.mark.parametrize("lag", ["two", [1], float("inf")])
+def test_bad_lag_raises_schedule_error(lag):
+    with pytest.raises(ScheduleError, match="invalid lag_days"):
+        compute_schedule([
+            task("p", "2024-01-01", "2024-01-01"),
+            task("s", "2024-01-01", "2024-01-01", ("p", "finish_to_start", lag)),
+        ])
+
+def test_cycle_is_reported():
+    with pytest.raises(ScheduleCycleError) as excinfo:
+        compute_schedule([
+            task("a", "2024-01-01", "2024-01-01", ("b", "finish_to_start", 0)),
+            task("b", "2024-01-01", "2024-01-01", ("a", "finish_to_start", 0)),
+        ])
+    assert excinfo.value.cycle[0] == excinfo.value.cycle[-1]
+
+def test_unresolved_dependencies_are_reported_not_fatal():
+    graph = compute_schedule([task("a", "2024-01-01", "2024-01-02", ("missing", "finish_to_start", 0))])
+    assert graph.unresolved == [{"task_id": "a", "depends_on": "missing"}]
+    assert graph.is_critical("a")
+
+# ---------- incremental recompute ----------
+def _random_tasks(rng, count):
+    tasks = {}
+    for i in range(count):
+        tasks[f"t{i:03d}"] = _random_task(rng, f"t{i:03d}", list(tasks))
+    return tasks
+
+def _random_task(rng, task_id, earlier):
+    start = date(2024, 2, 1) + timedelta(days=rng.randrange(0, 40))
+    end = start + timedelta(days=rng.randrange(0, 6))
+    deps = [(p, rng.choice(("finish_to_start", "start_to_start", "finish_to_finish", "start_to_finish")),
+             rng.randrange(0, 3)) for p in rng.sample(earlier, min(len(earlier), rng.randrange(0, 3)))]
+    return task(task_id, start.isoformat(), end.isoformat(), *deps)
+
+def _flags(graph):
+    return {t: (graph.is_critical(t), graph.float_days(t)) for t in graph.task_ids()}
+
+def test_incremental_recompute_matches_full_pass():
+    rng = random.Random(7)
+    tasks = _random_tasks(rng, 60)
+    graph = compute_schedule(tasks.values())
+    stored = _flags(graph)
+    ids = sorted(tasks)
+    for step in range(300):
+        action = rng.random()
+        if action < 0.15 and len(tasks) > 10:
+            task_id = rng.choice(sorted(tasks))
+            del tasks[task_id]
+            changes = graph.recompute(*graph.remove_task(task_id))
+            stored.pop(task_id)
+        else:
+            if action < 0.3:
+                task_id = f"n{step:03d}"
+                ids.append(task_id)
+            else:
+                task_id = rng.choice(sorted(tasks))
+            # Dependencies only point at earlier ids, so edits never close a cycle
+            earlier = [t for t in ids[:ids.index(task_id)] if t in tasks]
+            tasks[task_id] = _random_task(rng, task_id, earlier)
+            changes = graph.recompute(*graph.upsert_task(tasks[task_id]))
+        for task_id, critical, slack in changes:
+            stored[task_id] = (critical, slack)
+
+        full = compute_schedule(tasks.values())
+        assert stored == _flags(full), f"step {step}"
+        assert graph.finish == full.finish
+        assert {t: graph.task_schedule(t) for t in tasks} == {t: full.task_schedule(t) for t in tasks}
+        assert sorted(graph.critical_path()) == sorted(full.critical_path())
+
+# ---------- performance ----------
+def test_large_schedule_builds_and_computes_well_under_a_second():
+    rng = random.Random(1)
+    types = ("finish_to_start", "start_to_start", "finish_to_finish", "start_to_finish")
+    tasks = []
+    for i in range(50_000):
+        start = date(2024, 1, 1) + timedelta(days=rng.randrange(0, 300))
+        end = start + timedelta(days=rng.randrange(0, 20))
+        deps = [(f"t{p}", rng.choice(types), rng.randrange(0, 4)) for p in rng.sample(range(i), min(i, 2))]
+        tasks.append(task(f"t{i}", start.isoformat(), end.isoformat(), *deps))
+
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        graph = compute_schedule(tasks)
+        timings.append(time.perf_counter() - started)
+    assert len(graph.task_ids()) == 50_000
+    assert min(timings) < 1.0, f"best of 3: {min(timings):.2f}s"